@@ -0,0 +1,250 @@
+"""
+Stage-by-stage benchmarks for the IFR / CR / CFR pipelines.
+
+For every form and input size (default 1, 100 and 10000 rows of the
+bundled CSVs) the stages are timed separately:
+
+    rules       apply_*_rules
+    transform   preprocessor.transform on the rule-normalized frame
+    predict     predict_proba, per scheme
+    shap        top-3 SHAP attributions, per scheme (IFR / CR)
+    batch       explain_*_batch end to end
+    packed      explain_*_batch(engine="packed")
+
+plus cold start in a fresh interpreter: importing the explanation modules,
+loading every artifact (from the individual files and from a warm-start
+snapshot, explanation.snapshot) and answering a first IFR row. Each timing is repeated until `min_time`
+seconds or `max_rounds` rounds; min / median / mean and rows/s are kept.
+
+Run from the backend directory:
+
+    python -m benchmarks.run                               # all forms and sizes
+    python -m benchmarks.run --forms ifr --sizes 1 100 --out ifr.json
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+    python -m benchmarks.run --startup-only                # cold start only
+
+Results are written as JSON (default benchmarks/results/<timestamp>.json).
+--compare reports stages that got slower than the baseline by more than
+--tolerance and exits with status 1 if any did.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+SIZES = [1, 100, 10000]
+FORMS = ["ifr", "cr", "cfr"]
+
+COLD_START = """
+import json, sys, time
+t0 = time.perf_counter()
+import explanation.explanation_ifr, explanation.explanation_cr, explanation.explanation_cfr
+t1 = time.perf_counter()
+from explanation.registry import preload
+preload(snapshot=sys.argv[1] if len(sys.argv) > 1 else None)
+t2 = time.perf_counter()
+import pandas as pd
+from ingest import form_path
+explanation.explanation_ifr.explain_ifr_row(pd.read_csv(form_path("ifr"), nrows=1))
+t3 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "load_s": t2 - t1, "first_row_s": t3 - t2, "total_s": t3 - t0}))
+"""
+
+
+def measure(fn, rows=1, min_time=0.5, max_rounds=50, min_rounds=1):
+    """Time fn() repeatedly. Returns a dict of timing statistics in seconds."""
+    times = []
+    started = time.perf_counter()
+    while len(times) < min_rounds or (len(times) < max_rounds and time.perf_counter() - started < min_time):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    best = min(times)
+    return {
+        "min_s": best,
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "rounds": len(times),
+        "rows": rows,
+        "rows_per_s": rows / best if best else None,
+    }
+
+
+def _form_api(form):
+    from explanation import registry
+    if form == "ifr":
+        from explanation import explanation_ifr as m
+        from rules.rules_ifr import apply_ifr_rules as rules
+        return rules, m._ifr_matrix, m._ifr_models, m.explain_ifr_batch, lambda pre, n: m._ifr_feature_names(pre, n)
+    if form == "cr":
+        from explanation import explanation_cr as m
+        from rules.rules_cr import apply_cr_rules as rules
+        return rules, m._cr_matrix, m._cr_models, m.explain_cr_batch, lambda pre, n: m._cr_feature_names(pre, n)
+    from explanation import explanation_cfr as m
+    from rules.rules_cfr import apply_cfr_rules as rules
+    return (
+        rules,
+        lambda df: (registry.load_preprocessor("cfr"), m._cfr_matrix(df)),
+        m._cfr_models,
+        m.explain_cfr_batch,
+        None,
+    )
+
+
+def bench_form(form, sizes, min_time=0.5, shap=True, log=print):
+    from ingest import form_path
+    from explanation.shap_cache import explain_top_features
+    from explanation.explanation_cfr import transform_cfr
+    from preprocessing import transform
+
+    rules, matrix, models_fn, batch, feature_names_fn = _form_api(form)
+    data = pd.read_csv(form_path(form))
+    models = models_fn()
+    pre, _ = matrix(data.iloc[[0]])
+
+    results = {}
+    for n in sizes:
+        df = data.iloc[:n] if n <= len(data) else pd.concat([data] * (n // len(data) + 1)).iloc[:n]
+        norm = rules(df)
+        _, X = matrix(df)
+        rounds = {"min_time": min_time, "max_rounds": 50 if n < 1000 else 5}
+
+        stages = {
+            "rules": measure(lambda: rules(df), n, **rounds),
+            # on the rule-normalized frame, so the rules are not counted twice
+            "transform": measure(
+                (lambda: transform_cfr(norm)) if form == "cfr" else (lambda: transform(pre, norm)), n, **rounds
+            ),
+        }
+        for scheme, model in models.items():
+            stages[f"predict/{scheme}"] = measure(lambda m=model: m.predict_proba(X), n, **rounds)
+        if shap and feature_names_fn is not None:
+            names = feature_names_fn(pre, X.shape[1])
+            for scheme, model in models.items():
+                explain_top_features(model, X[:1], names)  # build the explainer outside the timing
+                stages[f"shap/{scheme}"] = measure(
+                    lambda m=model: explain_top_features(m, X, names), n,
+                    min_time=min_time, max_rounds=rounds["max_rounds"] if n < 1000 else 1,
+                )
+        stages["batch"] = measure(lambda: batch(df), n, **rounds)
+        stages["packed"] = measure(lambda: batch(df, engine="packed"), n, **rounds)
+
+        results[str(n)] = stages
+        log(f"{form} n={n}: " + ", ".join(
+            f"{k}={v['min_s'] * 1000:.2f}ms" for k, v in stages.items() if "/" not in k
+        ))
+    return results
+
+
+def cold_start(rounds=3, snapshot=None):
+    """
+    Fresh-interpreter import, artifact load (optionally from `snapshot`) and
+    first-row times, best of `rounds`.
+    """
+    runs = []
+    for _ in range(rounds):
+        out = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", COLD_START] + ([snapshot] if snapshot else []),
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {k: min(r[k] for r in runs) for k in runs[0]}
+
+
+def environment():
+    import numpy
+    import sklearn
+    import xgboost
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "xgboost": xgboost.__version__,
+        "commit": commit,
+    }
+
+
+def run(forms=FORMS, sizes=SIZES, min_time=0.5, shap=True, cold=True, log=print):
+    report = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment(), "forms": {}}
+    if cold:
+        report["cold_start"] = cold_start()
+        log(f"cold start: {report['cold_start']}")
+        from explanation.snapshot import save_snapshot
+
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshot = save_snapshot(os.path.join(tmp, "snapshot.joblib"))["path"]
+            report["cold_start_snapshot"] = cold_start(snapshot=snapshot)
+        log(f"cold start (snapshot): {report['cold_start_snapshot']}")
+    for form in forms:
+        report["forms"][form] = bench_form(form, sizes, min_time=min_time, shap=shap, log=log)
+    return report
+
+
+def compare(report, baseline, tolerance=0.2):
+    """[(key, baseline_s, current_s)] of stages slower than baseline * (1 + tolerance)."""
+    slower = []
+    for form, sizes in report["forms"].items():
+        for n, stages in sizes.items():
+            for stage, stats in stages.items():
+                base = baseline.get("forms", {}).get(form, {}).get(n, {}).get(stage)
+                if base and stats["min_s"] > base["min_s"] * (1 + tolerance):
+                    slower.append((f"{form}/{n}/{stage}", base["min_s"], stats["min_s"]))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the scoring pipelines.")
+    parser.add_argument("--forms", nargs="+", choices=FORMS, default=FORMS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent per timing")
+    parser.add_argument("--no-shap", action="store_true")
+    parser.add_argument("--no-cold-start", action="store_true")
+    parser.add_argument("--startup-only", action="store_true", help="only the cold-start timings")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="baseline result file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs baseline")
+    args = parser.parse_args(argv)
+
+    forms = [] if args.startup_only else args.forms
+    report = run(forms, args.sizes, args.min_time, shap=not args.no_shap,
+                 cold=args.startup_only or not args.no_cold_start)
+
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(report, json.load(f), args.tolerance)
+        for key, base, cur in slower:
+            print(f"SLOWER {key}: {base * 1000:.2f}ms -> {cur * 1000:.2f}ms")
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Community Resilience Index (CRI) scoring.
+
+CRI_Score in data/synthetic_cri_10000.csv is a weighted sum of the village
+indicators plus fixed points for drought-prone villages:
+
+    CRI = 0.15 * Water_Scarcity_Index     + 0.10 * Soil_Moisture_Index
+        + 0.10 * ST_HH_percent            + 0.15 * NTFP_Dependency_percent
+        + 0.10 * WageLabour_Dependency_percent
+        + 0.25 * Forest_Degradation_Index + 2.0  * Fire_Incidents_5yrs
+        + 15   * (Drought_Prone == "Yes")
+
+and Priority_Level buckets the score at 30 / 60 / 90 (Very Low / Low /
+Medium / High). The remaining indicators (Groundwater_Level,
+Rainfall_Category, Female_HH_percent, Elderly_percent, Disability_percent)
+carry weight 0; they stay in the tables so they can be given one.
+
+score() / priority() work on whole frames in one matrix-vector product.
+CRIEngine keeps the indicator matrix and current scores of a set of
+villages and updates them incrementally:
+
+    engine = CRIEngine.from_dataset()
+    engine.update(42, Fire_Incidents_5yrs=5)        # one village, O(#indicators)
+    engine.set_weights({"Forest_Degradation_Index": 0.3})
+                                                    # only the changed columns
+"""
+
+import numpy as np
+import pandas as pd
+
+CRI_DATASET = "cri"
+
+# numeric indicator -> weight
+CRI_WEIGHTS = {
+    "Water_Scarcity_Index": 0.15,
+    "Soil_Moisture_Index": 0.10,
+    "ST_HH_percent": 0.10,
+    "Female_HH_percent": 0.0,
+    "Elderly_percent": 0.0,
+    "Disability_percent": 0.0,
+    "NTFP_Dependency_percent": 0.15,
+    "WageLabour_Dependency_percent": 0.10,
+    "Forest_Degradation_Index": 0.25,
+    "Fire_Incidents_5yrs": 2.0,
+}
+
+# categorical indicator -> {normalized value: points}
+CRI_FLAGS = {
+    "Drought_Prone": {"yes": 15.0},
+    "Groundwater_Level": {},
+    "Rainfall_Category": {},
+}
+
+# upper bounds (exclusive) of each priority bucket
+PRIORITY_EDGES = [30.0, 60.0, 90.0]
+PRIORITY_LEVELS = ["Very Low", "Low", "Medium", "High"]
+
+
+def _flag_points(s: pd.Series, points: dict) -> np.ndarray:
+    if not points:
+        return np.zeros(len(s))
+    codes, uniques = pd.factorize(s)
+    per_value = np.array([points.get(str(v).strip().lower(), 0.0) for v in uniques] + [0.0])
+    return per_value[codes]  # NaN (code -1) takes the trailing 0
+
+
+def indicator_matrix(df: pd.DataFrame, weights=None):
+    """(columns, X) with X the (n, k) float matrix of the weighted indicators."""
+    columns = list(weights or CRI_WEIGHTS)
+    return columns, df[columns].to_numpy(dtype=float)
+
+
+def flag_points(df: pd.DataFrame, flags=None) -> np.ndarray:
+    """Sum of the categorical indicator points of each row."""
+    total = np.zeros(len(df))
+    for col, points in (flags or CRI_FLAGS).items():
+        if points and col in df.columns:
+            total += _flag_points(df[col], points)
+    return total
+
+
+def priority(scores) -> np.ndarray:
+    """Priority level of each score."""
+    bucket = np.searchsorted(PRIORITY_EDGES, np.asarray(scores, dtype=float), side="right")
+    return np.asarray(PRIORITY_LEVELS, dtype=object)[bucket]
+
+
+def score(df: pd.DataFrame, weights=None, flags=None) -> np.ndarray:
+    """CRI_Score of every row of df."""
+    weights = weights or CRI_WEIGHTS
+    columns, X = indicator_matrix(df, weights)
+    return X @ np.array([weights[c] for c in columns]) + flag_points(df, flags)
+
+
+class CRIEngine:
+    """
+    Scores of a fixed set of villages with incremental recompute.
+
+    Rows are addressed by the index labels of the frame the engine was built
+    from (village names are not unique in the data).
+    """
+
+    def __init__(self, df: pd.DataFrame, weights=None, flags=None):
+        self.index = df.index
+        self.weights = dict(CRI_WEIGHTS if weights is None else weights)
+        self.flags = {c: dict(p) for c, p in (CRI_FLAGS if flags is None else flags).items()}
+        self.columns = list(self.weights)
+        self._col = {c: j for j, c in enumerate(self.columns)}
+        self._w = np.array([self.weights[c] for c in self.columns])
+
+        self.X = df[self.columns].to_numpy(dtype=float, copy=True)
+        self.flag_values = {c: df[c].to_numpy(dtype=object, copy=True) for c in self.flags if c in df.columns}
+        self.points = flag_points(df, self.flags)
+        self.scores = self.X @ self._w + self.points
+        self.levels = priority(self.scores)
+
+    @classmethod
+    def from_dataset(cls, name=CRI_DATASET, **kwargs):
+        from datacache import load_dataset
+        return cls(load_dataset(name), **kwargs)
+
+    def _positions(self, rows):
+        pos = self.index.get_indexer(rows)
+        if (pos < 0).any():
+            raise KeyError(f"Unknown rows: {list(np.asarray(rows)[pos < 0])}")
+        return pos
+
+    def frame(self) -> pd.DataFrame:
+        """Current CRI_Score / Priority_Level of every village."""
+        return pd.DataFrame({"CRI_Score": self.scores, "Priority_Level": self.levels}, index=self.index)
+
+    def update(self, row, **indicators):
+        """
+        Change indicators of one village and recompute only its score.
+        Returns (old_level, new_level).
+        """
+        i = self._positions([row])[0]
+        for name, value in indicators.items():
+            if name in self._col:
+                self.X[i, self._col[name]] = float(value)
+            elif name in self.flag_values:
+                self.flag_values[name][i] = value
+            else:
+                raise KeyError(f"{name!r} is not a CRI indicator")
+
+        self.points[i] = sum(
+            self.flags[c].get(str(v[i]).strip().lower(), 0.0) for c, v in self.flag_values.items()
+        )
+        old = self.levels[i]
+        self.scores[i] = self.X[i] @ self._w + self.points[i]
+        self.levels[i] = priority(self.scores[i : i + 1])[0]
+        return old, self.levels[i]
+
+    def update_many(self, changes: pd.DataFrame):
+        """
+        Apply indicator changes for several villages (rows of `changes`
+        indexed like the engine, columns = indicators) and recompute only
+        those rows. Returns the index labels whose priority level changed.
+        """
+        pos = self._positions(changes.index)
+        for name in changes.columns:
+            if name in self._col:
+                self.X[pos, self._col[name]] = changes[name].to_numpy(dtype=float)
+            elif name in self.flag_values:
+                self.flag_values[name][pos] = changes[name].to_numpy(dtype=object)
+            else:
+                raise KeyError(f"{name!r} is not a CRI indicator")
+
+        points = np.zeros(len(pos))
+        for c, values in self.flag_values.items():
+            points += _flag_points(pd.Series(values[pos]), self.flags[c])
+        self.points[pos] = points
+        return self._rescore(pos, self.X[pos] @ self._w + points)
+
+    def set_weights(self, weights=None, flags=None):
+        """
+        Change some weights / flag points. Scores are shifted by the
+        contribution of the changed indicators only; returns the index labels
+        whose priority level changed.
+        """
+        n = len(self.scores)
+        weight_delta = np.zeros(n)
+        flag_delta = np.zeros(n)
+
+        changed = [c for c, w in (weights or {}).items() if w != self.weights.get(c)]
+        for c in changed:
+            if c not in self._col:
+                raise KeyError(f"{c!r} is not a CRI indicator")
+        if changed:
+            cols = [self._col[c] for c in changed]
+            diff = np.array([weights[c] - self.weights[c] for c in changed])
+            weight_delta = self.X[:, cols] @ diff
+            for c in changed:
+                self.weights[c] = weights[c]
+                self._w[self._col[c]] = weights[c]
+
+        for c, points in (flags or {}).items():
+            if c not in self.flag_values:
+                raise KeyError(f"{c!r} is not a CRI flag")
+            series = pd.Series(self.flag_values[c])
+            flag_delta += _flag_points(series, points) - _flag_points(series, self.flags[c])
+            self.flags[c] = dict(points)
+        self.points += flag_delta
+
+        delta = weight_delta + flag_delta
+        touched = np.flatnonzero(delta)
+        return self._rescore(touched, self.scores[touched] + delta[touched])
+
+    def _rescore(self, pos, new_scores):
+        new_levels = priority(new_scores)
+        moved = new_levels != self.levels[pos]
+        self.scores[pos] = new_scores
+        self.levels[pos] = new_levels
+        return self.index[pos[moved]]
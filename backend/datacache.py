@@ -0,0 +1,226 @@
+"""
+Build-once columnar cache of the CSVs in backend/data.
+
+Each dataset is parsed from CSV once and stored column by column under
+data/.cache/<dataset>/:
+
+    <column>.npy         numeric columns (float64 / int64 / bool)
+    <column>.codes.npy   category and text columns as int32 codes
+    meta.json            source stamp, row count, kind / dtype / categories
+
+Loading opens only the requested columns with np.load(mmap_mode="r"), so a
+projection of a few columns costs milliseconds and worker processes that
+load the same dataset share the pages through the OS page cache instead of
+each holding a private copy. The cache is rebuilt automatically when the
+source CSV's size or mtime changes. Builds hold an exclusive file lock
+(data/.cache/<dataset>.lock), so concurrent processes build a dataset
+once and never race on the directory swap. Bundled datasets are cached
+under their name; any other CSV under its file name plus a hash of its
+absolute path, so two claims.csv files never share a cache.
+
+    df = load_dataset("village", columns=["District", "Water_Scarcity_Index"])
+    arrays = load_columns("ifr", ["annual_income", "house_type"])
+
+The Form A/B/C datasets ("ifr", "cr", "cfr") are parsed through
+ingest.read_form, so they come back with the same canonical names and
+normalized categories; other CSVs keep their headers and pandas' inferred
+types (strings become categories).
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds are only serialized within a process
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from ingest import DATA_DIR, FORM_FILES, FORM_SCHEMAS, read_form
+
+CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+CACHE_VERSION = 1
+
+DATASETS = {
+    **FORM_FILES,
+    "village": "FINAL_Village_Master_GIS.csv",
+    "cri": "synthetic_cri_10000.csv",
+}
+
+_LOCK = threading.Lock()
+
+
+def _source(name):
+    if name in DATASETS:
+        return os.path.join(DATA_DIR, DATASETS[name])
+    return os.path.abspath(name)
+
+
+def _cache_dir(name):
+    if name in DATASETS:
+        key = name
+    else:
+        path = os.path.abspath(name)
+        digest = hashlib.sha1(path.encode()).hexdigest()[:12]
+        key = f"{os.path.splitext(os.path.basename(path))[0]}-{digest}"
+    return os.path.join(CACHE_DIR, key)
+
+
+@contextlib.contextmanager
+def _build_lock(name):
+    """Exclusive cross-process lock on the dataset's cache."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(_cache_dir(name) + ".lock", "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def _file_name(column):
+    # column names may hold spaces, tabs or slashes
+    return "".join(ch if ch.isalnum() or ch in "-_." else f"%{ord(ch):02x}" for ch in column)
+
+
+def _read_source(name, src):
+    if name in FORM_SCHEMAS:
+        df = read_form(name, path=src)
+        return df, FORM_SCHEMAS[name]
+    return pd.read_csv(src), {}
+
+
+def build(name):
+    """Parse the dataset's CSV and (re)write its cache. Returns the meta dict."""
+    with _LOCK, _build_lock(name):
+        return _build(name)
+
+
+def _build(name):
+    src = _source(name)
+    stamp = _stamp(src)
+    df, schema = _read_source(name, src)
+
+    target = _cache_dir(name)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".build-", dir=CACHE_DIR)
+
+    columns = {}
+    for c in df.columns:
+        s = df[c]
+        fname = _file_name(c)
+        kind = schema.get(c)
+        if kind is None:
+            kind = "numeric" if s.dtype.kind in "biuf" else "category"
+
+        if kind == "numeric":
+            np.save(os.path.join(tmp, fname + ".npy"), s.to_numpy())
+            columns[c] = {"kind": kind, "file": fname + ".npy", "dtype": str(s.dtype)}
+        else:
+            cat = s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("category")
+            np.save(os.path.join(tmp, fname + ".codes.npy"), cat.cat.codes.to_numpy().astype(np.int32))
+            columns[c] = {
+                "kind": kind,
+                "file": fname + ".codes.npy",
+                "categories": [str(v) for v in cat.cat.categories],
+            }
+
+    meta = {
+        "version": CACHE_VERSION,
+        "source": src,
+        "stamp": stamp,
+        "nrows": len(df),
+        "columns": columns,
+    }
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    # swap the finished directory into place; readers never see a partial cache
+    old = None
+    if os.path.exists(target):
+        old = tempfile.mkdtemp(prefix=".old-", dir=CACHE_DIR)
+        os.replace(target, os.path.join(old, "data"))
+    os.replace(tmp, target)
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+
+    return meta
+
+
+def _read_meta(name):
+    try:
+        with open(os.path.join(_cache_dir(name), "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def ensure(name):
+    """Meta of an up-to-date cache for `name`, building it if needed."""
+    meta = _read_meta(name)
+    src = _source(name)
+    if meta is not None and meta.get("version") == CACHE_VERSION and meta["stamp"] == _stamp(src):
+        return meta
+    with _LOCK, _build_lock(name):
+        # another thread or process may have built it while we waited
+        meta = _read_meta(name)
+        if meta is not None and meta.get("version") == CACHE_VERSION and meta["stamp"] == _stamp(src):
+            return meta
+        return _build(name)
+
+
+def load_columns(name, columns=None):
+    """
+    {column: array} for the requested columns (default: all). Numeric columns
+    are read-only memory maps; category / text columns are pd.Categorical
+    over memory-mapped codes.
+    """
+    meta = ensure(name)
+    base = _cache_dir(name)
+    wanted = list(meta["columns"]) if columns is None else list(columns)
+
+    out = {}
+    for c in wanted:
+        info = meta["columns"].get(c)
+        if info is None:
+            raise KeyError(f"{c!r} is not a column of {name!r}")
+        data = np.load(os.path.join(base, info["file"]), mmap_mode="r")
+        if info["kind"] == "numeric":
+            out[c] = data
+        else:
+            out[c] = pd.Categorical.from_codes(data, categories=info["categories"])
+    return out
+
+
+def load_dataset(name, columns=None) -> pd.DataFrame:
+    """
+    The dataset (or a projection of it) as a DataFrame. Numeric columns stay
+    backed by the memory maps; text columns come back as plain strings.
+    """
+    meta = ensure(name)
+    arrays = load_columns(name, columns)
+    data = {}
+    for c, values in arrays.items():
+        if meta["columns"][c]["kind"] == "text":
+            data[c] = np.asarray(values, dtype=object)
+        else:
+            data[c] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def columns_of(name):
+    return list(ensure(name)["columns"])
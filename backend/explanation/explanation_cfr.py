@@ -114,11 +114,19 @@
 
 
 
+import logging
+
 import pandas as pd
-import joblib
 import numpy as np
 
 from rules.rules_cfr import apply_cfr_rules
+from explanation.registry import (
+    artifact_path, available_schemes, load_preprocessor, load_input_features, load_model, scheme_threshold,
+)
+from explanation.tree_engine import check_engine, packed_forest
+from explanation.metrics import inc, stage
+
+logger = logging.getLogger(__name__)
 
 CFR_META = {
     "jjm": {
@@ -158,72 +166,98 @@ CFR_META = {
     }
 }
 
-def explain_cfr_row(row):
+CFR_SCHEMES = [
+    "jjm",
+    "pmjanman",
+    "dajgua",
+    "mgnrega_community",
+    "nrlm_community",
+    "tribalprod_community",
+    "ngogrant"
+]
+
+
+def _cfr_matrix(df: pd.DataFrame):
+    """
+    Normalize ORIGINAL CFR rows with the CFR rules (lowercase names and
+    values, defaults for missing columns) and transform them in one pass.
+    The preprocessor was fitted on rule-normalized values, so raw
+    mixed-case strings would otherwise all be unknown categories.
+    """
+    with stage("rules", form="cfr"):
+        df = apply_cfr_rules(df)
+    return transform_cfr(df)
+
+
+def transform_cfr(df: pd.DataFrame):
+    """
+    The model matrix of CFR rows that are already rule-normalized (the
+    output of apply_cfr_rules); _cfr_matrix without the rules pass.
+    """
+    # Load preprocessor + feature order
+    pre = load_preprocessor("cfr")
+    feature_cols = load_input_features("cfr")
+    feature_cols = [c.lower() for c in feature_cols]
+
+    # Missing features become np.nan; numeric inputs of a Series row arrive
+    # as object values and are lowercased to strings by the rules
+    with stage("transform", form="cfr"):
+        X = df.reindex(columns=feature_cols)
+        num_cols = [c for name, _, cols in pre.transformers_ if name == "num" for c in cols]
+        X[num_cols] = X[num_cols].apply(pd.to_numeric, errors="coerce")
+        return pre.transform(X)
+
+
+def _cfr_models(schemes=None):
+    """{scheme: model} for every CFR scheme (of `schemes`) whose model could be loaded."""
+    models = {}
+    for sch in available_schemes("cfr", CFR_SCHEMES if schemes is None else schemes):
+        try:
+            models[sch] = load_model("cfr", sch)
+        except FileNotFoundError:
+            logger.warning("Model for %s not found at %s", sch, artifact_path("cfr", "model", sch))
+            inc("dss_model_load_errors_total", form="cfr", scheme=sch)
+        except Exception as e:
+            logger.error("Error loading model %s: %s", sch, e)
+            inc("dss_model_load_errors_total", form="cfr", scheme=sch)
+    return models
+
+
+def explain_cfr_row(row, schemes=None):
     """
     Explain predictions for ONE CFR row.
     row can be: df.iloc[0] (Series) or df.iloc[[0]] (single-row DataFrame)
+    schemes: optional subset of CFR_SCHEMES to score (default: all)
     """
 
-    # Ensure row is a Series
+    # Ensure row is a single-row DataFrame
     if isinstance(row, pd.DataFrame):
         if len(row) != 1:
             raise ValueError("DataFrame row input must have exactly one row.")
-        r = row.iloc[0].copy()
+        X = row
     else:
-        r = row.copy()
-
-    # Normalize index/column names
-    r.index = r.index.astype(str).str.lower()
-
-    # Load preprocessor + feature order
-    pre = joblib.load("models/cfr_models/cfr_preprocessor.joblib")
-    feature_cols = joblib.load("models/cfr_models/cfr_features.joblib")
-    feature_cols = [c.lower() for c in feature_cols]
-
-    # Ensure missing features exist as np.nan
-    for c in feature_cols:
-        if c not in r.index:
-            r[c] = np.nan
+        X = row.to_frame().T
 
     # Prepare data for model
-    X = r[feature_cols].to_frame().T
     try:
-        Xp = pre.transform(X)
+        Xp = _cfr_matrix(X)
     except Exception as e:
-        print(f"Error during preprocessing: {e}")
+        logger.error("Error during preprocessing: %s", e)
+        inc("dss_preprocessing_errors_total", form="cfr")
         return []
 
-    schemes = [
-        "jjm",
-        "pmjanman",
-        "dajgua",
-        "mgnrega_community",
-        "nrlm_community",
-        "tribalprod_community",
-        "ngogrant"
-    ]
-
     results = []
 
-    for sch in schemes:
-        model_path = f"models/cfr_models/xgb_{sch}.joblib"
-
+    for sch, model in _cfr_models(schemes).items():
         try:
-            model = joblib.load(model_path)
-        except FileNotFoundError:
-            print(f"Warning: Model for {sch} not found at {model_path}")
-            continue
-        except Exception as e:
-            print(f"Error loading model {sch}: {e}")
-            continue
-
-        try:
-            prob = float(model.predict_proba(Xp)[0, 1])
+            with stage("predict", form="cfr", scheme=sch):
+                prob = float(model.predict_proba(Xp)[0, 1])
         except Exception as e:
-            print(f"Error predicting with model {sch}: {e}")
+            logger.error("Error predicting with model %s: %s", sch, e)
+            inc("dss_prediction_errors_total", form="cfr", scheme=sch)
             prob = 0.0
 
-        eligible = "YES" if prob >= 0.5 else "NO"
+        eligible = "YES" if prob >= scheme_threshold("cfr", sch) else "NO"
 
         meta = CFR_META.get(sch, {
             "reason": "Village meets scheme criteria.",
@@ -241,6 +275,80 @@ def explain_cfr_row(row):
         })
 
     if not results:
-        print("Warning: No CFR models were loaded for this row.")
+        logger.warning("No CFR models were loaded for this row.")
+
+    return results
+
+
+def explain_cfr_batch(df: pd.DataFrame, engine: str = "xgboost", schemes=None) -> pd.DataFrame:
+    """
+    Score every row of a CFR DataFrame in one vectorized pass.
+
+    engine="packed" scores all schemes in one walk of the PackedForest
+    (explanation.tree_engine) instead of one predict_proba call per scheme;
+    it is faster for single rows and small batches.
+
+    Returns a DataFrame aligned with df.index holding, per scheme,
+    "<SCHEME>_probability" (float) and "<SCHEME>_eligible" (bool,
+    probability >= the scheme's manifest threshold). Scheme names are upper-cased as in explain_cfr_row.
+    `schemes` limits scoring to a subset of CFR_SCHEMES.
+    """
+    check_engine(engine)
+    Xp = _cfr_matrix(df)
+    models = _cfr_models(schemes)
+    if not models:
+        # nothing to score; the packed engine cannot build an empty forest
+        return pd.DataFrame(index=df.index)
+    if engine == "packed":
+        with stage("predict", form="cfr", scheme="packed"):
+            packed = packed_forest("cfr", models).predict_proba(Xp)
+
+    out = {}
+    for j, (sch, model) in enumerate(models.items()):
+        try:
+            if engine == "packed":
+                prob = packed[:, j]
+            else:
+                with stage("predict", form="cfr", scheme=sch):
+                    prob = model.predict_proba(Xp)[:, 1]
+        except Exception as e:
+            logger.error("Error predicting with model %s: %s", sch, e)
+            inc("dss_prediction_errors_total", form="cfr", scheme=sch)
+            prob = np.zeros(len(df))
+
+        out[f"{sch.upper()}_probability"] = prob
+        out[f"{sch.upper()}_eligible"] = prob >= scheme_threshold("cfr", sch)
+
+    return pd.DataFrame(out, index=df.index)
+
+
+def explain_cfr_rows(df: pd.DataFrame, schemes=None):
+    """
+    explain_cfr_row for many rows at once: one list of scheme dicts per
+    row, with the transform and predictions run once over df.
+    schemes: optional subset of CFR_SCHEMES to score (default: all)
+    """
+    batch = explain_cfr_batch(df, schemes=schemes)
+    scored = [s for s in CFR_SCHEMES if f"{s.upper()}_probability" in batch]
+
+    results = [[] for _ in range(len(batch))]
+    for sch in scored:
+        meta = CFR_META.get(sch, {
+            "reason": "Village meets scheme criteria.",
+            "benefit": "Helps community development.",
+            "impact": "Improves overall well-being."
+        })
+        probs = batch[f"{sch.upper()}_probability"].to_numpy()
+        eligible = batch[f"{sch.upper()}_eligible"].to_numpy()
+
+        for i in range(len(batch)):
+            results[i].append({
+                "scheme": sch.upper(),
+                "probability": float(probs[i]),
+                "eligible": "YES" if eligible[i] else "NO",
+                "reason": meta["reason"],
+                "benefit": meta["benefit"],
+                "impact": meta["impact"]
+            })
 
     return results
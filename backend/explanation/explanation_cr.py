@@ -1,9 +1,14 @@
 import pandas as pd
 import numpy as np
-import joblib
-import shap
 
 from rules.rules_cr import apply_cr_rules
+from explanation.registry import (
+    available_schemes, load_preprocessor, load_feature_names, load_model, scheme_threshold,
+)
+from explanation.shap_cache import explain_top_features, explained_rows, select_top_features
+from explanation.tree_engine import check_engine, packed_forest
+from preprocessing import transform
+from explanation.metrics import stage
 
 CR_SCHEMES = [
     "JJM",
@@ -53,7 +58,46 @@ CR_IMPACT = {
     },
 }
 
-def explain_cr_row(row: pd.DataFrame):
+def _cr_matrix(df: pd.DataFrame):
+    """
+    Apply the CR rules to ORIGINAL CR rows and transform the normalized
+    features with the fitted preprocessor (one pass for all rows).
+    """
+    # Apply rules to create labels and normalized features
+    with stage("rules", form="cr"):
+        df = apply_cr_rules(df)
+
+    # Load preprocessor and transform the columns it was fitted on
+    # (labels and, for lean artifacts, community_name are left out)
+    pre = load_preprocessor("cr")
+    with stage("transform", form="cr"):
+        X = transform(pre, df)
+    return pre, X
+
+
+def _cr_feature_names(pre, n_features):
+    try:
+        return load_feature_names("cr")
+    except:
+        try:
+            return pre.get_feature_names_out()
+        except:
+            return [f"f_{i}" for i in range(n_features)]
+
+
+def _cr_models(schemes=None):
+    """{scheme: model} for every CR scheme (of `schemes`) that has a trained model."""
+    models = {}
+    for scheme in available_schemes("cr", CR_SCHEMES if schemes is None else schemes):
+        try:
+            models[scheme] = load_model("cr", scheme)
+        except FileNotFoundError:
+            # model not trained (e.g. single-class label)
+            continue
+    return models
+
+
+def explain_cr_row(row: pd.DataFrame, explain: str = "full", contributions: str = "shap", schemes=None):
     """
     Explain ALL CR schemes for a single community row.
 
@@ -61,6 +105,12 @@ def explain_cr_row(row: pd.DataFrame):
     ----------
     row : pd.DataFrame
         Single-row DataFrame from FINAL_CR_FormB.csv
+    explain : str
+        "full" (attributions for every scheme), "eligible_only" (only for
+        schemes the row is eligible for) or "none"; skipped schemes get an
+        empty "top_features" list.
+    contributions : str
+        "shap" (shap.TreeExplainer) or "native" (XGBoost pred_contribs).
 
     Returns
     -------
@@ -78,52 +128,28 @@ def explain_cr_row(row: pd.DataFrame):
           ...
         ]
     """
-    # 1) Apply rules to create labels and normalized features
-    df = apply_cr_rules(row.copy())
-
-    # 2) Split features / labels
-    label_cols = [c for c in df.columns if c.startswith("label_")]
-    feature_cols = [c for c in df.columns if c not in label_cols]
-
-    # 3) Load preprocessor and transform
-    pre = joblib.load("models/cr_models/cr_preprocessor.joblib")
-    X = pre.transform(df[feature_cols])
+    # 1-3) Apply rules, split features / labels, transform
+    pre, X = _cr_matrix(row)
 
     # 4) Load feature names (for SHAP)
-    try:
-        feature_names = joblib.load("models/cr_models/cr_feature_names.joblib")
-    except:
-        try:
-            feature_names = pre.get_feature_names_out()
-        except:
-            feature_names = [f"f_{i}" for i in range(X.shape[1])]
+    feature_names = _cr_feature_names(pre, X.shape[1])
 
     results = []
 
     # 5) For each scheme, load model, predict, explain
-    for scheme in CR_SCHEMES:
-        model_path = f"models/cr_models/cr_model_{scheme}.joblib"
-        try:
-            model = joblib.load(model_path)
-        except FileNotFoundError:
-            # model not trained (e.g. single-class label)
-            continue
-
+    for scheme, model in _cr_models(schemes).items():
         # probability and eligibility
-        prob = float(model.predict_proba(X)[0, 1])
-        eligible = prob >= 0.5
-
-        # SHAP explanation
-        explainer = shap.TreeExplainer(model)
-        shap_vals = explainer.shap_values(X)[0]
-        idx_sorted = np.argsort(np.abs(shap_vals))[::-1][:3]
+        with stage("predict", form="cr", scheme=scheme):
+            prob = float(model.predict_proba(X)[0, 1])
+        threshold = scheme_threshold("cr", scheme)
+        eligible = prob >= threshold
 
+        # SHAP explanation (top 3 by |contribution|), only if requested
         top_features = []
-        for idx in idx_sorted:
-            top_features.append({
-                "feature": feature_names[idx],
-                "contribution": float(shap_vals[idx])
-            })
+        if len(explained_rows(explain, [prob], threshold)):
+            with stage("shap", form="cr", scheme=scheme):
+                top_features = explain_top_features(model, X, feature_names, k=3,
+                                                    contributions=contributions)[0]
 
         impact_info = CR_IMPACT.get(scheme, {
             "reason": "Community vulnerability and infrastructure gaps.",
@@ -142,3 +168,110 @@ def explain_cr_row(row: pd.DataFrame):
         })
 
     return results
+
+
+def explain_cr_batch(df: pd.DataFrame, top_k: int = 0, engine: str = "xgboost",
+                     explain: str = "full", contributions: str = "shap", schemes=None) -> pd.DataFrame:
+    """
+    Score every row of a CR DataFrame in one vectorized pass.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Any number of rows from FINAL_CR_FormB.csv
+    top_k : int
+        If > 0, also return the top_k SHAP attributions of every row,
+        computed in batched SHAP calls.
+    engine : str
+        "xgboost" (one predict_proba per scheme) or "packed" (all schemes in
+        one walk of the PackedForest from explanation.tree_engine; faster
+        for single rows and small batches).
+    explain : str
+        With top_k, "full" explains every row, "eligible_only" only the
+        rows eligible for the scheme and "none" none (empty lists).
+    contributions : str
+        "shap" (shap.TreeExplainer) or "native" (XGBoost pred_contribs).
+
+    Returns
+    -------
+    pd.DataFrame aligned with df.index with, per scheme,
+    "<SCHEME>_probability" (float), "<SCHEME>_eligible" (bool) and,
+    with top_k, "<SCHEME>_top_features" (list of dicts).
+    """
+    check_engine(engine)
+    pre, X = _cr_matrix(df)
+    if top_k:
+        feature_names = _cr_feature_names(pre, X.shape[1])
+
+    models = _cr_models(schemes)
+    if not models:
+        # nothing to score; the packed engine cannot build an empty forest
+        return pd.DataFrame(index=df.index)
+    if engine == "packed":
+        with stage("predict", form="cr", scheme="packed"):
+            packed = packed_forest("cr", models).predict_proba(X)
+
+    out = {}
+    for j, (scheme, model) in enumerate(models.items()):
+        if engine == "packed":
+            prob = packed[:, j]
+        else:
+            with stage("predict", form="cr", scheme=scheme):
+                prob = model.predict_proba(X)[:, 1]
+        out[f"{scheme}_probability"] = prob
+        threshold = scheme_threshold("cr", scheme)
+        out[f"{scheme}_eligible"] = prob >= threshold
+        if top_k:
+            with stage("shap", form="cr", scheme=scheme):
+                out[f"{scheme}_top_features"] = select_top_features(
+                    model, X, prob, feature_names, k=top_k, explain=explain, contributions=contributions,
+                    threshold=threshold,
+                )
+
+    return pd.DataFrame(out, index=df.index)
+
+
+def explain_cr_rows(df: pd.DataFrame, explain: str = "full", contributions: str = "shap", schemes=None):
+    """
+    explain_cr_row for many rows at once.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Any number of rows from FINAL_CR_FormB.csv
+    explain, contributions : str
+        As for explain_cr_row.
+    schemes : list, optional
+        Subset of CR_SCHEMES to score (default: all), as for explain_cr_row.
+
+    Returns
+    -------
+    list with one explain_cr_row-style list of scheme dicts per row; the
+    rules, transform, predictions and SHAP run once over df.
+    """
+    batch = explain_cr_batch(df, top_k=3, explain=explain, contributions=contributions, schemes=schemes)
+    scored = [s for s in CR_SCHEMES if f"{s}_probability" in batch]
+
+    results = [[] for _ in range(len(batch))]
+    for scheme in scored:
+        impact_info = CR_IMPACT.get(scheme, {
+            "reason": "Community vulnerability and infrastructure gaps.",
+            "benefit": "Community-level development and welfare support.",
+            "impact": "Improves collective resilience and living standards."
+        })
+        probs = batch[f"{scheme}_probability"].to_numpy()
+        eligible = batch[f"{scheme}_eligible"].to_numpy()
+        tops = batch[f"{scheme}_top_features"].to_numpy()
+
+        for i in range(len(batch)):
+            results[i].append({
+                "scheme": scheme,
+                "probability": float(probs[i]),
+                "eligible": "YES" if eligible[i] else "NO",
+                "top_features": tops[i],
+                "reason": impact_info["reason"],
+                "benefit": impact_info["benefit"],
+                "impact": impact_info["impact"],
+            })
+
+    return results
@@ -1,9 +1,14 @@
 import pandas as pd
 import numpy as np
-import joblib
-import shap
 
 from rules.rules_ifr import apply_ifr_rules
+from explanation.registry import (
+    available_schemes, load_preprocessor, load_feature_names, load_model, scheme_threshold,
+)
+from explanation.shap_cache import explain_top_features, explained_rows, select_top_features
+from explanation.tree_engine import check_engine, packed_forest
+from preprocessing import transform
+from explanation.metrics import stage
 
 SCHEMES_IFR = [
     "PMAYG",
@@ -83,51 +88,69 @@ IMPACT_IFR = {
     },
 }
 
-def explain_ifr_row(row: pd.DataFrame):
+def _ifr_matrix(df: pd.DataFrame):
     """
-    row: single-row DataFrame with ORIGINAL IFR columns.
-    returns: list of dicts per scheme
+    Apply the IFR rules to ORIGINAL IFR rows and transform the normalized
+    features with the fitted preprocessor (one pass for all rows).
     """
-    df = apply_ifr_rules(row.copy())
+    with stage("rules", form="ifr"):
+        df = apply_ifr_rules(df)
 
-    label_cols = [c for c in df.columns if c.startswith("label_")]
-    feature_cols = [c for c in df.columns if c not in label_cols]
+    # The preprocessor reads only the columns it was fitted on, so a lean
+    # (identifier-free) artifact never sees names or Aadhaar / phone numbers
+    pre = load_preprocessor("ifr")
+    with stage("transform", form="ifr"):
+        X = transform(pre, df)
+    return pre, X
 
-    pre = joblib.load("models/ifr_models/ifr_preprocessor.joblib")
-    X = pre.transform(df[feature_cols])
 
+def _ifr_feature_names(pre, n_features):
     try:
-        feature_names = joblib.load("models/ifr_models/ifr_feature_names.joblib")
+        return load_feature_names("ifr")
     except:
         try:
-            feature_names = pre.get_feature_names_out()
+            return pre.get_feature_names_out()
         except:
-            feature_names = [f"f_{i}" for i in range(X.shape[1])]
+            return [f"f_{i}" for i in range(n_features)]
 
-    results = []
-
-    for scheme in SCHEMES_IFR:
-        model_path = f"models/ifr_models/ifr_model_{scheme}.joblib"
-        label_col = f"label_{scheme}"
 
+def _ifr_models(schemes=None):
+    """{scheme: model} for every IFR scheme (of `schemes`) that has a trained model."""
+    models = {}
+    for scheme in available_schemes("ifr", SCHEMES_IFR if schemes is None else schemes):
         try:
-            model = joblib.load(model_path)
+            models[scheme] = load_model("ifr", scheme)
         except FileNotFoundError:
             continue
+    return models
+
 
-        prob = float(model.predict_proba(X)[0, 1])
-        eligible = prob >= 0.5
+def explain_ifr_row(row: pd.DataFrame, explain: str = "full", contributions: str = "shap", schemes=None):
+    """
+    row: single-row DataFrame with ORIGINAL IFR columns.
+    explain: "full", "eligible_only" (SHAP only for schemes the row is
+        eligible for) or "none"; skipped schemes get empty top_features.
+    contributions: "shap" (shap.TreeExplainer) or "native" (XGBoost
+        pred_contribs, no shap import).
+    returns: list of dicts per scheme
+    """
+    pre, X = _ifr_matrix(row)
 
-        explainer = shap.TreeExplainer(model)
-        shap_vals = explainer.shap_values(X)[0]
-        idx_sorted = np.argsort(np.abs(shap_vals))[::-1][:3]
+    feature_names = _ifr_feature_names(pre, X.shape[1])
+
+    results = []
+
+    for scheme, model in _ifr_models(schemes).items():
+        with stage("predict", form="ifr", scheme=scheme):
+            prob = float(model.predict_proba(X)[0, 1])
+        threshold = scheme_threshold("ifr", scheme)
+        eligible = prob >= threshold
 
         top_features = []
-        for idx in idx_sorted:
-            top_features.append({
-                "feature": feature_names[idx],
-                "contribution": float(shap_vals[idx])
-            })
+        if len(explained_rows(explain, [prob], threshold)):
+            with stage("shap", form="ifr", scheme=scheme):
+                top_features = explain_top_features(model, X, feature_names, k=3,
+                                                    contributions=contributions)[0]
 
         meta = IMPACT_IFR.get(scheme, {
             "reason": "Eligibility based on livelihood and vulnerability.",
@@ -146,3 +169,93 @@ def explain_ifr_row(row: pd.DataFrame):
         })
 
     return results
+
+
+def explain_ifr_batch(df: pd.DataFrame, top_k: int = 0, engine: str = "xgboost",
+                      explain: str = "full", contributions: str = "shap", schemes=None) -> pd.DataFrame:
+    """
+    Score every row of an IFR DataFrame in one vectorized pass.
+
+    The rules, the preprocessor and each scheme model run once over the
+    whole frame instead of once per row.
+
+    Returns a DataFrame aligned with df.index holding, for every scheme
+    with a trained model, "<SCHEME>_probability" (float) and
+    "<SCHEME>_eligible" (bool, probability >= the scheme's threshold). With top_k > 0 a
+    "<SCHEME>_top_features" column holds the top_k SHAP attributions of
+    each row, computed in batched SHAP calls: for every row with
+    explain="full", only for the rows eligible for that scheme with
+    "eligible_only" (the others get an empty list) and for none with "none".
+    contributions="native" takes the attributions from XGBoost's
+    pred_contribs output instead of shap.TreeExplainer.
+
+    engine="packed" scores all schemes in one walk of the PackedForest
+    (explanation.tree_engine) instead of one predict_proba call per scheme;
+    it is faster for single rows and small batches.
+    """
+    check_engine(engine)
+    pre, X = _ifr_matrix(df)
+    if top_k:
+        feature_names = _ifr_feature_names(pre, X.shape[1])
+
+    models = _ifr_models(schemes)
+    if not models:
+        # nothing to score; the packed engine cannot build an empty forest
+        return pd.DataFrame(index=df.index)
+    if engine == "packed":
+        with stage("predict", form="ifr", scheme="packed"):
+            packed = packed_forest("ifr", models).predict_proba(X)
+
+    out = {}
+    for j, (scheme, model) in enumerate(models.items()):
+        if engine == "packed":
+            prob = packed[:, j]
+        else:
+            with stage("predict", form="ifr", scheme=scheme):
+                prob = model.predict_proba(X)[:, 1]
+        out[f"{scheme}_probability"] = prob
+        threshold = scheme_threshold("ifr", scheme)
+        out[f"{scheme}_eligible"] = prob >= threshold
+        if top_k:
+            with stage("shap", form="ifr", scheme=scheme):
+                out[f"{scheme}_top_features"] = select_top_features(
+                    model, X, prob, feature_names, k=top_k, explain=explain, contributions=contributions,
+                    threshold=threshold,
+                )
+
+    return pd.DataFrame(out, index=df.index)
+
+
+def explain_ifr_rows(df: pd.DataFrame, explain: str = "full", contributions: str = "shap", schemes=None):
+    """
+    explain_ifr_row for many rows at once: the rules, transform, predictions
+    and SHAP run once over df. Returns one list of scheme dicts per row, in
+    the same format as explain_ifr_row (same explain / contributions /
+    schemes options).
+    """
+    batch = explain_ifr_batch(df, top_k=3, explain=explain, contributions=contributions, schemes=schemes)
+    scored = [s for s in SCHEMES_IFR if f"{s}_probability" in batch]
+
+    results = [[] for _ in range(len(batch))]
+    for scheme in scored:
+        meta = IMPACT_IFR.get(scheme, {
+            "reason": "Eligibility based on livelihood and vulnerability.",
+            "benefit": "Direct household-level support.",
+            "impact": "Improves long-term livelihood security."
+        })
+        probs = batch[f"{scheme}_probability"].to_numpy()
+        eligible = batch[f"{scheme}_eligible"].to_numpy()
+        tops = batch[f"{scheme}_top_features"].to_numpy()
+
+        for i in range(len(batch)):
+            results[i].append({
+                "scheme": scheme,
+                "probability": float(probs[i]),
+                "eligible": "YES" if eligible[i] else "NO",
+                "top_features": tops[i],
+                "reason": meta["reason"],
+                "benefit": meta["benefit"],
+                "impact": meta["impact"],
+            })
+
+    return results
@@ -0,0 +1,259 @@
+"""
+Rules-first hybrid scoring.
+
+Most scheme models were trained on labels produced by apply_*_rules and
+reproduce them exactly; for those schemes the vectorized rule output *is*
+the answer and running the preprocessor, the model and SHAP only costs time.
+The hybrid path answers such rule-determined schemes straight from
+RuleSet.evaluate (probability 1.0 / 0.0, explained by the rule's own
+conditions) and sends only the genuinely learned schemes through the model
+path. When every scheme of a form is rule-determined the preprocessor is
+never touched.
+
+Which schemes are rule-determined is read from the form's metrics.json:
+a scheme entry with "rule_determined" decides it explicitly (written by
+train.py and by the check below), otherwise a held-out accuracy of 1.0 with
+an AUC of at least 0.999 counts. Without metrics.json every scheme stays on
+the model path.
+
+    python -m explanation.hybrid check --form all            # hybrid vs full model path
+    python -m explanation.hybrid check --form all --write    # record rule_determined in metrics.json
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from explanation.registry import REGISTRY, available_schemes, form_dir
+from explanation.metrics import stage
+
+MIN_ACC = 1.0
+MIN_AUC = 0.999
+
+
+def _form(form):
+    """Scheme list, meta texts, batch explainer and ruleset of a form."""
+    if form == "ifr":
+        from explanation import explanation_ifr as m
+        from rules.rules_ifr import IFR_RULESET
+        return m.SCHEMES_IFR, m.IMPACT_IFR, m.explain_ifr_batch, IFR_RULESET
+    if form == "cr":
+        from explanation import explanation_cr as m
+        from rules.rules_cr import CR_RULESET
+        return m.CR_SCHEMES, m.CR_IMPACT, m.explain_cr_batch, CR_RULESET
+    if form == "cfr":
+        from explanation import explanation_cfr as m
+        from rules.rules_cfr import CFR_RULESET
+        return m.CFR_SCHEMES, m.CFR_META, m.explain_cfr_batch, CFR_RULESET
+    raise ValueError(f"Unknown form {form!r}")
+
+
+def _column(form, scheme):
+    # explain_cfr_batch upper-cases scheme names in its columns
+    return scheme.upper() if form == "cfr" else scheme
+
+
+def _rule_key(ruleset, scheme):
+    # rule tables are keyed like the models, except in case
+    for key in (scheme, scheme.upper(), scheme.lower()):
+        if key in ruleset.table:
+            return key
+    return None
+
+
+def metrics_path(form):
+    return os.path.join(form_dir(form), "metrics.json")
+
+
+def load_metrics(form):
+    """The form's metrics.json as a dict ({} if there is none)."""
+    try:
+        return REGISTRY.get(metrics_path(form))
+    except FileNotFoundError:
+        return {}
+
+
+def rule_schemes(form, min_acc=MIN_ACC, min_auc=MIN_AUC):
+    """The form's trained schemes that are answered from the rules, in scheme order."""
+    schemes, _, _, ruleset = _form(form)
+    metrics = load_metrics(form)
+    out = []
+    for scheme in available_schemes(form, schemes):
+        m = metrics.get(scheme)
+        if not m or _rule_key(ruleset, scheme) is None:
+            continue
+        if "rule_determined" in m:
+            determined = bool(m["rule_determined"])
+        else:
+            determined = m.get("acc", 0.0) >= min_acc and m.get("auc", 0.0) >= min_auc
+        if determined:
+            out.append(scheme)
+    return out
+
+
+def explain_hybrid_batch(form: str, df: pd.DataFrame, top_k: int = 0, engine: str = "xgboost",
+                         explain: str = "full", contributions: str = "shap", rules=None) -> pd.DataFrame:
+    """
+    explain_<form>_batch with the rule-determined schemes answered by the
+    rules. Same columns, in the same order; rule-determined schemes get
+    probability 1.0 / 0.0 and, with top_k, empty top_features lists (their
+    explanation is the rule, see explain_hybrid_rows).
+
+    `rules` overrides rule_schemes(form).
+    """
+    schemes, _, batch_fn, ruleset = _form(form)
+    trained = available_schemes(form, schemes)
+    rules = set(rule_schemes(form) if rules is None else rules)
+    learned = [s for s in trained if s not in rules]
+
+    with stage("rules", form=form, path="hybrid"):
+        masks = ruleset.evaluate(df)
+
+    model = None
+    if learned:
+        options = {"engine": engine}
+        if form != "cfr":
+            options.update(top_k=top_k, explain=explain, contributions=contributions)
+        model = batch_fn(df, schemes=learned, **options)
+
+    out = {}
+    for scheme in trained:
+        col = _column(form, scheme)
+        if scheme in rules:
+            mask = np.asarray(masks[_rule_key(ruleset, scheme)], dtype=bool)
+            out[f"{col}_probability"] = mask.astype(float)
+            out[f"{col}_eligible"] = mask
+            if top_k and form != "cfr":
+                out[f"{col}_top_features"] = [[] for _ in range(len(df))]
+        elif model is not None and f"{col}_probability" in model:
+            for suffix in ("probability", "eligible", "top_features"):
+                if f"{col}_{suffix}" in model:
+                    out[f"{col}_{suffix}"] = model[f"{col}_{suffix}"].to_numpy()
+    return pd.DataFrame(out, index=df.index)
+
+
+def explain_hybrid_rows(form: str, df: pd.DataFrame, explain: str = "full", contributions: str = "shap",
+                        rules=None):
+    """
+    explain_<form>_rows through the hybrid path: one list of scheme dicts
+    per row. Every dict carries "source" ("rules" or "model"); rule-answered
+    schemes list the rule's conditions as
+    "rule_conditions": [{"condition": "annual_income < 80000", "met": True}, ...]
+    in place of model attributions.
+    """
+    schemes, meta_texts, _, ruleset = _form(form)
+    rules = set(rule_schemes(form) if rules is None else rules)
+    batch = explain_hybrid_batch(form, df, top_k=3, explain=explain, contributions=contributions, rules=rules)
+    view = ruleset.view(df) if rules else None
+
+    results = [[] for _ in range(len(batch))]
+    for scheme in schemes:
+        col = _column(form, scheme)
+        if f"{col}_probability" not in batch:
+            continue
+        meta = meta_texts.get(scheme, {"reason": "", "benefit": "", "impact": ""})
+        probs = batch[f"{col}_probability"].to_numpy()
+        eligible = batch[f"{col}_eligible"].to_numpy()
+        tops = batch[f"{col}_top_features"].to_numpy() if f"{col}_top_features" in batch else None
+        conditions = ruleset.conditions(view, _rule_key(ruleset, scheme)) if scheme in rules else None
+
+        for i in range(len(batch)):
+            entry = {
+                "scheme": col,
+                "probability": float(probs[i]),
+                "eligible": "YES" if eligible[i] else "NO",
+                "source": "rules" if conditions is not None else "model",
+            }
+            if conditions is not None:
+                entry["rule_conditions"] = [{"condition": c, "met": bool(mask[i])} for c, mask in conditions]
+            elif tops is not None:
+                entry["top_features"] = tops[i]
+            entry.update(reason=meta["reason"], benefit=meta["benefit"], impact=meta["impact"])
+            results[i].append(entry)
+
+    return results
+
+
+def explain_hybrid_row(form: str, row, explain: str = "full", contributions: str = "shap", rules=None):
+    """explain_hybrid_rows for one row (a single-row DataFrame or a Series)."""
+    if not isinstance(row, pd.DataFrame):
+        row = row.to_frame().T
+    if len(row) != 1:
+        raise ValueError("DataFrame row input must have exactly one row.")
+    return explain_hybrid_rows(form, row, explain=explain, contributions=contributions, rules=rules)[0]
+
+
+def agreement(form, df, engine="xgboost"):
+    """
+    Offline check of the hybrid against the full model path on df:
+    {scheme: {"rows", "agreement", "rule_determined"}} for every trained
+    scheme, where agreement is the share of rows whose eligibility the
+    rules and the scheme's model agree on.
+    """
+    schemes, _, batch_fn, ruleset = _form(form)
+    trained = [s for s in available_schemes(form, schemes) if _rule_key(ruleset, s) is not None]
+    model = batch_fn(df, engine=engine)
+    rules = explain_hybrid_batch(form, df, engine=engine, rules=trained)
+    determined = set(rule_schemes(form))
+
+    report = {}
+    for scheme in trained:
+        col = f"{_column(form, scheme)}_eligible"
+        same = model[col].to_numpy() == rules[col].to_numpy()
+        report[scheme] = {
+            "rows": int(len(df)),
+            "agreement": float(same.mean()) if len(df) else 1.0,
+            "rule_determined": scheme in determined,
+        }
+    return report
+
+
+def record_agreement(form, report):
+    """Write rule_agreement / rule_determined (agreement == 1.0) into the form's metrics.json."""
+    from explanation.manifest import atomic_json
+
+    metrics = dict(load_metrics(form))
+    for scheme, r in report.items():
+        entry = dict(metrics.get(scheme, {}))
+        entry["rule_agreement"] = r["agreement"]
+        entry["rule_determined"] = r["agreement"] == 1.0
+        metrics[scheme] = entry
+    atomic_json(metrics, metrics_path(form))
+
+
+def main(argv=None):
+    from ingest import form_path
+
+    parser = argparse.ArgumentParser(description="Check rules-first hybrid scoring against the model path.")
+    parser.add_argument("command", choices=["check"])
+    parser.add_argument("--form", choices=["all", "ifr", "cr", "cfr"], default="all")
+    parser.add_argument("--csv", default=None, help="rows to check on (default: the form's bundled CSV)")
+    parser.add_argument("--nrows", type=int, default=None)
+    parser.add_argument("--write", action="store_true",
+                        help="record the agreement and rule_determined flags in metrics.json")
+    args = parser.parse_args(argv)
+
+    forms = ["ifr", "cr", "cfr"] if args.form == "all" else [args.form]
+    failed = []
+    for form in forms:
+        df = pd.read_csv(args.csv or form_path(form), nrows=args.nrows)
+        report = agreement(form, df)
+        for scheme, r in report.items():
+            mark = "rules" if r["rule_determined"] else "model"
+            print(f"{form:<4} {scheme:<22} {mark:<6} agreement {r['agreement']:.4f} over {r['rows']} rows")
+            if r["rule_determined"] and r["agreement"] < 1.0:
+                failed.append(f"{form}/{scheme}")
+        if args.write:
+            record_agreement(form, report)
+            print(f"{form}: rule_determined recorded in {metrics_path(form)}")
+
+    if failed and not args.write:
+        print("Rule-determined schemes that disagree with their model:", ", ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Native model artifacts and the per-form manifest.
+
+Scheme models are saved in XGBoost's own binary format (UBJSON, .ubj, file
+names as FORMS[form]["native"]) rather than as pickled sklearn wrappers,
+so loading them needs neither unpickling nor the exact library versions
+they were trained with. Next to them every form directory gets a
+manifest.json that explanation.registry loads from:
+
+    {
+      "format": 1,
+      "form": "cfr",
+      "created": "2026-10-17T12:00:00",
+      "libraries": {"xgboost": "3.2.0", "sklearn": "1.6.1"},
+      "preprocessor": {"file": "cfr_preprocessor.joblib", "sha256": "...",
+                       "version": "<first 16 hex of sha256>", "n_inputs": 26, "n_features": 69},
+      "features": {"input": [...], "encoded": [...]},
+      "schemes": {"jjm": {"file": "xgb_jjm.ubj", "sha256": "...", "threshold": 0.5,
+                          "n_features": 69, "n_trees": 180}, ...},
+      "skipped": {"tribalprod_community": "single-class labels"}
+    }
+
+Only the listed schemes are loaded (no probing for files) and each file is
+checked against its sha256 when loaded. The fitted preprocessor stays a
+joblib pickle (a ColumnTransformer has no portable format); the manifest
+pins its checksum and the sklearn version it was written with. Files are
+written under temporary names and the manifest goes last, so readers switch
+to a new set of artifacts in one step. Pickled scheme models of the old
+layout are removed once the manifest is in place, so nothing can pair them
+with a refitted preprocessor.
+
+Run from the backend directory:
+
+    python -m explanation.manifest export --form all    # pickled models -> .ubj + manifest
+    python -m explanation.manifest verify --form all
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import joblib
+
+from explanation.registry import (
+    DEFAULT_THRESHOLD, FORMS, MANIFEST, MANIFEST_FORMAT, REGISTRY, file_sha256, form_dir, load_manifest,
+)
+
+THRESHOLD = DEFAULT_THRESHOLD
+
+
+def _atomic_write(path, write, suffix=""):
+    """Write via write(tmp_path) to a temp file next to path, then rename."""
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=suffix, dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        write(tmp)
+        os.chmod(tmp, 0o644)  # mkstemp creates the file owner-only
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def atomic_dump(obj, path):
+    _atomic_write(path, lambda tmp: joblib.dump(obj, tmp))
+
+
+def atomic_json(obj, path):
+    def write(tmp):
+        with open(tmp, "w") as f:
+            json.dump(obj, f, indent=2)
+
+    _atomic_write(path, write)
+
+
+def atomic_native(model, path):
+    # save_model picks the format from the extension, so the temp file keeps it
+    _atomic_write(path, model.save_model, suffix=os.path.splitext(path)[1])
+
+
+def _libraries():
+    import sklearn
+    import xgboost
+
+    return {"xgboost": xgboost.__version__, "sklearn": sklearn.__version__}
+
+
+def write_form(directory, form, pre, models, skipped=None, input_features=None, encoded_features=None,
+               pre_source=None):
+    """
+    Write the preprocessor, `models` ({scheme: XGBClassifier}) in native
+    format and the manifest into `directory`, then delete the directory's
+    pickled scheme models (they were fitted against an older preprocessor).
+    Returns the manifest dict. With `pre_source` (the file `pre` was loaded
+    from) that file is kept or copied as is instead of pickling `pre` again.
+    """
+    layout = FORMS[form]
+    os.makedirs(directory, exist_ok=True)
+
+    if input_features is None:
+        input_features = list(pre.feature_names_in_)
+    if encoded_features is None:
+        encoded_features = list(pre.get_feature_names_out())
+
+    pre_path = os.path.join(directory, layout["preprocessor"])
+    if pre_source is None:
+        atomic_dump(pre, pre_path)
+    elif os.path.abspath(pre_source) != os.path.abspath(pre_path):
+        _atomic_write(pre_path, lambda tmp: shutil.copyfile(pre_source, tmp))
+    pre_sha = file_sha256(pre_path)
+
+    schemes = {}
+    for scheme, model in models.items():
+        name = layout["native"].format(scheme=scheme)
+        path = os.path.join(directory, name)
+        atomic_native(model, path)
+        schemes[scheme] = {
+            "file": name,
+            "sha256": file_sha256(path),
+            "threshold": THRESHOLD,
+            "n_features": int(model.n_features_in_),
+            "n_trees": int(model.get_booster().num_boosted_rounds()),
+        }
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "form": form,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "libraries": _libraries(),
+        "preprocessor": {
+            "file": layout["preprocessor"],
+            "sha256": pre_sha,
+            "version": pre_sha[:16],
+            "n_inputs": len(input_features),
+            "n_features": len(encoded_features),
+        },
+        "features": {"input": [str(c) for c in input_features], "encoded": [str(c) for c in encoded_features]},
+        "schemes": schemes,
+        "skipped": dict(skipped or {}),
+    }
+    atomic_json(manifest, os.path.join(directory, MANIFEST))
+    for path in _legacy_models(form, directory).values():
+        os.remove(path)
+    return manifest
+
+
+def _legacy_models(form, directory):
+    """{scheme: path} of the pickled scheme models in `directory`."""
+    prefix, suffix = FORMS[form]["model"].split("{scheme}")
+    paths = sorted(glob.glob(os.path.join(directory, f"{prefix}*{suffix}")))
+    return {os.path.basename(p)[len(prefix):-len(suffix)]: p for p in paths}
+
+
+def export_form(form, directory=None, source=None):
+    """
+    Convert the pickled joblib models in `source` (default: the form
+    directory) into native files plus a manifest in `directory` (default:
+    `source`). Converting in place removes the pickles. Returns the
+    manifest dict; raises FileNotFoundError if there are no pickled models.
+    """
+    source = source or form_dir(form)
+    directory = directory or source
+    legacy = _legacy_models(form, source)
+    if not legacy:
+        raise FileNotFoundError(f"No pickled {form} models in {source} (already exported?)")
+
+    layout = FORMS[form]
+    pre_source = os.path.join(source, layout["preprocessor"])
+    pre = REGISTRY.get(pre_source)
+    models = {s: REGISTRY.get(path) for s, path in legacy.items()}
+
+    input_features = encoded_features = None
+    if "input_features" in layout:
+        input_features = list(REGISTRY.get(os.path.join(source, layout["input_features"])))
+    if "feature_names" in layout:
+        encoded_features = list(REGISTRY.get(os.path.join(source, layout["feature_names"])))
+
+    skipped = {}
+    metrics_path = os.path.join(source, "metrics.json")
+    if os.path.exists(metrics_path):
+        with open(metrics_path) as f:
+            skipped = {s: m["skipped"] for s, m in json.load(f).items() if "skipped" in m}
+
+    return write_form(directory, form, pre, models, skipped,
+                      input_features=input_features, encoded_features=encoded_features, pre_source=pre_source)
+
+
+def verify_form(form, directory=None):
+    """[problem, ...] of the form's manifest: missing files or checksum mismatches."""
+    directory = directory or form_dir(form)
+    if directory == form_dir(form):
+        manifest = load_manifest(form)
+    else:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    if manifest is None:
+        return [f"{form}: no {MANIFEST}"]
+
+    problems = []
+    for entry in [manifest["preprocessor"]] + list(manifest["schemes"].values()):
+        path = os.path.join(directory, entry["file"])
+        if not os.path.exists(path):
+            problems.append(f"{form}: missing {entry['file']}")
+        elif file_sha256(path) != entry["sha256"]:
+            problems.append(f"{form}: checksum mismatch for {entry['file']}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export / verify native model artifacts and manifests.")
+    parser.add_argument("command", choices=["export", "verify"])
+    parser.add_argument("--form", choices=["all"] + list(FORMS), default="all")
+    args = parser.parse_args(argv)
+
+    forms = list(FORMS) if args.form == "all" else [args.form]
+    if args.command == "export":
+        for form in forms:
+            manifest = export_form(form)
+            print(f"{form}: {len(manifest['schemes'])} models -> {os.path.join(form_dir(form), MANIFEST)}")
+        return
+
+    problems = [p for form in forms for p in verify_form(form)]
+    for p in problems:
+        print(p)
+    if problems:
+        sys.exit(1)
+    print("All artifacts match their manifests.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Optional latency histograms and counters for the explanation pipeline.
+
+Instrumented code calls
+
+    with stage("transform", form="ifr"):
+        ...
+    inc("dss_prediction_errors_total", form="cfr", scheme="jjm")
+
+Histograms (dss_stage_seconds) are kept per stage and label set, counters
+per name and label set. Metrics are off by default; set DSS_METRICS=1 or
+call enable(). While disabled stage() hands back one shared no-op context
+manager and inc() returns after a flag check, so the instrumented paths pay
+next to nothing.
+
+Export with prometheus_text() (text exposition format, served by the
+inference server at GET /metrics) or snapshot() (a plain dict for
+structured logs).
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_METRIC = "dss_stage_seconds"
+
+_ENABLED = os.environ.get("DSS_METRICS", "").lower() in ("1", "true", "yes")
+_NOOP = nullcontext()
+_LOCK = threading.Lock()
+_HISTOGRAMS = {}
+_COUNTERS = {}
+
+
+def enable():
+    global _ENABLED
+    _ENABLED = True
+
+
+def disable():
+    global _ENABLED
+    _ENABLED = False
+
+
+def enabled():
+    return _ENABLED
+
+
+def reset():
+    with _LOCK:
+        _HISTOGRAMS.clear()
+        _COUNTERS.clear()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (seconds)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bucket bound below which a fraction q of observations fall."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+def observe(name, seconds, **labels):
+    if not _ENABLED:
+        return
+    key = _key(name, labels)
+    with _LOCK:
+        hist = _HISTOGRAMS.get(key)
+        if hist is None:
+            hist = _HISTOGRAMS[key] = Histogram()
+        hist.observe(seconds)
+
+
+def inc(name, value=1, **labels):
+    if not _ENABLED:
+        return
+    key = _key(name, labels)
+    with _LOCK:
+        _COUNTERS[key] = _COUNTERS.get(key, 0) + value
+
+
+class _Timer:
+    __slots__ = ("labels", "start")
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(STAGE_METRIC, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def stage(name, **labels):
+    """Context manager timing one pipeline stage into dss_stage_seconds."""
+    if not _ENABLED:
+        return _NOOP
+    return _Timer(dict(labels, stage=name))
+
+
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def prometheus_text():
+    """All metrics in the Prometheus text exposition format."""
+    with _LOCK:
+        hists = sorted(_HISTOGRAMS.items())
+        counters = sorted(_COUNTERS.items())
+
+    lines = []
+    seen = set()
+    for (name, labels), hist in hists:
+        if name not in seen:
+            lines.append(f"# TYPE {name} histogram")
+            seen.add(name)
+        cumulative = 0
+        for bound, n in zip(hist.buckets + (float("inf"),), hist.counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', le)])} {cumulative}")
+        lines.append(f"{name}_sum{_fmt_labels(labels)} {hist.sum}")
+        lines.append(f"{name}_count{_fmt_labels(labels)} {hist.count}")
+    for (name, labels), value in counters:
+        if name not in seen:
+            lines.append(f"# TYPE {name} counter")
+            seen.add(name)
+        lines.append(f"{name}{_fmt_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    """{"histograms": [...], "counters": [...]} for structured logging."""
+    with _LOCK:
+        return {
+            "histograms": [
+                {
+                    "name": name, "labels": dict(labels), "count": h.count, "sum": h.sum,
+                    "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99),
+                }
+                for (name, labels), h in sorted(_HISTOGRAMS.items())
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": v}
+                for (name, labels), v in sorted(_COUNTERS.items())
+            ],
+        }
@@ -0,0 +1,316 @@
+"""
+Process-wide cache for the model artifacts under models/.
+
+Every artifact is loaded once per process and handed out to all callers.
+A cached entry is keyed by its absolute path and remembers the file's
+(mtime, size) stamp; if the file on disk changes the next lookup reloads it,
+otherwise the cached object is returned after a single os.stat().
+
+A form directory with a manifest.json (see explanation.manifest) is loaded
+from it: the scheme models are native XGBoost files (.ubj), the feature
+order comes from the manifest and every file is checked against its sha256
+when it is loaded. Directories without a manifest fall back to the pickled
+joblib layout in FORMS.
+"""
+
+import os
+import glob
+import hashlib
+import json
+import threading
+
+import joblib
+
+from explanation.metrics import inc, stage
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+
+# file layout of each form's model directory
+FORMS = {
+    "ifr": {
+        "dir": "ifr_models",
+        "preprocessor": "ifr_preprocessor.joblib",
+        "feature_names": "ifr_feature_names.joblib",
+        "model": "ifr_model_{scheme}.joblib",
+        "native": "ifr_model_{scheme}.ubj",
+    },
+    "cr": {
+        "dir": "cr_models",
+        "preprocessor": "cr_preprocessor.joblib",
+        "feature_names": "cr_feature_names.joblib",
+        "model": "cr_model_{scheme}.joblib",
+        "native": "cr_model_{scheme}.ubj",
+    },
+    "cfr": {
+        "dir": "cfr_models",
+        "preprocessor": "cfr_preprocessor.joblib",
+        "input_features": "cfr_features.joblib",
+        "model": "xgb_{scheme}.joblib",
+        "native": "xgb_{scheme}.ubj",
+    },
+}
+
+MANIFEST = "manifest.json"
+MANIFEST_FORMAT = 1
+
+# eligibility cut-off on the model probability when the manifest sets none
+DEFAULT_THRESHOLD = 0.5
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _load_file(path):
+    ext = os.path.splitext(path)[1]
+    if ext == ".ubj":
+        from xgboost import XGBClassifier
+
+        model = XGBClassifier()
+        model.load_model(path)
+        return model
+    if ext == ".json":
+        with open(path) as f:
+            return json.load(f)
+    return joblib.load(path)
+
+
+class ArtifactRegistry:
+    """
+    Thread-safe, load-once cache of joblib artifacts.
+
+    `version` is bumped every time an artifact is (re)loaded, so callers that
+    cache anything derived from the artifacts can tell when it went stale.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.version = 0
+        self.loads = 0
+
+    def _path_lock(self, path):
+        with self._lock:
+            lock = self._locks.get(path)
+            if lock is None:
+                lock = self._locks[path] = threading.Lock()
+            return lock
+
+    def get(self, path, sha256=None):
+        """
+        Return the loaded artifact at `path`, loading it only if it is not
+        cached yet or the file changed since it was loaded. .ubj files load
+        as XGBClassifier, .json as plain data, anything else with joblib.
+
+        Raises FileNotFoundError if the file does not exist and ValueError if
+        `sha256` is given and the file's content does not match it.
+        """
+        path = os.path.abspath(path)
+        try:
+            stamp = _stamp(path)
+        except FileNotFoundError:
+            self._entries.pop(path, None)
+            raise
+
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        # only one thread unpickles a given file; the others wait and reuse it
+        with self._path_lock(path):
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                return entry[1]
+            if sha256 is not None and file_sha256(path) != sha256:
+                inc("dss_model_load_errors_total", artifact=os.path.basename(path))
+                raise ValueError(f"Checksum mismatch for {path}: the file differs from its manifest entry.")
+            with stage("load", artifact=os.path.basename(path)):
+                obj = _load_file(path)
+            inc("dss_model_loads_total", artifact=os.path.basename(path))
+            self._entries[path] = (stamp, obj)
+            with self._lock:
+                self.loads += 1
+                self.version += 1
+            return obj
+
+    def seed(self, path, stamp, obj):
+        """
+        Cache `obj` as the artifact at `path` with the given (mtime, size)
+        stamp, as if it had been loaded from the file (used by the
+        warm-start snapshot). get() still reloads it if the file differs.
+        """
+        self._entries[os.path.abspath(path)] = (stamp, obj)
+        with self._lock:
+            self.version += 1
+
+    def cached(self, path):
+        """Return the cached artifact at `path` without touching the disk, or None."""
+        entry = self._entries.get(os.path.abspath(path))
+        return None if entry is None else entry[1]
+
+    def preload(self, forms=None):
+        """
+        Load every artifact of the given forms (default: all) so that the
+        first request does not pay for unpickling. Returns the loaded paths.
+        """
+        loaded = []
+        for form in forms or FORMS:
+            for path, sha256 in artifact_entries(form, self):
+                self.get(path, sha256)
+                loaded.append(path)
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.version += 1
+
+
+REGISTRY = ArtifactRegistry()
+
+
+def form_dir(form):
+    return os.path.join(MODELS_DIR, FORMS[form]["dir"])
+
+
+def artifact_path(form, key, scheme=None):
+    name = FORMS[form][key]
+    if scheme is not None:
+        name = name.format(scheme=scheme)
+    return os.path.join(form_dir(form), name)
+
+
+def load_manifest(form, registry=None):
+    """The form's manifest.json as a dict, or None for a pickle-only directory."""
+    registry = registry or REGISTRY
+    try:
+        manifest = registry.get(os.path.join(form_dir(form), MANIFEST))
+    except FileNotFoundError:
+        return None
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"Unsupported {form} manifest format {manifest.get('format')!r}")
+    return manifest
+
+
+def artifact_entries(form, registry=None):
+    """[(path, sha256 or None), ...] of every artifact the form loads from."""
+    manifest = load_manifest(form, registry)
+    if manifest is None:
+        return [(p, None) for p in sorted(glob.glob(os.path.join(form_dir(form), "*.joblib")))]
+    base = form_dir(form)
+    entries = [(os.path.join(base, MANIFEST), None)]
+    for entry in [manifest["preprocessor"]] + list(manifest["schemes"].values()):
+        entries.append((os.path.join(base, entry["file"]), entry["sha256"]))
+    return entries
+
+
+def artifact_files(form):
+    return [path for path, _ in artifact_entries(form)]
+
+
+def available_schemes(form, schemes):
+    """
+    The entries of `schemes` that have a trained model, in order: those in
+    the manifest, or all of them for a pickle-only directory (whose loads
+    then raise FileNotFoundError for missing models).
+    """
+    manifest = load_manifest(form)
+    if manifest is None:
+        return list(schemes)
+    return [s for s in schemes if s in manifest["schemes"]]
+
+
+def load_preprocessor(form):
+    manifest = load_manifest(form)
+    if manifest is None:
+        return REGISTRY.get(artifact_path(form, "preprocessor"))
+    entry = manifest["preprocessor"]
+    return REGISTRY.get(os.path.join(form_dir(form), entry["file"]), entry["sha256"])
+
+
+def load_feature_names(form):
+    manifest = load_manifest(form)
+    if manifest is None:
+        return REGISTRY.get(artifact_path(form, "feature_names"))
+    return manifest["features"]["encoded"]
+
+
+def load_input_features(form):
+    manifest = load_manifest(form)
+    if manifest is None:
+        return REGISTRY.get(artifact_path(form, "input_features"))
+    return manifest["features"]["input"]
+
+
+def load_model(form, scheme):
+    manifest = load_manifest(form)
+    if manifest is None:
+        return REGISTRY.get(artifact_path(form, "model", scheme))
+    entry = manifest["schemes"].get(scheme)
+    if entry is None:
+        raise FileNotFoundError(f"The {form} manifest lists no model for scheme {scheme!r}.")
+    return REGISTRY.get(os.path.join(form_dir(form), entry["file"]), entry["sha256"])
+
+
+def scheme_threshold(form, scheme):
+    """The probability at or above which the scheme's model means eligible."""
+    manifest = load_manifest(form)
+    if manifest is None:
+        return DEFAULT_THRESHOLD
+    entry = manifest["schemes"].get(scheme, {})
+    return float(entry.get("threshold", DEFAULT_THRESHOLD))
+
+
+def preload(forms=None, snapshot=None):
+    """
+    Load every artifact of `forms` into REGISTRY. With `snapshot` (path of
+    a file written by explanation.snapshot) the still-current artifacts are
+    taken from that one file first.
+    """
+    if snapshot:
+        from explanation.snapshot import load_snapshot
+        load_snapshot(snapshot)
+    return REGISTRY.preload(forms)
+
+
+_VERSIONS = {}
+
+
+def form_stamps(form, paths=None):
+    """((file name, mtime_ns, size), ...) of the form's artifacts."""
+    if paths is None:
+        paths = artifact_files(form)
+    return tuple((os.path.basename(p),) + _stamp(p) for p in paths)
+
+
+def model_version(form):
+    """
+    Content hash (16 hex chars) of every artifact the form's models load
+    from. Files are re-hashed only when their (mtime, size) changes.
+    """
+    paths = artifact_files(form)
+    stamps = form_stamps(form, paths)
+    cached = _VERSIONS.get(form)
+    if cached is not None and cached[0] == stamps:
+        return cached[1]
+
+    h = hashlib.sha1()
+    for path in paths:
+        h.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    version = h.hexdigest()[:16]
+    _VERSIONS[form] = (stamps, version)
+    return version
@@ -0,0 +1,165 @@
+"""
+Bounded LRU / TTL cache in front of explain_ifr_row, explain_cr_row and
+explain_cfr_row.
+
+A row is keyed by a hash of its normalized content:
+
+  * column names stripped and lowercased, order ignored
+  * string values stripped and lowercased (what the rules do anyway)
+  * numbers compared as floats (5 == 5.0), None / NaN as "nan"
+
+plus the form and its model version (explanation.registry.model_version,
+a content hash of the form's artifacts). When a model file is replaced
+and reloaded every key of that form changes, and the stale entries simply
+age out of the LRU.
+
+    explain = cached_explainer("ifr", explain_ifr_row)
+    explain(row)                      # computed
+    explain(row_with_other_case)      # hit
+    RESULT_CACHE.stats()              # {"hits": 1, "misses": 1, ...}
+
+Results are deep-copied on the way in and out, so callers may mutate them.
+"""
+
+import copy
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from numbers import Number
+
+import pandas as pd
+
+from explanation.metrics import inc
+from explanation.registry import model_version
+
+
+def _normalize_value(value):
+    if value is None:
+        return "nan"
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, Number):
+        value = float(value)
+        return "nan" if math.isnan(value) else repr(value)
+    try:
+        if pd.isna(value):
+            return "nan"
+    except (TypeError, ValueError):
+        pass
+    return str(value).strip().lower()
+
+
+def _row_items(row):
+    if isinstance(row, pd.DataFrame):
+        if len(row) != 1:
+            raise ValueError("DataFrame row input must have exactly one row.")
+        row = row.iloc[0]
+    return row.items()
+
+
+def row_key(form, row) -> str:
+    """Cache key of one row: form, model version and normalized content."""
+    items = sorted((str(k).strip().lower(), _normalize_value(v)) for k, v in _row_items(row))
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{form}\0{model_version(form)}".encode())
+    for k, v in items:
+        h.update(b"\0")
+        h.update(k.encode())
+        h.update(b"\1")
+        h.update(v.encode())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with an optional time-to-live per entry.
+
+    Parameters
+    ----------
+    maxsize : entries kept; the least recently used is evicted beyond it.
+    ttl : seconds an entry stays valid (None = no expiry).
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Cached value for key, or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                inc("dss_result_cache_total", result="miss")
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            inc("dss_result_cache_total", result="hit")
+            return copy.deepcopy(entry[1])
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+RESULT_CACHE = ResultCache()
+
+
+def cached_explainer(form, explain_row, cache=None):
+    """
+    explain_row wrapped with the result cache: a hit returns the stored
+    result list, a miss computes and stores it. Empty results (failed
+    preprocessing) are not cached.
+    """
+    cache = RESULT_CACHE if cache is None else cache
+
+    def explain(row):
+        key = row_key(form, row)
+        result = cache.get(key)
+        if result is None:
+            result = explain_row(row)
+            if result:
+                cache.put(key, result)
+        return result
+
+    explain.__name__ = f"cached_{getattr(explain_row, '__name__', 'explain')}"
+    explain.__wrapped__ = explain_row
+    explain.cache = cache
+    return explain
@@ -0,0 +1,148 @@
+"""
+Shared SHAP helpers for the explanation modules.
+
+Building a shap.TreeExplainer walks every tree of the model, so one explainer
+is built per loaded model object and reused for all later calls. Explainers
+are held weakly by model: when the registry reloads a changed artifact the
+new model gets a fresh explainer and the stale one is garbage-collected.
+
+Attributions come either from the SHAP package (contributions="shap",
+exact TreeSHAP via shap.TreeExplainer) or from XGBoost itself
+(contributions="native", Booster.predict(pred_contribs=True), the same
+TreeSHAP values without building an explainer or importing shap). The
+`explain` level picks the rows that get attributions at all:
+
+    "none"            no attributions (list views: probability + eligibility)
+    "eligible_only"   only rows eligible for that scheme (probability >= its threshold)
+    "full"            every row
+"""
+
+import threading
+import weakref
+
+import numpy as np
+
+_EXPLAINERS = weakref.WeakKeyDictionary()
+_LOCK = threading.Lock()
+
+# rows per shap_values() call in the batched path; bounds the dense
+# (rows x features) SHAP matrix for the wide one-hot preprocessors
+SHAP_CHUNK_ROWS = 512
+
+EXPLAIN_LEVELS = ("none", "eligible_only", "full")
+CONTRIBUTIONS = ("shap", "native")
+
+
+def get_explainer(model):
+    """Return the cached TreeExplainer for `model`, building it on first use."""
+    explainer = _EXPLAINERS.get(model)
+    if explainer is None:
+        import shap  # only paid for when SHAP-package attributions are requested
+
+        with _LOCK:
+            explainer = _EXPLAINERS.get(model)
+            if explainer is None:
+                explainer = _EXPLAINERS[model] = shap.TreeExplainer(model)
+    return explainer
+
+
+def top_k_indices(shap_vals, k=3):
+    """
+    Column indices of the k largest |SHAP| values of every row, largest first.
+
+    Uses np.argpartition to select the k candidates in linear time and only
+    sorts those k, instead of a full argsort over all features.
+    """
+    shap_vals = np.atleast_2d(shap_vals)
+    n_features = shap_vals.shape[1]
+    k = min(k, n_features)
+    if k <= 0:
+        return np.empty((shap_vals.shape[0], 0), dtype=np.intp)
+
+    mag = np.abs(shap_vals)
+    if k < n_features:
+        idx = np.argpartition(-mag, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(n_features), mag.shape).copy()
+
+    order = np.argsort(-np.take_along_axis(mag, idx, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def top_features(shap_vals, feature_names, k=3):
+    """
+    [{"feature": ..., "contribution": ...}, ...] for each row of shap_vals.
+    """
+    shap_vals = np.atleast_2d(shap_vals)
+    idx = top_k_indices(shap_vals, k)
+    vals = np.take_along_axis(shap_vals, idx, axis=1)
+
+    return [
+        [
+            {"feature": feature_names[j], "contribution": float(v)}
+            for j, v in zip(row_idx, row_vals)
+        ]
+        for row_idx, row_vals in zip(idx, vals)
+    ]
+
+
+def native_contributions(model, X):
+    """
+    Per-feature contributions (log-odds) of every row of X from XGBoost's
+    pred_contribs output, without the trailing bias column.
+    """
+    import xgboost as xgb
+
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    contribs = booster.predict(xgb.DMatrix(X), pred_contribs=True, validate_features=False)
+    return contribs[:, :-1]
+
+
+def contribution_values(model, X, contributions="shap"):
+    if contributions == "native":
+        return native_contributions(model, X)
+    if contributions == "shap":
+        return get_explainer(model).shap_values(X)
+    raise ValueError(f"contributions must be one of {CONTRIBUTIONS}, got {contributions!r}")
+
+
+def explain_top_features(model, X, feature_names, k=3, chunk_rows=SHAP_CHUNK_ROWS, contributions="shap"):
+    """
+    Top-k SHAP attributions for every row of X (dense or sparse) in as few
+    shap_values() / pred_contribs calls as possible. Returns one list of
+    dicts per row.
+    """
+    out = []
+    for start in range(0, X.shape[0], chunk_rows):
+        vals = contribution_values(model, X[start:start + chunk_rows], contributions)
+        out.extend(top_features(vals, feature_names, k))
+    return out
+
+
+def explained_rows(explain, prob, threshold=0.5):
+    """Positions of the rows that get attributions at explanation level `explain`."""
+    if explain == "full":
+        return np.arange(len(prob))
+    if explain == "eligible_only":
+        return np.flatnonzero(np.asarray(prob) >= threshold)
+    if explain == "none":
+        return np.empty(0, dtype=np.intp)
+    raise ValueError(f"explain must be one of {EXPLAIN_LEVELS}, got {explain!r}")
+
+
+def select_top_features(model, X, prob, feature_names, k=3, explain="full", contributions="shap",
+                        threshold=0.5):
+    """
+    explain_top_features for the rows selected by `explain` only; the other
+    rows get an empty list. Nothing is computed for explain="none".
+    """
+    rows = explained_rows(explain, prob, threshold)
+    if len(rows) == X.shape[0]:
+        return explain_top_features(model, X, feature_names, k, contributions=contributions)
+
+    out = [[] for _ in range(X.shape[0])]
+    if len(rows):
+        for i, tops in zip(rows, explain_top_features(model, X[rows], feature_names, k,
+                                                      contributions=contributions)):
+            out[i] = tops
+    return out
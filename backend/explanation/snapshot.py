@@ -0,0 +1,103 @@
+"""
+Warm-start snapshot of every model artifact.
+
+The snapshot is a single joblib file holding the manifests, preprocessors,
+feature lists and scheme models of all three forms, each with the (mtime,
+size) stamp of the file it came from, plus every form's model_version. Loading
+it is one read and one unpickle instead of one per artifact; afterwards
+preload() only stats the artifact files.
+
+    python -m explanation.snapshot                 # writes models/snapshot.joblib
+    python server.py --snapshot models/snapshot.joblib
+
+Artifacts whose file changed after the snapshot was written (a retrained
+model) are not taken from it; they load from their own file as before, so
+a stale snapshot costs speed, never correctness. Rebuild it after training.
+"""
+
+import argparse
+import os
+import time
+
+import joblib
+
+from explanation.registry import (
+    FORMS, MODELS_DIR, REGISTRY, _VERSIONS, _stamp, form_stamps, model_version, preload,
+)
+
+SNAPSHOT_FORMAT = 1
+DEFAULT_SNAPSHOT = os.path.join(MODELS_DIR, "snapshot.joblib")
+
+
+def build_snapshot(forms=None):
+    """The snapshot dict of the given forms' current artifacts."""
+    artifacts = {}
+    versions = {}
+    for form in forms or FORMS:
+        for path in preload([form]):
+            rel = os.path.relpath(path, MODELS_DIR)
+            artifacts[rel] = (_stamp(path), REGISTRY.cached(path))
+        versions[form] = (form_stamps(form), model_version(form))
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "created": time.time(),
+        "model_versions": versions,
+        "artifacts": artifacts,
+    }
+
+
+def save_snapshot(path=DEFAULT_SNAPSHOT, forms=None):
+    """Write the snapshot atomically. Returns {"path", "artifacts", "bytes"}."""
+    snapshot = build_snapshot(forms)
+    tmp = f"{path}.tmp{os.getpid()}"
+    try:
+        joblib.dump(snapshot, tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return {"path": path, "artifacts": len(snapshot["artifacts"]), "bytes": os.path.getsize(path)}
+
+
+def load_snapshot(path=DEFAULT_SNAPSHOT, registry=REGISTRY):
+    """
+    Seed `registry` with the snapshot's artifacts whose files are unchanged.
+    Returns {"seeded": n, "stale": [relative paths skipped]}.
+    """
+    snapshot = joblib.load(path)
+    if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"{path} is not a model snapshot (format {SNAPSHOT_FORMAT}).")
+
+    seeded, stale = 0, []
+    for rel, (stamp, obj) in snapshot["artifacts"].items():
+        full = os.path.join(MODELS_DIR, rel)
+        try:
+            current = _stamp(full)
+        except FileNotFoundError:
+            current = None
+        if current != stamp:
+            stale.append(rel)
+            continue
+        registry.seed(full, stamp, obj)
+        seeded += 1
+
+    # skip re-hashing the artifacts for model_version() when nothing changed
+    for form, (stamps, version) in snapshot["model_versions"].items():
+        if form in FORMS and form_stamps(form) == stamps:
+            _VERSIONS[form] = (stamps, version)
+
+    return {"seeded": seeded, "stale": stale}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bundle every model artifact into one warm-start file.")
+    parser.add_argument("--out", default=DEFAULT_SNAPSHOT)
+    parser.add_argument("--forms", nargs="+", choices=list(FORMS), default=None)
+    args = parser.parse_args(argv)
+
+    info = save_snapshot(args.out, args.forms)
+    print(f"Snapshot of {info['artifacts']} artifacts ({info['bytes'] / 1e6:.1f} MB) -> {info['path']}")
+
+
+if __name__ == "__main__":
+    main()
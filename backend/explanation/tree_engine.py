@@ -0,0 +1,234 @@
+"""
+Packed NumPy evaluator for the per-scheme XGBoost models.
+
+XGBClassifier.predict_proba pays a fixed cost per call (DMatrix construction,
+sklearn input checks, thread dispatch) that dominates single-row scoring.
+PackedForest reads the fitted boosters once, flattens every tree of every
+scheme of a form into a few contiguous node arrays and scores a row, or a
+small batch, for all schemes in one vectorized walk:
+
+    forest = PackedForest.from_models({"JJM": model_jjm, ...})
+    probs = forest.predict_proba(X)      # (n_rows, n_schemes)
+
+X is the preprocessor output. As in XGBoost, entries that are not stored in a
+sparse matrix, and NaNs in a dense one, are treated as missing and follow the
+split's default direction. verify() checks the packed forest against
+predict_proba before it is trusted.
+"""
+
+import json
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+
+# engine= values of explain_*_batch
+ENGINES = ("xgboost", "packed")
+
+
+def check_engine(engine):
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
+
+
+def _base_margin(learner):
+    """Margin added to every tree sum, from the booster's base_score."""
+    base_score = float(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+    objective = learner["objective"]["name"]
+    if objective != "binary:logistic":
+        raise ValueError(f"Unsupported objective for packed scoring: {objective}")
+    # base_score is stored as a probability for binary:logistic
+    return float(np.log(base_score / (1.0 - base_score)))
+
+
+def _booster_trees(model):
+    """(trees, base_margin) of a fitted XGBClassifier, honouring best_iteration."""
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw("json"))["learner"]
+
+    gbm = learner["gradient_booster"]
+    if gbm["name"] != "gbtree":
+        raise ValueError(f"Unsupported booster for packed scoring: {gbm['name']}")
+    trees = gbm["model"]["trees"]
+
+    best_iteration = booster.attr("best_iteration")
+    if best_iteration is not None:
+        indptr = gbm["model"]["iteration_indptr"]
+        trees = trees[:indptr[int(best_iteration) + 1]]
+
+    return trees, _base_margin(learner)
+
+
+class PackedForest:
+    """All trees of several binary XGBoost models packed into flat arrays."""
+
+    def __init__(self, schemes, n_features, used_features, feature, threshold,
+                 left, right, default_left, value, roots, tree_offsets,
+                 base_margin, depth):
+        self.schemes = list(schemes)
+        self.n_features = n_features
+        self.used_features = used_features
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.tree_offsets = tree_offsets
+        self.base_margin = base_margin
+        self.depth = depth
+
+        # input column -> column of the compact matrix of used features
+        self.column_map = np.full(n_features, -1, dtype=np.int64)
+        self.column_map[used_features] = np.arange(len(used_features))
+
+    @classmethod
+    def from_models(cls, models):
+        """Pack {scheme: fitted XGBClassifier} into one forest."""
+        feature, threshold, left, right = [], [], [], []
+        default_left, value, roots = [], [], []
+        tree_offsets, base_margin = [], []
+        n_features = None
+        depth = 0
+        n_nodes = 0
+
+        for scheme, model in models.items():
+            trees, margin = _booster_trees(model)
+            tree_offsets.append(len(roots))
+            base_margin.append(margin)
+
+            for tree in trees:
+                n_feat = int(tree["tree_param"]["num_feature"])
+                if n_features is None:
+                    n_features = n_feat
+                elif n_feat != n_features:
+                    raise ValueError("All models of a forest must share one feature space.")
+
+                lc = np.asarray(tree["left_children"], dtype=np.int64)
+                rc = np.asarray(tree["right_children"], dtype=np.int64)
+                is_leaf = lc == -1
+                ids = np.arange(len(lc), dtype=np.int64) + n_nodes
+
+                # leaves point to themselves, so extra steps of the walk are no-ops
+                left.append(np.where(is_leaf, ids, lc + n_nodes))
+                right.append(np.where(is_leaf, ids, rc + n_nodes))
+                feature.append(np.where(is_leaf, 0, tree["split_indices"]))
+                cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+                threshold.append(np.where(is_leaf, np.float32(0), cond))
+                value.append(np.where(is_leaf, cond, np.float32(0)))
+                default_left.append(np.asarray(tree["default_left"], dtype=bool))
+                roots.append(n_nodes)
+
+                depth = max(depth, _tree_depth(lc, rc))
+                n_nodes += len(lc)
+
+        if not roots:
+            raise ValueError("No trees to pack.")
+
+        feature = np.concatenate(feature).astype(np.int64)
+        is_split = np.concatenate(left) != np.arange(n_nodes)
+        used = np.unique(feature[is_split])
+
+        forest = cls(
+            schemes=models.keys(),
+            n_features=n_features,
+            used_features=used,
+            feature=feature,
+            threshold=np.concatenate(threshold).astype(np.float32),
+            left=np.concatenate(left),
+            right=np.concatenate(right),
+            default_left=np.concatenate(default_left),
+            value=np.concatenate(value).astype(np.float32),
+            roots=np.asarray(roots, dtype=np.int64),
+            tree_offsets=np.asarray(tree_offsets, dtype=np.int64),
+            base_margin=np.asarray(base_margin),
+            depth=depth,
+        )
+        # split features indexed in the compact matrix of used columns
+        forest.feature = np.maximum(forest.column_map[feature], 0)
+        return forest
+
+    def _compact(self, X):
+        """(n_rows, n_used) float32 matrix of the used columns, NaN = missing."""
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}.")
+
+        if sp.issparse(X):
+            X = X.tocsr()
+            n = X.shape[0]
+            out = np.full((n, len(self.used_features)), np.nan, dtype=np.float32)
+            cols = self.column_map[X.indices]
+            rows = np.repeat(np.arange(n), np.diff(X.indptr))
+            keep = cols >= 0
+            out[rows[keep], cols[keep]] = X.data[keep]
+            return out
+
+        X = np.asarray(X, dtype=np.float32)
+        return X[:, self.used_features]
+
+    def predict_margin(self, X):
+        """Raw margins, shape (n_rows, n_schemes)."""
+        Xu = self._compact(X)
+        n = Xu.shape[0]
+
+        node = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        row = np.arange(n)[:, None]
+        for _ in range(self.depth):
+            x = Xu[row, self.feature[node]]
+            go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        leaf = self.value[node].astype(np.float64)
+        return np.add.reduceat(leaf, self.tree_offsets, axis=1) + self.base_margin
+
+    def predict_proba(self, X):
+        """Positive-class probabilities, shape (n_rows, n_schemes)."""
+        return 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+
+    def verify(self, models, X, atol=1e-5):
+        """
+        Compare against model.predict_proba(X)[:, 1] for every scheme.
+        Returns the largest absolute difference; raises AssertionError if it
+        exceeds atol.
+        """
+        packed = self.predict_proba(X)
+        worst = 0.0
+        for j, scheme in enumerate(self.schemes):
+            ref = models[scheme].predict_proba(X)[:, 1]
+            diff = float(np.max(np.abs(packed[:, j] - ref)))
+            if diff > atol:
+                raise AssertionError(f"Packed forest differs from {scheme} by {diff:.3g}")
+            worst = max(worst, diff)
+        return worst
+
+
+def _tree_depth(lc, rc):
+    depth = np.zeros(len(lc), dtype=np.int64)
+    # children always have larger ids than their parent in XGBoost dumps
+    for i in range(len(lc)):
+        if lc[i] != -1:
+            depth[lc[i]] = depth[rc[i]] = depth[i] + 1
+    return int(depth.max())
+
+
+_FORESTS = {}
+_LOCK = threading.Lock()
+
+
+def packed_forest(form, models):
+    """
+    The PackedForest of `form` for the given {scheme: model} dict, compiled
+    once and rebuilt only when the registry hands out different model objects.
+    """
+    key = tuple(models.items())
+    hit = _FORESTS.get(form)
+    if hit is not None and len(hit[0]) == len(key) and all(
+        s1 == s2 and m1 is m2 for (s1, m1), (s2, m2) in zip(hit[0], key)
+    ):
+        return hit[1]
+
+    with _LOCK:
+        forest = PackedForest.from_models(models)
+        _FORESTS[form] = (key, forest)
+    return forest
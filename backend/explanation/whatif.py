@@ -0,0 +1,212 @@
+"""
+Vectorized what-if / sensitivity analysis of scheme eligibility.
+
+"If this household's annual_income were 55,000, or its cultivation_area 0,
+which schemes flip?" Instead of one explain_*_row call per perturbation,
+the base rows and every perturbed copy of them are stacked into one frame
+and scored by explain_*_batch in a single pass (one rules pass, one
+transform, one predict per scheme), so a 100-point sweep costs about as
+much as one batch prediction of 101 rows.
+
+    result = what_if("ifr", row, {"annual_income": [40000, 55000, 90000],
+                                  "cultivation_area": [0, 2]})
+    boundaries(result, "annual_income")
+
+A grid is either {feature: [values]} (every combination is a scenario) or
+an explicit list of scenario dicts, e.g. [{"annual_income": 55000},
+{"cultivation_area": 0}].
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from explanation.metrics import stage
+
+
+def _py(value):
+    """numpy scalars as plain Python values (for JSON)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _batch(form, engine, hybrid):
+    if hybrid:
+        from explanation.hybrid import explain_hybrid_batch
+        return lambda df: explain_hybrid_batch(form, df, engine=engine)
+    if form == "ifr":
+        from explanation.explanation_ifr import explain_ifr_batch
+        return lambda df: explain_ifr_batch(df, engine=engine)
+    if form == "cr":
+        from explanation.explanation_cr import explain_cr_batch
+        return lambda df: explain_cr_batch(df, engine=engine)
+    if form == "cfr":
+        from explanation.explanation_cfr import explain_cfr_batch
+        return lambda df: explain_cfr_batch(df, engine=engine)
+    raise ValueError(f"Unknown form {form!r}")
+
+
+def scenarios(grid):
+    """The list of scenario dicts of a grid ({feature: [values]} or a list of dicts)."""
+    if isinstance(grid, dict):
+        features = list(grid)
+        return [dict(zip(features, combo)) for combo in itertools.product(*(grid[f] for f in features))]
+    scenarios = [dict(s) for s in grid]
+    if not all(scenarios):
+        raise ValueError("Every what-if scenario must change at least one feature.")
+    return scenarios
+
+
+def expand(rows: pd.DataFrame, grid):
+    """
+    The frame to score: the base rows followed by one copy of every base
+    row per scenario with the scenario's features overwritten, plus the
+    (base, scenario) position of each copy. Feature names match the rows'
+    columns case-insensitively, as the rules do.
+    """
+    cases = scenarios(grid)
+    features = list(dict.fromkeys(f for s in cases for f in s))
+    lower = {str(c).lower(): c for c in rows.columns}
+    columns = {f: lower.get(f.lower(), f) for f in features}
+
+    n, k = len(rows), len(cases)
+    base = np.tile(np.arange(n), k)
+    scenario = np.repeat(np.arange(k), n)
+
+    copies = rows.iloc[base].reset_index(drop=True)
+    for f in features:
+        values = np.array([s.get(f, np.nan) for s in cases], dtype=object)[scenario]
+        changed = np.array([f in s for s in cases])[scenario]
+        col = columns[f]
+        original = copies[col].to_numpy(dtype=object) if col in copies else np.full(len(copies), np.nan, object)
+        copies[col] = np.where(changed, values, original)
+
+    frame = pd.concat([rows.reset_index(drop=True), copies], ignore_index=True)
+    return frame, base, scenario, cases
+
+
+def what_if(form: str, rows, grid, engine: str = "xgboost", hybrid: bool = False) -> pd.DataFrame:
+    """
+    Score every scenario of `grid` applied to `rows` (a DataFrame, or one
+    row as a Series / dict) in one vectorized pass.
+
+    Returns one row per (base row, scenario) with "base" (position of the
+    base row), "scenario" (position in the grid), the scenario's feature
+    values and, per scheme, <S>_probability, <S>_eligible and <S>_flipped
+    (eligibility differs from the unperturbed base row). Scheme columns are
+    named as in explain_<form>_batch; with hybrid=True the rule-determined
+    schemes are scored by explanation.hybrid.
+    """
+    if isinstance(rows, dict):
+        rows = pd.DataFrame([rows])
+    elif isinstance(rows, pd.Series):
+        rows = rows.to_frame().T
+    if len(rows) == 0:
+        raise ValueError("what_if needs at least one base row.")
+
+    frame, base, scenario, cases = expand(rows, grid)
+    with stage("whatif", form=form):
+        scored = _batch(form, engine, hybrid)(frame)
+
+    n = len(rows)
+    features = list(dict.fromkeys(f for s in cases for f in s))
+    out = {"base": base, "scenario": scenario}
+    for f in features:
+        out[f] = np.array([s.get(f) for s in cases], dtype=object)[scenario]
+
+    for col in scored.columns:
+        if not col.endswith("_probability"):
+            continue
+        name = col[: -len("_probability")]
+        prob = scored[col].to_numpy()
+        eligible = scored[f"{name}_eligible"].to_numpy(dtype=bool)
+        out[f"{name}_probability"] = prob[n:]
+        out[f"{name}_eligible"] = eligible[n:]
+        out[f"{name}_flipped"] = eligible[n:] != eligible[:n][base]
+
+    result = pd.DataFrame(out)
+    result.attrs["features"] = features
+    return result
+
+
+def flips(result: pd.DataFrame):
+    """[[scheme, ...] that flip, ...] per result row."""
+    schemes = [c[: -len("_flipped")] for c in result.columns if c.endswith("_flipped")]
+    flipped = result[[f"{s}_flipped" for s in schemes]].to_numpy()
+    return [[s for s, f in zip(schemes, row) if f] for row in flipped]
+
+
+def boundaries(result: pd.DataFrame, feature: str):
+    """
+    Where eligibility changes along `feature`, the other scenario features
+    and the base row held fixed:
+
+        {scheme: [{"base": 0, "from": 50000, "to": 60000, "eligible": False}, ...]}
+
+    "from" / "to" are the neighbouring grid values the boundary lies
+    between (in ascending order for numeric values, grid order otherwise)
+    and "eligible" the state on the "to" side. Held-fixed features appear
+    in each entry by name.
+    """
+    if feature not in result.columns:
+        raise KeyError(f"{feature!r} is not a what-if feature of this result")
+    others = [f for f in result.attrs.get("features", []) if f != feature]
+    schemes = [c[: -len("_eligible")] for c in result.columns if c.endswith("_eligible")]
+
+    values = pd.to_numeric(result[feature], errors="coerce")
+    ordered = result.assign(_order=values) if values.notna().all() else result.assign(_order=result["scenario"])
+    ordered = ordered.sort_values(["base", "_order"], kind="stable")
+
+    found = {s: [] for s in schemes}
+    keys = ["base"] + others
+    for key, group in ordered.groupby(keys, sort=False, dropna=False):
+        key = key if isinstance(key, tuple) else (key,)
+        fixed = {k: _py(v) for k, v in zip(keys, key)}
+        grid_values = [_py(v) for v in group[feature]]
+        for s in schemes:
+            eligible = group[f"{s}_eligible"].to_numpy(dtype=bool)
+            for i in np.flatnonzero(eligible[1:] != eligible[:-1]):
+                found[s].append({**fixed, "from": grid_values[i], "to": grid_values[i + 1],
+                                 "eligible": bool(eligible[i + 1])})
+    return found
+
+
+def summarize(result: pd.DataFrame):
+    """
+    JSON-ready view of a what_if result:
+
+        {"scenarios": [{"base", "scenario", "changes": {feature: value},
+                        "eligible": [scheme, ...], "flipped": [scheme, ...]}, ...],
+         "boundaries": {feature: {scheme: [...]}}}
+
+    with boundaries only for schemes that change along the feature, and
+    only for features every scenario sets (a {feature: [values]} grid).
+    """
+    features = result.attrs.get("features", [])
+    schemes = [c[: -len("_eligible")] for c in result.columns if c.endswith("_eligible")]
+    eligible = result[[f"{s}_eligible" for s in schemes]].to_numpy()
+    changed = flips(result)
+
+    out = []
+    for i, row in enumerate(result[["base", "scenario"] + features].itertuples(index=False)):
+        out.append({
+            "base": int(row[0]),
+            "scenario": int(row[1]),
+            "changes": {f: _py(v) for f, v in zip(features, row[2:]) if v is not None},
+            "eligible": [s for s, ok in zip(schemes, eligible[i]) if ok],
+            "flipped": changed[i],
+        })
+    edges = {}
+    for f in features:
+        if result[f].isna().any():
+            continue
+        found = {s: b for s, b in boundaries(result, f).items() if b}
+        if found:
+            edges[f] = found
+    return {"scenarios": out, "boundaries": edges}
+
+
+def sweep(form: str, row, feature: str, values, engine: str = "xgboost", hybrid: bool = False):
+    """One-feature sensitivity of a row: {"result": what_if frame, "boundaries": {scheme: [...]}}."""
+    result = what_if(form, row, {feature: list(values)}, engine=engine, hybrid=hybrid)
+    return {"result": result, "boundaries": boundaries(result, feature)}
@@ -0,0 +1,211 @@
+"""
+Typed ingest for the Form A / B / C claim CSVs.
+
+Every column of a form has an explicit kind in FORM_SCHEMAS:
+
+    "numeric"   parsed straight to float64
+    "category"  pandas Categorical whose categories are normalized
+                (strip + lower), e.g. " Yes", "YES" and "yes" share one code
+    "text"      free text (names, addresses, ...) kept as Python strings
+
+Headers are canonicalized the same way the rules do (strip + lower), which
+also removes the stray tab in the CR "community_uses\\t" header. Only the
+requested columns are parsed:
+
+    df = read_form("ifr", columns=IFR_RULESET.columns)
+
+The category normalization maps are cached per distinct set of raw
+categories, so repeated reads (or chunks of one large file) reuse them.
+Missing values follow pandas' defaults ("None", "NA", "" become NaN), which
+is what the fitted preprocessors were trained on.
+
+Rules and explanations accept these frames directly: the rule engine works
+on the categorical codes, and the normalized frame handed to the
+preprocessors is identical to the one built from a plain pd.read_csv.
+"""
+
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+FORM_FILES = {
+    "ifr": "FINAL_IFR_FormA.csv",
+    "cr": "FINAL_CR_FormB.csv",
+    "cfr": "FINAL_CFR_FormC.csv",
+}
+
+FORM_SCHEMAS = {
+    "ifr": {
+        "claimant_name": "text",
+        "aadhar_number": "numeric",
+        "phone_number": "numeric",
+        "spouse_name": "text",
+        "father_mother_name": "text",
+        "address": "text",
+        "village": "category",
+        "gram_panchayat": "category",
+        "tehsil": "category",
+        "district": "category",
+        "st_otfd_status": "category",
+        "family_members_names": "text",
+        "family_members_ages": "numeric",
+        "habitation_area": "numeric",
+        "cultivation_area": "numeric",
+        "disputed_lands": "category",
+        "patta_lease_grants": "category",
+        "rehabilitation_land": "category",
+        "displacement_details": "category",
+        "forest_village_extent": "category",
+        "other_traditional_rights": "category",
+        "age_of_claimant": "numeric",
+        "gender": "category",
+        "marital_status": "category",
+        "household_members": "numeric",
+        "elderly_count_60plus": "numeric",
+        "disability_in_household": "category",
+        "primary_livelihood": "category",
+        "annual_income": "numeric",
+        "cultivable_land_ownership": "category",
+        "house_type": "category",
+        "electricity_connection": "category",
+        "water_source": "category",
+        "toilet_available": "category",
+        "school_going_children": "category",
+        "highest_education_level": "category",
+        "shg_membership": "category",
+    },
+    "cr": {
+        "community_name": "text",
+        "village": "category",
+        "gram_panchayat": "category",
+        "tehsil": "category",
+        "district": "category",
+        "fdst_or_otfd": "category",
+        "nistar_rights": "category",
+        "minor_forest_produce_rights": "category",
+        "grazing": "category",
+        "community_uses": "category",
+        "pastoral_access": "category",
+        "habitat_rights": "category",
+        "biodiversity_access": "category",
+        "other_traditional_rights": "category",
+        "ntfp_dependency_percent": "numeric",
+        "agriculture_dependency_percent": "numeric",
+        "wagelabour_dependency_percent": "numeric",
+        "distance_to_road_km": "numeric",
+        "distance_to_water_km": "numeric",
+        "distance_to_school_km": "numeric",
+        "distance_to_health_km": "numeric",
+        "total_households": "numeric",
+        "st_hh_percent": "numeric",
+        "shg_vo_presence": "category",
+        "drought_or_flood_prone": "category",
+    },
+    "cfr": {
+        "village": "category",
+        "gram_panchayat": "category",
+        "tehsil": "category",
+        "district": "category",
+        "member_list": "category",
+        "cfr_boundary_description": "text",
+        "cfr_map_attached": "category",
+        "khasra_numbers": "text",
+        "bordering_villages": "category",
+        "frc_formed": "category",
+        "gramsabha_meeting_frequency": "category",
+        "major_nftps_collected": "category",
+        "seasonal_income_forest_percent": "numeric",
+        "forest_condition": "category",
+        "fire_incidents_5yrs": "category",
+        "water_availability_in_forest": "category",
+        "water_supply_coverage": "category",
+        "electricity_supply_coverage": "category",
+        "road_access_condition": "category",
+    },
+}
+
+_DTYPES = {"numeric": "float64", "category": "category", "text": object}
+
+
+def canonical_name(name) -> str:
+    return str(name).strip().lower()
+
+
+def form_path(form) -> str:
+    return os.path.join(DATA_DIR, FORM_FILES[form])
+
+
+def form_columns(form, kind=None):
+    """Canonical column names of a form, optionally only those of one kind."""
+    return [c for c, k in FORM_SCHEMAS[form].items() if kind is None or k == kind]
+
+
+@lru_cache(maxsize=1024)
+def _category_map(raw_categories: tuple):
+    """(old code -> new code array, normalized categories) for raw categories."""
+    normalized = [str(c).strip().lower() for c in raw_categories]
+    categories = list(dict.fromkeys(normalized))
+    lookup = {c: i for i, c in enumerate(categories)}
+    return np.array([lookup[c] for c in normalized], dtype=np.int32), categories
+
+
+def normalize_categorical(s: pd.Series) -> pd.Series:
+    """Categorical copy of s whose categories are stripped and lowercased."""
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype("category")
+    codes = s.cat.codes.to_numpy()
+    remap, categories = _category_map(tuple(s.cat.categories))
+    new_codes = np.where(codes < 0, -1, remap[np.maximum(codes, 0)] if len(remap) else -1)
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, categories=categories),
+        index=s.index,
+        name=s.name,
+    )
+
+
+def _header_map(path):
+    header = pd.read_csv(path, nrows=0).columns
+    return {canonical_name(c): c for c in header}
+
+
+def read_form(form, path=None, columns=None, **read_csv_kwargs) -> pd.DataFrame:
+    """
+    Read a Form A ("ifr"), B ("cr") or C ("cfr") CSV with its schema.
+
+    Parameters
+    ----------
+    form : "ifr" | "cr" | "cfr"
+    path : CSV to read (default: the bundled backend/data file)
+    columns : canonical names to parse; names missing from the file are
+        ignored, so a consumer can pass every column it might use.
+    read_csv_kwargs : passed on to pd.read_csv (nrows, chunksize, ...)
+
+    Returns a DataFrame with canonical column names and schema dtypes, or an
+    iterator of such frames when chunksize is given.
+    """
+    path = path or form_path(form)
+    schema = FORM_SCHEMAS[form]
+    header = _header_map(path)
+
+    wanted = list(header) if columns is None else [canonical_name(c) for c in columns]
+    raw_cols = [header[c] for c in wanted if c in header]
+
+    # columns that are not in the schema are left to pandas' inference
+    dtype = {header[c]: _DTYPES[schema[c]] for c in wanted if c in header and c in schema}
+
+    reader = pd.read_csv(path, usecols=raw_cols, dtype=dtype, **read_csv_kwargs)
+    if read_csv_kwargs.get("chunksize"):
+        return (_finish(chunk, schema) for chunk in reader)
+    return _finish(reader, schema)
+
+
+def _finish(df: pd.DataFrame, schema) -> pd.DataFrame:
+    df.columns = [canonical_name(c) for c in df.columns]
+    for c in df.columns:
+        if schema.get(c) == "category":
+            df[c] = normalize_categorical(df[c])
+    return df
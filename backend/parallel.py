@@ -0,0 +1,180 @@
+"""
+Process-pool scoring with models shared copy-on-write.
+
+The parent loads every IFR / CR / CFR artifact once (registry.preload),
+freezes the garbage collector's view of them (gc.freeze, so collections in
+the workers do not write to — and thereby copy — the shared pages) and
+forks the workers. Each worker starts with the models, and the SHAP
+TreeExplainers built for them in the parent, already in memory and only
+receives row shards.
+
+Every worker runs XGBoost, OpenMP and BLAS with `threads` threads (default
+1), so N workers use N cores instead of N x cores threads fighting for
+them. Rows are split into contiguous shards, scored with explain_*_batch
+(or explain_*_rows) in the workers, and concatenated in input order.
+
+    with ParallelScorer(workers=8) as scorer:
+        scores = scorer.score("ifr", df, top_k=3)
+        rows = scorer.rows("cr", df)
+
+On platforms without fork the pool falls back to spawn; the workers then
+load the artifacts themselves.
+"""
+
+import gc
+import multiprocessing as mp
+import os
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from explanation.registry import REGISTRY, preload
+from explanation.shap_cache import get_explainer
+
+THREAD_ENV = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS"]
+
+FORMS = ["ifr", "cr", "cfr"]
+
+
+def _batch_fn(form):
+    if form == "ifr":
+        from explanation.explanation_ifr import explain_ifr_batch
+        return explain_ifr_batch
+    if form == "cr":
+        from explanation.explanation_cr import explain_cr_batch
+        return explain_cr_batch
+    if form == "cfr":
+        from explanation.explanation_cfr import explain_cfr_batch
+        return lambda df, top_k=0, engine="xgboost", **options: explain_cfr_batch(df, engine=engine)
+    raise KeyError(form)
+
+
+def _rows_fn(form):
+    if form == "ifr":
+        from explanation.explanation_ifr import explain_ifr_rows
+        return explain_ifr_rows
+    if form == "cr":
+        from explanation.explanation_cr import explain_cr_rows
+        return explain_cr_rows
+    if form == "cfr":
+        from explanation.explanation_cfr import explain_cfr_rows
+        return explain_cfr_rows
+    raise KeyError(form)
+
+
+def limit_model_threads(threads, forms=FORMS):
+    """Set n_jobs / nthread of every loaded XGBoost model of `forms`."""
+    for path in preload(forms):
+        model = REGISTRY.cached(path)
+        if hasattr(model, "get_booster"):
+            model.set_params(n_jobs=threads)
+            model.get_booster().set_param({"nthread": threads})
+
+
+def build_explainers(forms=FORMS):
+    """Build the cached TreeExplainer of every loaded model of `forms`."""
+    built = 0
+    for form in forms:
+        if form == "cfr":  # CFR results carry no attributions
+            continue
+        for path in preload([form]):
+            model = REGISTRY.cached(path)
+            if hasattr(model, "get_booster"):
+                get_explainer(model)
+                built += 1
+    return built
+
+
+def _explainers_built():
+    from explanation import shap_cache
+    return len(shap_cache._EXPLAINERS)
+
+
+def _init_worker(threads, forms):
+    for var in THREAD_ENV:
+        os.environ[var] = str(threads)
+    # keep the limits for the life of the worker
+    global _LIMITS
+    _LIMITS = threadpool_limits(limits=threads)
+    limit_model_threads(threads, forms)
+
+
+def _score_shard(form, shard, top_k, engine, options):
+    return _batch_fn(form)(shard, top_k=top_k, engine=engine, **options)
+
+
+def _rows_shard(form, shard):
+    return _rows_fn(form)(shard)
+
+
+def shards(n_rows, n_shards):
+    """Contiguous (start, stop) bounds splitting n_rows into n_shards."""
+    bounds = np.linspace(0, n_rows, n_shards + 1).astype(int)
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+class ParallelScorer:
+    """
+    Parameters
+    ----------
+    workers : worker processes (default: os.cpu_count()).
+    threads : XGBoost / OpenMP / BLAS threads per worker.
+    forms : forms whose artifacts are loaded before forking.
+    min_shard_rows : smaller inputs are split into fewer shards.
+    explainers : build the SHAP TreeExplainers in the parent so the workers
+        share them too; pass False when no top_k / "shap" attributions will
+        be asked for (skips importing shap).
+    """
+
+    def __init__(self, workers=None, threads=1, forms=FORMS, min_shard_rows=256, explainers=True):
+        self.workers = workers or os.cpu_count() or 1
+        self.threads = threads
+        self.forms = list(forms)
+        self.min_shard_rows = min_shard_rows
+
+        # load models and import the explanation modules in the parent
+        preload(self.forms)
+        for form in self.forms:
+            _batch_fn(form)
+            _rows_fn(form)
+        if explainers:
+            build_explainers(self.forms)
+
+        method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+        gc.collect()
+        if method == "fork":
+            gc.freeze()
+        self._pool = mp.get_context(method).Pool(
+            self.workers, initializer=_init_worker, initargs=(threads, self.forms),
+        )
+
+    def _split(self, df):
+        n = max(1, min(self.workers, len(df) // self.min_shard_rows or 1))
+        return [df.iloc[a:b] for a, b in shards(len(df), n)]
+
+    def score(self, form, df: pd.DataFrame, top_k=0, engine="xgboost", **options) -> pd.DataFrame:
+        """
+        explain_<form>_batch(df) computed across the workers, in df's order.
+        `options` (explain, contributions) are passed on to explain_*_batch.
+        """
+        if len(df) == 0:
+            return _batch_fn(form)(df, top_k=top_k, engine=engine, **options)
+        parts = self._pool.starmap(_score_shard, [(form, s, top_k, engine, options) for s in self._split(df)])
+        return pd.concat(parts)
+
+    def rows(self, form, df: pd.DataFrame):
+        """explain_<form>_rows(df) computed across the workers, in df's order."""
+        parts = self._pool.starmap(_rows_shard, [(form, s) for s in self._split(df)])
+        return [r for part in parts for r in part]
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+        gc.unfreeze()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,272 @@
+"""
+Column roles and preprocessor construction for the IFR / CR / CFR models.
+
+The shipped preprocessors ("legacy" mode) one-hot encode every non-label
+column, including names, Aadhaar / phone numbers and addresses. Those carry
+no predictive signal but make up most of the encoded width (3767 IFR and
+10064 CR features), which inflates transform, prediction and SHAP cost.
+
+COLUMN_ROLES declares, per form, which columns are
+
+    identifier   unique per claimant / community (names, ids, numbers)
+    text         free text (addresses, boundary descriptions)
+    numeric      model inputs, median-imputed
+    categorical  model inputs, most-frequent-imputed and one-hot encoded
+
+"lean" mode builds a preprocessor over numeric + categorical columns only
+and always returns a CSR matrix, so the sparse layout reaches the XGBoost
+models (and SHAP) untouched. The explanation modules feed each preprocessor
+exactly the columns it was fitted on (feature_names_in_), so lean artifacts
+written by the training pipeline drop identifiers from scoring without any
+other change.
+
+    python preprocessing.py --report [--json report.json]
+
+fits a lean preprocessor on the bundled data and compares feature count,
+memory per row and transform time with the current artifacts.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from rules.rules_ifr import apply_ifr_rules
+from rules.rules_cr import apply_cr_rules
+from rules.rules_cfr import apply_cfr_rules
+
+COLUMN_ROLES = {
+    "ifr": {
+        "identifier": [
+            "claimant_name", "aadhar_number", "phone_number", "spouse_name",
+            "father_mother_name", "family_members_names",
+        ],
+        "text": ["address"],
+        "numeric": [
+            "family_members_ages", "habitation_area", "cultivation_area",
+            "age_of_claimant", "household_members", "elderly_count_60plus",
+            "annual_income",
+        ],
+        "categorical": [
+            "village", "gram_panchayat", "tehsil", "district", "st_otfd_status",
+            "disputed_lands", "patta_lease_grants", "rehabilitation_land",
+            "displacement_details", "forest_village_extent",
+            "other_traditional_rights", "gender", "marital_status",
+            "disability_in_household", "primary_livelihood",
+            "cultivable_land_ownership", "house_type", "electricity_connection",
+            "water_source", "toilet_available", "school_going_children",
+            "highest_education_level", "shg_membership", "is_st", "is_otfd",
+        ],
+    },
+    "cr": {
+        "identifier": ["community_name"],
+        "text": [],
+        "numeric": [
+            "ntfp_dependency_percent", "agriculture_dependency_percent",
+            "wagelabour_dependency_percent", "distance_to_road_km",
+            "distance_to_water_km", "distance_to_school_km",
+            "distance_to_health_km", "total_households", "st_hh_percent",
+        ],
+        "categorical": [
+            "village", "gram_panchayat", "tehsil", "district", "fdst_or_otfd",
+            "nistar_rights", "minor_forest_produce_rights", "grazing",
+            "community_uses", "pastoral_access", "habitat_rights",
+            "biodiversity_access", "other_traditional_rights",
+            "shg_vo_presence", "drought_or_flood_prone",
+        ],
+    },
+    "cfr": {
+        "identifier": ["khasra_numbers"],
+        "text": ["cfr_boundary_description"],
+        "numeric": ["seasonal_income_forest_percent"],
+        "categorical": [
+            "village", "gram_panchayat", "tehsil", "district", "member_list",
+            "cfr_map_attached", "bordering_villages", "frc_formed",
+            "gramsabha_meeting_frequency", "major_ntfps_collected",
+            "forest_condition", "fire_incidents_5yrs",
+            "water_availability_in_forest", "water_supply_coverage",
+            "electricity_supply_coverage", "road_access_condition",
+        ],
+    },
+}
+
+# input columns of the shipped CFR preprocessor (cfr_features.joblib); the
+# CSV header spells "major_nftps_collected", which is left unmatched here
+LEGACY_INPUTS = {
+    "cfr": [
+        "village", "gram_panchayat", "tehsil", "district", "member_list",
+        "cfr_boundary_description", "cfr_map_attached", "khasra_numbers",
+        "bordering_villages", "frc_formed", "gramsabha_meeting_frequency",
+        "major_ntfps_collected", "seasonal_income_forest_percent",
+        "forest_condition", "fire_incidents_5yrs", "water_availability_in_forest",
+        "water_supply_coverage", "electricity_supply_coverage", "road_access_condition",
+    ],
+}
+
+APPLY_RULES = {
+    "ifr": apply_ifr_rules,
+    "cr": apply_cr_rules,
+    "cfr": apply_cfr_rules,
+}
+
+
+def model_columns(form):
+    """Columns a lean preprocessor reads: numeric, then categorical."""
+    roles = COLUMN_ROLES[form]
+    return roles["numeric"] + roles["categorical"]
+
+
+def feature_frame(form, df: pd.DataFrame, mode="lean") -> pd.DataFrame:
+    """
+    Rule-normalized model input for `form`. In lean mode only the numeric and
+    categorical columns; in legacy mode the columns the shipped preprocessors
+    were fitted on (every non-label column, or LEGACY_INPUTS).
+    """
+    return input_frame(form, APPLY_RULES[form](df), mode)
+
+
+def input_frame(form, norm: pd.DataFrame, mode="lean") -> pd.DataFrame:
+    """feature_frame for an already rule-normalized frame."""
+    if mode == "lean":
+        return norm.reindex(columns=model_columns(form))
+    if form in LEGACY_INPUTS:
+        return norm.reindex(columns=LEGACY_INPUTS[form])
+    return norm[[c for c in norm.columns if not c.startswith("label_")]]
+
+
+# sklearn is imported where a preprocessor is built: scoring only needs
+# transform(), and the fitted artifact imports what it uses when unpickled
+
+def _numeric_pipeline(form, mode):
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if form == "cfr" and mode == "legacy":
+        return Pipeline(steps=[("imputer", SimpleImputer(strategy="median")), ("scale", StandardScaler())])
+    return SimpleImputer(strategy="median")
+
+
+def _categorical_pipeline():
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    return Pipeline(steps=[
+        ("imp", SimpleImputer(strategy="most_frequent")),
+        ("oh", OneHotEncoder(handle_unknown="ignore")),
+    ])
+
+
+def build_preprocessor(form, mode="lean") -> "ColumnTransformer":
+    """
+    Unfitted ColumnTransformer for `form`.
+
+    lean   : COLUMN_ROLES numeric + categorical columns, CSR output always.
+    legacy : numeric-dtype columns imputed, every other column one-hot
+             encoded, matching the layout of the shipped artifacts.
+    """
+    from sklearn.compose import ColumnTransformer, make_column_selector
+
+    if mode == "lean":
+        return ColumnTransformer(
+            transformers=[
+                ("num", _numeric_pipeline(form, mode), COLUMN_ROLES[form]["numeric"]),
+                ("cat", _categorical_pipeline(), COLUMN_ROLES[form]["categorical"]),
+            ],
+            sparse_threshold=1.0,
+        )
+    if mode == "legacy":
+        return ColumnTransformer(transformers=[
+            ("num", _numeric_pipeline(form, mode), make_column_selector(dtype_include=np.number)),
+            ("cat", _categorical_pipeline(), make_column_selector(dtype_exclude=np.number)),
+        ])
+    raise ValueError(f"Unknown preprocessing mode: {mode!r}")
+
+
+def transform(pre, df: pd.DataFrame):
+    """
+    Transform a rule-normalized frame with a fitted preprocessor, feeding it
+    only the columns it was fitted on and returning CSR when sparse.
+    """
+    cols = list(getattr(pre, "feature_names_in_", df.columns))
+    X = pre.transform(df.reindex(columns=cols))
+    return X.tocsr() if sp.issparse(X) else X
+
+
+def _matrix_bytes(X):
+    if sp.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def compare(form, df: pd.DataFrame, current, repeat=5):
+    """
+    Feature count, memory per row and transform time of the `current`
+    (fitted) preprocessor versus a lean one fitted on df.
+    """
+    legacy_in = feature_frame(form, df, mode="legacy")
+    lean_in = feature_frame(form, df, mode="lean")
+    lean = build_preprocessor(form, "lean").fit(lean_in)
+
+    report = {}
+    for name, pre, frame in [("current", current, legacy_in), ("lean", lean, lean_in)]:
+        X = transform(pre, frame)
+        one = frame.iloc[[0]]
+        report[name] = {
+            "input_columns": len(getattr(pre, "feature_names_in_", frame.columns)),
+            "features": int(X.shape[1]),
+            "sparse": bool(sp.issparse(X)),
+            "bytes_per_row": _matrix_bytes(X) / X.shape[0],
+            "dense_bytes_per_row": X.shape[1] * 8,
+            "transform_batch_s": _time(lambda: transform(pre, frame), repeat),
+            "transform_row_ms": _time(lambda: transform(pre, one), repeat) * 1000,
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare lean preprocessing with the shipped artifacts.")
+    parser.add_argument("--report", action="store_true", help="print the comparison report")
+    parser.add_argument("--forms", nargs="+", default=["ifr", "cr", "cfr"])
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    if not args.report:
+        parser.print_help()
+        return
+
+    from ingest import form_path
+    from explanation.registry import load_preprocessor
+
+    full = {}
+    for form in args.forms:
+        df = pd.read_csv(form_path(form))
+        full[form] = report = compare(form, df, load_preprocessor(form))
+
+        print(f"\n{form.upper()} ({len(df)} rows)")
+        print(f"  {'':22s}{'current':>14s}{'lean':>14s}")
+        for key in ["input_columns", "features", "bytes_per_row", "dense_bytes_per_row",
+                    "transform_batch_s", "transform_row_ms"]:
+            a, b = report["current"][key], report["lean"][key]
+            print(f"  {key:22s}{a:>14.6g}{b:>14.6g}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(full, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
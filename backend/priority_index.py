@@ -0,0 +1,215 @@
+"""
+Per-scheme, per-region ranked indexes over scheme probabilities and CRI.
+
+A PriorityIndex holds, for every metric (e.g. "JJM_probability",
+"CRI_Score") and every region
+
+    ("all",)                      the whole state
+    ("district", d)
+    ("tehsil", d, t)
+
+a list of (-score, row_id) entries kept sorted with bisect. Queries never
+touch the rest of the data:
+
+    top(metric, n, district=..., tehsil=...)       O(n)
+    above(metric, threshold, ...)                  O(log N + k)
+    rank(metric, row_id, ...)                      O(log N)
+
+and re-scoring one row moves its entries with a bisect remove / insort per
+region (O(log N) search plus a list shift), so the index stays current
+without re-sorting anything.
+
+    index = PriorityIndex.from_frame(scored, metrics=["JJM_probability"])
+    index.top("JJM_probability", 50, district="Mandla")
+    index.update(row_id, JJM_probability=0.93)
+
+Region names are matched after strip + lower, like the rule engine.
+"""
+
+import bisect
+import threading
+
+import numpy as np
+import pandas as pd
+
+REGION_COLUMNS = ["district", "tehsil"]
+
+
+def _normalize(value):
+    return str(value).strip().lower()
+
+
+def _regions(district, tehsil):
+    """Region keys a row with this district / tehsil belongs to."""
+    keys = [("all",)]
+    if district is not None:
+        keys.append(("district", district))
+        if tehsil is not None:
+            keys.append(("tehsil", district, tehsil))
+    return keys
+
+
+def _region_key(district=None, tehsil=None):
+    if tehsil is not None and district is None:
+        raise ValueError("A tehsil query needs its district.")
+    return _regions(
+        _normalize(district) if district is not None else None,
+        _normalize(tehsil) if tehsil is not None else None,
+    )[-1]
+
+
+class PriorityIndex:
+    """
+    Sorted per-region score lists for a set of metrics.
+
+    Row ids must be hashable and mutually comparable (they break ties, so
+    equal scores come back in row-id order).
+    """
+
+    def __init__(self, metrics):
+        self.metrics = list(metrics)
+        self._lists = {m: {} for m in self.metrics}
+        self._scores = {m: {} for m in self.metrics}
+        self._region = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, metrics=None, district="district", tehsil="tehsil"):
+        """
+        Build the index from a frame of scores, one row per claim / village,
+        with the region columns. Row ids are df's index labels. By default
+        every numeric column except the region columns is a metric.
+        """
+        if metrics is None:
+            metrics = [c for c in df.columns if c not in (district, tehsil) and df[c].dtype.kind in "biuf"]
+        index = cls(metrics)
+
+        ids = df.index.to_numpy()
+        dist = df[district].map(_normalize).to_numpy(dtype=object) if district in df.columns else None
+        teh = df[tehsil].map(_normalize).to_numpy(dtype=object) if tehsil in df.columns else None
+        for i, row_id in enumerate(ids):
+            index._region[row_id] = (
+                dist[i] if dist is not None else None,
+                teh[i] if teh is not None else None,
+            )
+
+        # bulk build: one sort per metric, then a stable split by region
+        groups = {}
+        for i, row_id in enumerate(ids):
+            for key in _regions(*index._region[row_id]):
+                groups.setdefault(key, []).append(i)
+        for m in metrics:
+            scores = df[m].to_numpy(dtype=float)
+            valid = ~np.isnan(scores)
+            index._scores[m] = {ids[i]: scores[i] for i in np.flatnonzero(valid)}
+            for key, rows in groups.items():
+                rows = [i for i in rows if valid[i]]
+                index._lists[m][key] = sorted(zip((-scores[rows]).tolist(), ids[rows].tolist()))
+        return index
+
+    def __len__(self):
+        return len(self._region)
+
+    def _entries(self, metric, key):
+        return self._lists[metric].get(key, [])
+
+    def top(self, metric, n=50, district=None, tehsil=None):
+        """[(row_id, score), ...] of the n highest scores in the region."""
+        with self._lock:
+            entries = self._entries(metric, _region_key(district, tehsil))[:n]
+        return [(row_id, -neg) for neg, row_id in entries]
+
+    def above(self, metric, threshold, district=None, tehsil=None):
+        """[(row_id, score), ...] with score >= threshold, best first."""
+        with self._lock:
+            entries = self._entries(metric, _region_key(district, tehsil))
+            end = bisect.bisect_right(entries, (-threshold, _MAX))
+            hits = entries[:end]
+        return [(row_id, -neg) for neg, row_id in hits]
+
+    def count_above(self, metric, threshold, district=None, tehsil=None):
+        with self._lock:
+            entries = self._entries(metric, _region_key(district, tehsil))
+            return bisect.bisect_right(entries, (-threshold, _MAX))
+
+    def rank(self, metric, row_id, district=None, tehsil=None):
+        """0-based position of row_id in the region's ranking (None if absent)."""
+        with self._lock:
+            score = self._scores[metric].get(row_id)
+            if score is None:
+                return None
+            entries = self._entries(metric, _region_key(district, tehsil))
+            pos = bisect.bisect_left(entries, (-score, row_id))
+            if pos < len(entries) and entries[pos] == (-score, row_id):
+                return pos
+            return None
+
+    def _remove(self, metric, row_id):
+        score = self._scores[metric].pop(row_id, None)
+        if score is None:
+            return
+        entry = (-score, row_id)
+        for key in _regions(*self._region[row_id]):
+            entries = self._lists[metric][key]
+            pos = bisect.bisect_left(entries, entry)
+            if pos < len(entries) and entries[pos] == entry:
+                del entries[pos]
+
+    def _insert(self, metric, row_id, score):
+        if score is None or score != score:  # NaN
+            return
+        score = float(score)
+        self._scores[metric][row_id] = score
+        for key in _regions(*self._region[row_id]):
+            bisect.insort(self._lists[metric].setdefault(key, []), (-score, row_id))
+
+    def update(self, row_id, **scores):
+        """Re-score one existing row for the given metrics."""
+        with self._lock:
+            if row_id not in self._region:
+                raise KeyError(row_id)
+            for metric, score in scores.items():
+                if metric not in self._lists:
+                    raise KeyError(f"{metric!r} is not an indexed metric")
+                self._remove(metric, row_id)
+                self._insert(metric, row_id, score)
+
+    def update_many(self, df: pd.DataFrame):
+        """Re-score the rows of df (indexed by row id, columns = metrics)."""
+        metrics = [c for c in df.columns if c in self._lists]
+        for row_id, values in zip(df.index, df[metrics].itertuples(index=False, name=None)):
+            self.update(row_id, **dict(zip(metrics, values)))
+
+    def add(self, row_id, district=None, tehsil=None, **scores):
+        """Insert a new row (or move an existing one to another region)."""
+        with self._lock:
+            if row_id in self._region:
+                self.remove(row_id)
+            self._region[row_id] = (
+                _normalize(district) if district is not None else None,
+                _normalize(tehsil) if tehsil is not None else None,
+            )
+            for metric in self.metrics:
+                self._insert(metric, row_id, scores.get(metric))
+
+    def remove(self, row_id):
+        with self._lock:
+            for metric in self.metrics:
+                self._remove(metric, row_id)
+            self._region.pop(row_id, None)
+
+
+class _Max:
+    """Compares greater than any row id (upper bound for bisect on ties)."""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+    def __eq__(self, other):
+        return isinstance(other, _Max)
+
+
+_MAX = _Max()
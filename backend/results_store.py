@@ -0,0 +1,275 @@
+"""
+Materialized scoring results for Forms A / B / C in SQLite.
+
+Every claim row is scored once and its per-scheme probability, eligibility
+and top SHAP features are stored together with
+
+    content_hash    hash of the row's raw values
+    model_version   explanation.registry.model_version(form) at scoring time
+
+so refresh() only re-scores rows that are new, whose values changed, or
+whose form's model artifacts changed since they were scored. SQLite stands
+in for the Supabase tables the frontend reads (lib/supabaseServer.ts);
+the schema is indexed for the DSS queries: by village / district and by
+scheme ordered by probability. Region names are stored stripped and
+lower-cased so those lookups compare plain values and use the indexes.
+
+    store = ResultsStore()                      # data/results.sqlite
+    stats = store.refresh("ifr")                # {"scored": ..., "unchanged": ...}
+    store.top("cr", "JJM", n=50, district="Mandla")
+
+Rows are keyed by `key_columns` when given, otherwise by their position in
+the source file (the CSVs are append-only). Run from the backend directory:
+
+    python results_store.py --form all [--db path] [--full]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from explanation.registry import model_version
+from ingest import DATA_DIR, form_path
+
+DEFAULT_DB = os.path.join(DATA_DIR, "results.sqlite")
+
+REGION_COLUMNS = ["village", "gram_panchayat", "tehsil", "district"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    form TEXT NOT NULL,
+    claim_key TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    village TEXT,
+    gram_panchayat TEXT,
+    tehsil TEXT,
+    district TEXT,
+    scored_at REAL NOT NULL,
+    PRIMARY KEY (form, claim_key)
+);
+CREATE TABLE IF NOT EXISTS results (
+    form TEXT NOT NULL,
+    claim_key TEXT NOT NULL,
+    scheme TEXT NOT NULL,
+    probability REAL NOT NULL,
+    eligible INTEGER NOT NULL,
+    top_features TEXT,
+    PRIMARY KEY (form, claim_key, scheme)
+);
+CREATE INDEX IF NOT EXISTS claims_village ON claims (form, village);
+CREATE INDEX IF NOT EXISTS claims_district ON claims (form, district, tehsil);
+CREATE INDEX IF NOT EXISTS results_scheme ON results (form, scheme, probability DESC);
+"""
+
+# user_version 1: region columns stored normalized (stripped, lower-cased)
+SCHEMA_VERSION = 1
+
+
+def _explain_batch(form):
+    # imported lazily: the store can be queried without loading any model
+    if form == "ifr":
+        from explanation.explanation_ifr import explain_ifr_batch
+        return lambda df: explain_ifr_batch(df, top_k=3)
+    if form == "cr":
+        from explanation.explanation_cr import explain_cr_batch
+        return lambda df: explain_cr_batch(df, top_k=3)
+    if form == "cfr":
+        from explanation.explanation_cfr import explain_cfr_batch
+        return explain_cfr_batch
+    raise KeyError(form)
+
+
+def content_hashes(df: pd.DataFrame) -> list:
+    """Hex hash of each row's values (column names and order included)."""
+    raw = df.astype(str)
+    raw.columns = [str(c).strip().lower() for c in raw.columns]
+    h = pd.util.hash_pandas_object(raw, index=False).to_numpy()
+    names = pd.util.hash_pandas_object(pd.Series(raw.columns), index=False).sum()
+    return [f"{v:016x}" for v in (h ^ names)]
+
+
+def claim_keys(df: pd.DataFrame, key_columns=None) -> list:
+    if not key_columns:
+        return [str(i) for i in df.index]
+    return df[list(key_columns)].astype(str).agg("|".join, axis=1).tolist()
+
+
+class ResultsStore:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as con:
+            con.executescript(SCHEMA)
+            if con.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                con.execute(
+                    "UPDATE claims SET " + ", ".join(f"{c} = lower(trim({c}))" for c in REGION_COLUMNS)
+                )
+                con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def close(self):
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            con.close()
+            self._local.con = None
+
+    def stored(self, form):
+        """{claim_key: (content_hash, model_version)} of the form's rows."""
+        rows = self._connect().execute(
+            "SELECT claim_key, content_hash, model_version FROM claims WHERE form = ?", (form,)
+        )
+        return {k: (h, v) for k, h, v in rows}
+
+    def refresh(self, form, df=None, key_columns=None, full=False, prune=True, chunk_rows=2000):
+        """
+        Score the rows of df (default: the form's bundled CSV) that are new,
+        changed or scored with other model artifacts, and store the results.
+        full=True re-scores everything; prune=True drops stored rows that are
+        no longer in df. Returns counts of scored / unchanged / pruned rows.
+        """
+        started = time.perf_counter()
+        if df is None:
+            df = pd.read_csv(form_path(form))
+        version = model_version(form)
+        keys = claim_keys(df, key_columns)
+        hashes = content_hashes(df)
+        stored = self.stored(form)
+
+        todo = [
+            i for i, (k, h) in enumerate(zip(keys, hashes))
+            if full or stored.get(k) != (h, version)
+        ]
+
+        explain = _explain_batch(form) if todo else None
+        con = self._connect()
+        for start in range(0, len(todo), chunk_rows):
+            pos = todo[start:start + chunk_rows]
+            chunk = df.iloc[pos]
+            batch = explain(chunk)
+            self._write(con, form, chunk, [keys[i] for i in pos], [hashes[i] for i in pos], version, batch)
+
+        pruned = 0
+        if prune:
+            gone = set(stored) - set(keys)
+            if gone:
+                with con:
+                    params = [(form, k) for k in gone]
+                    con.executemany("DELETE FROM results WHERE form = ? AND claim_key = ?", params)
+                    con.executemany("DELETE FROM claims WHERE form = ? AND claim_key = ?", params)
+                pruned = len(gone)
+
+        return {
+            "scored": len(todo),
+            "unchanged": len(df) - len(todo),
+            "pruned": pruned,
+            "model_version": version,
+            "seconds": time.perf_counter() - started,
+        }
+
+    def _write(self, con, form, chunk, keys, hashes, version, batch):
+        schemes = [c[: -len("_probability")] for c in batch.columns if c.endswith("_probability")]
+        names = {str(c).strip().lower(): c for c in chunk.columns}
+        region = {
+            c: chunk[names[c]].astype(str).str.strip().str.lower().tolist() if c in names else [None] * len(chunk)
+            for c in REGION_COLUMNS
+        }
+        now = time.time()
+
+        claim_rows = [
+            (form, k, h, version, region["village"][i], region["gram_panchayat"][i],
+             region["tehsil"][i], region["district"][i], now)
+            for i, (k, h) in enumerate(zip(keys, hashes))
+        ]
+        result_rows = []
+        for s in schemes:
+            probs = batch[f"{s}_probability"].to_numpy()
+            eligible = batch[f"{s}_eligible"].to_numpy()
+            tops = batch[f"{s}_top_features"].to_numpy() if f"{s}_top_features" in batch else None
+            for i, k in enumerate(keys):
+                result_rows.append((
+                    form, k, s, float(probs[i]), int(eligible[i]),
+                    json.dumps(tops[i]) if tops is not None else None,
+                ))
+
+        with con:
+            con.executemany("DELETE FROM results WHERE form = ? AND claim_key = ?", [(form, k) for k in keys])
+            con.executemany("INSERT OR REPLACE INTO claims VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", claim_rows)
+            con.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)", result_rows)
+
+    def results(self, form, claim_key):
+        """Stored scheme results of one claim, in the explain_*_row format."""
+        rows = self._connect().execute(
+            "SELECT scheme, probability, eligible, top_features FROM results "
+            "WHERE form = ? AND claim_key = ? ORDER BY scheme",
+            (form, str(claim_key)),
+        )
+        out = []
+        for scheme, prob, eligible, tops in rows:
+            item = {"scheme": scheme, "probability": prob, "eligible": "YES" if eligible else "NO"}
+            if tops is not None:
+                item["top_features"] = json.loads(tops)
+            out.append(item)
+        return out
+
+    def _top_query(self, form, scheme, n, district=None, village=None, eligible_only=False):
+        """SQL and parameters of top()."""
+        where = ["r.form = ?", "r.scheme = ?"]
+        params = [form, scheme]
+        if district is None and village is None:
+            sql = ["SELECT r.claim_key, r.probability FROM results r"]
+        else:
+            # CROSS JOIN keeps claims as the outer loop, so the region index
+            # selects the rows instead of a walk over every scheme result
+            sql = ["SELECT r.claim_key, r.probability FROM claims c",
+                   "CROSS JOIN results r ON r.form = c.form AND r.claim_key = c.claim_key"]
+            where.append("c.form = ?")
+            params.append(form)
+            if district is not None:
+                where.append("c.district = ?")
+                params.append(district.strip().lower())
+            if village is not None:
+                where.append("c.village = ?")
+                params.append(village.strip().lower())
+        if eligible_only:
+            where.append("r.eligible = 1")
+        sql.append("WHERE " + " AND ".join(where))
+        sql.append("ORDER BY r.probability DESC LIMIT ?")
+        params.append(int(n))
+        return " ".join(sql), params
+
+    def top(self, form, scheme, n=50, district=None, village=None, eligible_only=False):
+        """[(claim_key, probability), ...] best first, optionally in one region."""
+        sql, params = self._top_query(form, scheme, n, district, village, eligible_only)
+        return list(self._connect().execute(sql, params))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score Forms A/B/C into the results store.")
+    parser.add_argument("--form", choices=["all", "ifr", "cr", "cfr"], default="all")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--full", action="store_true", help="re-score every row")
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.db)
+    for form in ["ifr", "cr", "cfr"] if args.form == "all" else [args.form]:
+        stats = store.refresh(form, full=args.full)
+        print(f"{form}: scored {stats['scored']}, unchanged {stats['unchanged']}, "
+              f"pruned {stats['pruned']} in {stats['seconds']:.1f}s (models {stats['model_version']})")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Declarative scheme-rule engine.
+
+A rule table maps each scheme to a predicate over named (lowercase) columns:
+
+    ("house_type", "==", "kutcha")                 string equality
+    ("primary_livelihood", "in", ["ntfp", ...])    string membership
+    ("annual_income", "<", 60000)                  numeric comparison (<, <=, >, >=)
+    ("major_ntfps_collected", "!=", "")            string inequality
+    ("highest_education_level", "rank>=", "graduation")
+                                                   position in an ordered list of levels
+    {"all": [p, ...]} / {"any": [p, ...]}          AND / OR of predicates
+    [p, ...]                                       shorthand for {"all": [...]}
+
+compile_rules() turns the table into a RuleSet once. Evaluating it works on
+a ColumnView of the frame: only the referenced columns are touched, each is
+normalized (strip + lower) or cast to float at most once, and string work is
+done on the column's unique values and broadcast back with integer codes.
+Every predicate is then a NumPy boolean mask.
+
+String semantics match the original hand-written rules: object columns are
+compared after .astype(str).str.strip().str.lower() (so NaN reads as "nan"),
+columns of any other dtype never equal a string.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _normalize_uniques(values):
+    return pd.Index(values, dtype=object).astype(str).str.strip().str.lower().to_numpy(dtype=object)
+
+
+def factorize_normalized(s: pd.Series):
+    """
+    (codes, values) such that values[codes] equals
+    s.astype(str).str.strip().str.lower(), normalizing each distinct value once.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy()
+        values = _normalize_uniques(s.cat.categories)
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(values), codes)
+            values = np.append(values, "nan")
+        return codes, values
+
+    codes, uniques = pd.factorize(s)
+    values = _normalize_uniques(uniques)
+
+    na = codes < 0
+    if na.any():
+        # NaN, None, pd.NA each stringify differently; keep what astype(str) gives
+        na_codes, na_values = pd.factorize(s[na].astype(str).str.strip().str.lower())
+        codes = codes.copy()
+        codes[na] = na_codes + len(values)
+        values = np.concatenate([values, na_values.to_numpy(dtype=object)])
+
+    return codes, values
+
+
+def _is_string_like(s):
+    return s.dtype == object or isinstance(s.dtype, pd.CategoricalDtype)
+
+
+class ColumnView:
+    """
+    Memoized, normalized access to the columns of one DataFrame.
+
+    Column names are matched case- and whitespace-insensitively; a missing
+    column falls back to `defaults` (or raises KeyError).
+    """
+
+    def __init__(self, df: pd.DataFrame, defaults=None):
+        self.df = df
+        self.defaults = defaults or {}
+        self.n = len(df)
+        self.names = {str(c).strip().lower(): c for c in df.columns}
+        self._strings = {}
+        self._numbers = {}
+
+    def series(self, name):
+        col = self.names.get(name)
+        if col is not None:
+            return self.df[col]
+        if name in self.defaults:
+            return pd.Series([self.defaults[name]] * self.n, index=self.df.index)
+        raise KeyError(name)
+
+    def strings(self, name, force=False):
+        """
+        (codes, values) of the normalized string column, or None if the column
+        is not string-typed (unless force, which stringifies any dtype).
+        """
+        key = (name, force)
+        if key not in self._strings:
+            s = self.series(name)
+            if _is_string_like(s) or force:
+                self._strings[key] = factorize_normalized(s)
+            else:
+                self._strings[key] = None
+        return self._strings[key]
+
+    def numbers(self, name):
+        """The column cast to float64 (after normalization for string columns)."""
+        if name not in self._numbers:
+            s = self.series(name)
+            if _is_string_like(s):
+                codes, values = self.strings(name)
+                self._numbers[name] = values.astype(float)[codes]
+            else:
+                self._numbers[name] = s.to_numpy(dtype=float)
+        return self._numbers[name]
+
+
+_NUMERIC_OPS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+def _compile_predicate(pred, ordinals):
+    if isinstance(pred, list):
+        pred = {"all": pred}
+
+    if isinstance(pred, dict):
+        (kind, parts), = pred.items()
+        fns = [_compile_predicate(p, ordinals) for p in parts]
+        if kind == "all":
+            return lambda view: np.logical_and.reduce([f(view) for f in fns])
+        if kind == "any":
+            return lambda view: np.logical_or.reduce([f(view) for f in fns])
+        raise ValueError(f"Unknown rule group: {kind!r}")
+
+    column, op, value = pred
+
+    if op in _NUMERIC_OPS:
+        cmp = _NUMERIC_OPS[op]
+        value = float(value)
+        return lambda view: cmp(view.numbers(column), value)
+
+    if op in ("==", "!=", "in"):
+        allowed = [value] if op != "in" else list(value)
+
+        def isin(view):
+            normalized = view.strings(column)
+            if normalized is None:
+                return np.zeros(view.n, dtype=bool)
+            codes, values = normalized
+            return np.isin(values, allowed)[codes]
+
+        if op == "!=":
+            return lambda view: ~isin(view)
+        return isin
+
+    if op in ("rank<=", "rank>="):
+        levels = ordinals[column]
+        # unknown levels rank as the first level
+        rank_of = {lvl: i for i, lvl in enumerate(levels)}
+        bound = rank_of[value]
+        cmp = np.less_equal if op == "rank<=" else np.greater_equal
+
+        def rank(view):
+            codes, values = view.strings(column, force=True)
+            ranks = np.array([rank_of.get(v, 0) for v in values], dtype=np.int64)
+            return cmp(ranks, bound)[codes]
+
+        return rank
+
+    raise ValueError(f"Unknown rule operator: {op!r}")
+
+
+def _leaf_predicates(pred, out):
+    if isinstance(pred, list):
+        for p in pred:
+            _leaf_predicates(p, out)
+    elif isinstance(pred, dict):
+        for parts in pred.values():
+            _leaf_predicates(parts, out)
+    else:
+        out.append(pred)
+    return out
+
+
+def describe(pred) -> str:
+    """'house_type == kutcha', 'annual_income < 60000', ... for a leaf predicate."""
+    column, op, value = pred
+    if op == "in":
+        value = ", ".join(str(v) for v in value)
+        return f"{column} in [{value}]"
+    if op == "!=" and value == "":
+        return f"{column} is given"
+    return f"{column} {op} {value}"
+
+
+def _referenced_columns(pred, out):
+    if isinstance(pred, list):
+        for p in pred:
+            _referenced_columns(p, out)
+    elif isinstance(pred, dict):
+        for parts in pred.values():
+            _referenced_columns(parts, out)
+    else:
+        out.add(pred[0])
+    return out
+
+
+class RuleSet:
+    """A compiled scheme -> predicate table."""
+
+    def __init__(self, table, defaults=None, ordinals=None):
+        self.table = table
+        self.defaults = dict(defaults or {})
+        self.ordinals = dict(ordinals or {})
+        self.schemes = list(table)
+        self._compiled = {s: _compile_predicate(p, self.ordinals) for s, p in table.items()}
+        self._leaves = {
+            s: [(leaf, _compile_predicate(leaf, self.ordinals)) for leaf in _leaf_predicates(p, [])]
+            for s, p in table.items()
+        }
+        self.columns = sorted(set().union(*(_referenced_columns(p, set()) for p in table.values())))
+
+    def view(self, df: pd.DataFrame) -> ColumnView:
+        return ColumnView(df, self.defaults)
+
+    def evaluate(self, df_or_view):
+        """{scheme: boolean mask} for every scheme of the table."""
+        view = df_or_view if isinstance(df_or_view, ColumnView) else self.view(df_or_view)
+        return {scheme: fn(view) for scheme, fn in self._compiled.items()}
+
+    def conditions(self, df_or_view, scheme):
+        """
+        [(description, mask), ...] for each elementary condition of the
+        scheme's rule, in table order: which rows meet it.
+        """
+        view = df_or_view if isinstance(df_or_view, ColumnView) else self.view(df_or_view)
+        return [(describe(leaf), fn(view)) for leaf, fn in self._leaves[scheme]]
+
+    def labels(self, df_or_view, prefix="label_"):
+        """Scheme masks as an int DataFrame with columns prefix + scheme."""
+        view = df_or_view if isinstance(df_or_view, ColumnView) else self.view(df_or_view)
+        masks = self.evaluate(view)
+        return pd.DataFrame(
+            {f"{prefix}{s}": m.astype(int) for s, m in masks.items()},
+            index=view.df.index,
+        )
+
+
+def compile_rules(table, defaults=None, ordinals=None) -> RuleSet:
+    return RuleSet(table, defaults=defaults, ordinals=ordinals)
+
+
+def normalize_frame(view: ColumnView, defaults=None) -> pd.DataFrame:
+    """
+    The normalized frame the original rules produced: lowercase stripped
+    column names, `defaults` added for missing columns and every object
+    column lowercased and stripped. Categorical columns come back as the
+    same normalized strings. Reuses the view's normalized columns.
+    """
+    df = view.df
+    out = {}
+    for c in df.columns:
+        name = str(c).strip().lower()
+        s = df[c]
+        if _is_string_like(s):
+            codes, values = view.strings(name)
+            out[name] = pd.Series(values[codes], index=df.index, dtype=object)
+        else:
+            out[name] = s
+
+    for name, val in (defaults or {}).items():
+        if name not in out:
+            if isinstance(val, str):
+                codes, values = view.strings(name)
+                out[name] = pd.Series(values[codes], index=df.index, dtype=object)
+            else:
+                out[name] = pd.Series([val] * len(df), index=df.index)
+
+    return pd.DataFrame(out, index=df.index)
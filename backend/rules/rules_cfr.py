@@ -1,65 +1,62 @@
 import pandas as pd
 
-def apply_cfr_rules(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = [c.lower().strip() for c in df.columns]
+from rules.engine import compile_rules, normalize_frame
+
+# Fill missing defaults
+CFR_DEFAULTS = {
+    "seasonal_income_forest_percent": 0,
+    "forest_condition": "",
+    "fire_incidents_5yrs": "no",
+    "water_availability_in_forest": "",
+    "water_supply_coverage": "",
+    "electricity_supply_coverage": "",
+    "road_access_condition": "",
+    "major_ntfps_collected": "",
+    "gramsabha_meeting_frequency": "",
+    "frc_formed": "",
+}
+
+DEGRADED = ("forest_condition", "==", "degraded")
+FIRE = ("fire_incidents_5yrs", "==", "yes")
+NTFPS_LISTED = ("major_ntfps_collected", "!=", "")
 
-    # Fill missing defaults
-    defaults = {
-        "seasonal_income_forest_percent": 0,
-        "forest_condition": "",
-        "fire_incidents_5yrs": "no",
-        "water_availability_in_forest": "",
-        "water_supply_coverage": "",
-        "electricity_supply_coverage": "",
-        "road_access_condition": "",
-        "major_ntfps_collected": "",
-        "gramsabha_meeting_frequency": "",
-        "frc_formed": "",
-    }
-    for col, val in defaults.items():
-        if col not in df.columns:
-            df[col] = val
+# ---------- LABEL DEFINITIONS ----------
+# Synthetic rule-based labels (for ML training)
+CFR_RULES = {
+    "jjm": {"any": [
+        ("water_supply_coverage", "in", ["none", "partial"]),
+        ("water_availability_in_forest", "==", "low"),
+    ]},
 
-    # Convert all string columns to lowercase
-    for col in df.columns:
-        if df[col].dtype == object:
-            df[col] = df[col].astype(str).str.lower().str.strip()
+    "pmjanman": {"any": [DEGRADED, NTFPS_LISTED]},
 
-    # ---------- LABEL DEFINITIONS ----------
-    # Synthetic rule-based labels (for ML training)
+    "dajgua": {"any": [FIRE, ("gramsabha_meeting_frequency", "==", "rare")]},
 
-    df["label_jjm"] = (
-        df["water_supply_coverage"].isin(["none", "partial"])
-        | df["water_availability_in_forest"].isin(["low"])
-    ).astype(int)
+    "mgnrega_community": {"any": [
+        ("road_access_condition", "==", "poor"),
+        ("electricity_supply_coverage", "==", "none"),
+    ]},
 
-    df["label_pmjanman"] = (
-        df["forest_condition"].isin(["degraded"])
-        | df["major_ntfps_collected"] != ""
-    ).astype(int)
+    "nrlm_community": ("frc_formed", "==", "yes"),
 
-    df["label_dajgua"] = (
-        df["fire_incidents_5yrs"].isin(["yes"])
-        | df["gramsabha_meeting_frequency"].isin(["rare"])
-    ).astype(int)
+    "tribalprod_community": NTFPS_LISTED,
 
-    df["label_mgnrega_community"] = (
-        df["road_access_condition"].isin(["poor"])
-        | df["electricity_supply_coverage"].isin(["none"])
-    ).astype(int)
+    "ngogrant": [DEGRADED, FIRE],
+}
 
-    df["label_nrlm_community"] = (
-        df["frc_formed"].isin(["yes"])
-    ).astype(int)
+CFR_RULESET = compile_rules(CFR_RULES, defaults=CFR_DEFAULTS)
 
-    df["label_tribalprod_community"] = (
-        df["major_ntfps_collected"] != ""
-    ).astype(int)
 
-    df["label_ngogrant"] = (
-        df["forest_condition"].isin(["degraded"])
-        & df["fire_incidents_5yrs"].isin(["yes"])
-    ).astype(int)
+def cfr_labels(df: pd.DataFrame) -> pd.DataFrame:
+    """label_<scheme> columns only; reads and normalizes just the rule columns."""
+    return CFR_RULESET.labels(df)
 
-    return df
+
+def apply_cfr_rules(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalized CFR frame (lowercase column names and string values, defaults
+    for missing columns) plus one label_<scheme> column per CFR scheme.
+    """
+    view = CFR_RULESET.view(df)
+    out = normalize_frame(view, CFR_DEFAULTS)
+    return pd.concat([out, CFR_RULESET.labels(view)], axis=1)
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from rules.engine import compile_rules, normalize_frame
+
 """
 Columns for CR (lowercase after normalization):
 community_name
@@ -29,63 +31,59 @@ shg_vo_presence
 drought_or_flood_prone
 """
 
-def apply_cr_rules(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    # normalize column names
-    df.columns = [c.strip().lower() for c in df.columns]
-
-    # defaults for key columns
-    defaults = {
-        "ntfp_dependency_percent": 0.0,
-        "wagelabour_dependency_percent": 0.0,
-        "st_hh_percent": 0.0,
-        "distance_to_water_km": 0.0,
-        "distance_to_road_km": 0.0,
-        "shg_vo_presence": "no",
-        "drought_or_flood_prone": "no",
-    }
-    for col, val in defaults.items():
-        if col not in df.columns:
-            df[col] = val
-
-    # lowercase all string values
-    for c in df.columns:
-        if df[c].dtype == "object":
-            df[c] = df[c].astype(str).str.strip().str.lower()
-
-    # ------------------------------
-    # 7 CR scheme label definitions
-    # ------------------------------
+# defaults for key columns
+CR_DEFAULTS = {
+    "ntfp_dependency_percent": 0.0,
+    "wagelabour_dependency_percent": 0.0,
+    "st_hh_percent": 0.0,
+    "distance_to_water_km": 0.0,
+    "distance_to_road_km": 0.0,
+    "shg_vo_presence": "no",
+    "drought_or_flood_prone": "no",
+}
 
+DROUGHT_OR_FLOOD = ("drought_or_flood_prone", "in", ["drought", "flood", "both", "yes"])
+SHG_VO = ("shg_vo_presence", "==", "yes")
+
+# ------------------------------
+# 7 CR scheme label definitions
+# ------------------------------
+CR_RULES = {
     # 1) Jal Jeevan Mission (JJM) – poor water access or drought/flood prone
-    df["label_JJM"] = (
-        (df["distance_to_water_km"].astype(float) > 1.0) |
-        (df["drought_or_flood_prone"].isin(["drought", "flood", "both", "yes"]))
-    ).astype(int)
+    "JJM": {"any": [("distance_to_water_km", ">", 1.0), DROUGHT_OR_FLOOD]},
 
     # 2) PM-JANMAN – very high ST concentration (e.g. > 70%)
-    df["label_PMJANMAN"] = (df["st_hh_percent"].astype(float) > 70.0).astype(int)
+    "PMJANMAN": ("st_hh_percent", ">", 70.0),
 
     # 3) DAJGUA – tribal village development: > 40% ST households
-    df["label_DAJGUA"] = (df["st_hh_percent"].astype(float) > 40.0).astype(int)
+    "DAJGUA": ("st_hh_percent", ">", 40.0),
 
     # 4) MGNREGA – community assets in high wage-labour dependent villages
-    df["label_MGNREGA_COMM"] = (
-        df["wagelabour_dependency_percent"].astype(float) > 30.0
-    ).astype(int)
+    "MGNREGA_COMM": ("wagelabour_dependency_percent", ">", 30.0),
 
     # 5) NRLM – Village Organisations (SHG/VO presence)
-    df["label_NRLM_VO"] = (df["shg_vo_presence"] == "yes").astype(int)
+    "NRLM_VO": SHG_VO,
 
     # 6) Institutional Support for Tribal Products – community level
-    df["label_TRIBALPROD_COMM"] = (
-        df["ntfp_dependency_percent"].astype(float) > 30.0
-    ).astype(int)
+    "TRIBALPROD_COMM": ("ntfp_dependency_percent", ">", 30.0),
 
     # 7) Grant-in-Aid – VO + drought/flood prone
-    df["label_GRANTINAID_VO"] = (
-        (df["shg_vo_presence"] == "yes") &
-        (df["drought_or_flood_prone"].isin(["drought", "flood", "both", "yes"]))
-    ).astype(int)
+    "GRANTINAID_VO": [SHG_VO, DROUGHT_OR_FLOOD],
+}
+
+CR_RULESET = compile_rules(CR_RULES, defaults=CR_DEFAULTS)
 
-    return df
+
+def cr_labels(df: pd.DataFrame) -> pd.DataFrame:
+    """label_<SCHEME> columns only; reads and normalizes just the rule columns."""
+    return CR_RULESET.labels(df)
+
+
+def apply_cr_rules(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalized CR frame (lowercase column names and string values, defaults
+    for missing columns) plus one label_<SCHEME> column per CR scheme.
+    """
+    view = CR_RULESET.view(df)
+    out = normalize_frame(view, CR_DEFAULTS)
+    return pd.concat([out, CR_RULESET.labels(view)], axis=1)
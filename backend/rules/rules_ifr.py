@@ -1,137 +1,129 @@
 import pandas as pd
 
-def apply_ifr_rules(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-
-    # make all column names lowercase
-    df.columns = [c.strip().lower() for c in df.columns]
-
-    # expected columns in lowercase (your dataset, lowercase version)
-    # claimant_name, aadhar_number, phone_number, spouse_name, father_mother_name,
-    # address, village, gram_panchayat, tehsil, district, is_st, is_otfd,
-    # family_members_names, family_members_ages, habitation_area, cultivation_area,
-    # disputed_lands, pattas_or_leases, rehabilitation_land, displacement_details,
-    # forest_village_extent, other_traditional_rights, age_of_claimant, gender,
-    # marital_status, household_members, elderly_count_60plus, disability_in_household,
-    # primary_livelihood, annual_income, cultivable_land_ownership, house_type,
-    # electricity_connection, water_source, toilet_available, school_going_children,
-    # highest_education_level, shg_membership
-
-    # fill missing important columns with defaults
-    defaults = {
-        "is_st": "no",
-        "is_otfd": "no",
-        "cultivation_area": 0,
-        "annual_income": 0,
-        "age_of_claimant": 0,
-        "house_type": "",
-        "primary_livelihood": "",
-        "shg_membership": "no",
-        "school_going_children": "no",
-        "highest_education_level": "illiterate",
-        "elderly_count_60plus": 0,
-        "disability_in_household": "no",
-        "household_members": 1,
-        "cultivable_land_ownership": "no",
-    }
-    for col, val in defaults.items():
-        if col not in df.columns:
-            df[col] = val
-
-    # lowercase all string values
-    for c in df.columns:
-        if df[c].dtype == "object":
-            df[c] = df[c].astype(str).str.strip().str.lower()
-
-    st_flag = df["is_st"].isin(["yes", "true", "1"])
-    shg_flag = df["shg_membership"].isin(["yes", "true", "1"])
-
-    # education ordering
-    edu_levels = [
-        "illiterate",
-        "primary",
-        "middle",
-        "high school",
-        "higher secondary",
-        "diploma",
-        "graduation",
-        "post graduation",
-        "phd",
-    ]
-
-    def edu_index(x: str) -> int:
-        x = str(x).strip().lower()
-        return edu_levels.index(x) if x in edu_levels else 0
-
-    df["edu_index"] = df["highest_education_level"].apply(edu_index)
-
-    # ---------- LABELS (12 IFR schemes) ----------
-
+from rules.engine import compile_rules, normalize_frame
+
+# expected columns in lowercase (your dataset, lowercase version)
+# claimant_name, aadhar_number, phone_number, spouse_name, father_mother_name,
+# address, village, gram_panchayat, tehsil, district, is_st, is_otfd,
+# family_members_names, family_members_ages, habitation_area, cultivation_area,
+# disputed_lands, pattas_or_leases, rehabilitation_land, displacement_details,
+# forest_village_extent, other_traditional_rights, age_of_claimant, gender,
+# marital_status, household_members, elderly_count_60plus, disability_in_household,
+# primary_livelihood, annual_income, cultivable_land_ownership, house_type,
+# electricity_connection, water_source, toilet_available, school_going_children,
+# highest_education_level, shg_membership
+
+# fill missing important columns with defaults
+IFR_DEFAULTS = {
+    "is_st": "no",
+    "is_otfd": "no",
+    "cultivation_area": 0,
+    "annual_income": 0,
+    "age_of_claimant": 0,
+    "house_type": "",
+    "primary_livelihood": "",
+    "shg_membership": "no",
+    "school_going_children": "no",
+    "highest_education_level": "illiterate",
+    "elderly_count_60plus": 0,
+    "disability_in_household": "no",
+    "household_members": 1,
+    "cultivable_land_ownership": "no",
+}
+
+# education ordering (unknown levels count as "illiterate")
+EDU_LEVELS = [
+    "illiterate",
+    "primary",
+    "middle",
+    "high school",
+    "higher secondary",
+    "diploma",
+    "graduation",
+    "post graduation",
+    "phd",
+]
+
+ST = ("is_st", "in", ["yes", "true", "1"])
+SHG = ("shg_membership", "in", ["yes", "true", "1"])
+
+# ---------- LABELS (12 IFR schemes) ----------
+IFR_RULES = {
     # 1. PMAY–G: kutcha house
-    df["label_PMAYG"] = (df["house_type"] == "kutcha").astype(int)
+    "PMAYG": ("house_type", "==", "kutcha"),
 
     # 2. PM–KISAN: cultivable land + cultivation area > 0 + agri livelihood
-    df["label_PMKISAN"] = (
-        (df["cultivable_land_ownership"] == "yes") &
-        (df["cultivation_area"].astype(float) > 0) &
-        (df["primary_livelihood"].isin(["agriculture", "farmer"]))
-    ).astype(int)
+    "PMKISAN": [
+        ("cultivable_land_ownership", "==", "yes"),
+        ("cultivation_area", ">", 0),
+        ("primary_livelihood", "in", ["agriculture", "farmer"]),
+    ],
 
     # 3. MGNREGA – individual: wage labour or low income
-    df["label_MGNREGA_INDIV"] = (
-        (df["primary_livelihood"] == "wage labour") |
-        (df["annual_income"].astype(float) < 60000)
-    ).astype(int)
+    "MGNREGA_INDIV": {"any": [
+        ("primary_livelihood", "==", "wage labour"),
+        ("annual_income", "<", 60000),
+    ]},
 
     # 4. NRLM – individual: SHG membership
-    df["label_NRLM_INDIV"] = shg_flag.astype(int)
+    "NRLM_INDIV": SHG,
 
     # 5. DDU–GKY: youth 18–35
-    df["label_DDUGKY"] = (
-        (df["age_of_claimant"].astype(float) >= 18) &
-        (df["age_of_claimant"].astype(float) <= 35)
-    ).astype(int)
+    "DDUGKY": [
+        ("age_of_claimant", ">=", 18),
+        ("age_of_claimant", "<=", 35),
+    ],
 
     # 6. EMRS: ST + school-going children
-    df["label_EMRS"] = (st_flag & (df["school_going_children"] == "yes")).astype(int)
+    "EMRS": [ST, ("school_going_children", "==", "yes")],
 
     # 7. Pre-Matric ST: ST + children + edu <= high school
-    df["label_PREMATRIC_ST"] = (
-        st_flag &
-        (df["school_going_children"] == "yes") &
-        (df["edu_index"] <= edu_index("high school"))
-    ).astype(int)
+    "PREMATRIC_ST": [
+        ST,
+        ("school_going_children", "==", "yes"),
+        ("highest_education_level", "rank<=", "high school"),
+    ],
 
     # 8. Post-Matric ST: ST + edu >= higher secondary
-    df["label_POSTMATRIC_ST"] = (
-        st_flag &
-        (df["edu_index"] >= edu_index("higher secondary"))
-    ).astype(int)
+    "POSTMATRIC_ST": [ST, ("highest_education_level", "rank>=", "higher secondary")],
 
     # 9. National Fellowship ST: ST + grad or above
-    df["label_NATFELLOWSHIP_ST"] = (
-        st_flag &
-        (df["edu_index"] >= edu_index("graduation"))
-    ).astype(int)
+    "NATFELLOWSHIP_ST": [ST, ("highest_education_level", "rank>=", "graduation")],
 
     # 10. NSAP: age >= 60, elderly or disability
-    df["label_NSAP"] = (
-        (df["age_of_claimant"].astype(float) >= 60) |
-        (df["elderly_count_60plus"].astype(float) > 0) |
-        (df["disability_in_household"] == "yes")
-    ).astype(int)
+    "NSAP": {"any": [
+        ("age_of_claimant", ">=", 60),
+        ("elderly_count_60plus", ">", 0),
+        ("disability_in_household", "==", "yes"),
+    ]},
 
     # 11. PMGKAY: low income → food support
-    df["label_PMGKAY"] = (
-        df["annual_income"].astype(float) < 80000
-    ).astype(int)
+    "PMGKAY": ("annual_income", "<", 80000),
 
     # 12. Institutional support for tribal products – individual
-    df["label_TRIBALPROD_INDIV"] = (
-        st_flag &
-        df["primary_livelihood"].isin(["ntfp", "forest produce", "artisan", "handicraft"])
-    ).astype(int)
+    "TRIBALPROD_INDIV": [
+        ST,
+        ("primary_livelihood", "in", ["ntfp", "forest produce", "artisan", "handicraft"]),
+    ],
+}
+
+IFR_RULESET = compile_rules(
+    IFR_RULES,
+    defaults=IFR_DEFAULTS,
+    ordinals={"highest_education_level": EDU_LEVELS},
+)
 
-    df.drop(columns=["edu_index"], inplace=True, errors="ignore")
 
-    return df
+def ifr_labels(df: pd.DataFrame) -> pd.DataFrame:
+    """label_<SCHEME> columns only; reads and normalizes just the rule columns."""
+    return IFR_RULESET.labels(df)
+
+
+def apply_ifr_rules(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalized IFR frame (lowercase column names and string values, defaults
+    for missing columns) plus one label_<SCHEME> column per IFR scheme.
+    """
+    view = IFR_RULESET.view(df)
+    out = normalize_frame(view, IFR_DEFAULTS)
+    return pd.concat([out, IFR_RULESET.labels(view)], axis=1)
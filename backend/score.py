@@ -0,0 +1,236 @@
+"""
+Streaming batch scorer for Form A / B / C exports of any size.
+
+The input CSV is read in fixed-size chunks (ingest.read_form with
+chunksize), each chunk goes through the rules, the preprocessor and every
+scheme model in one vectorized pass (explain_*_batch), and the results are
+appended to the output before the next chunk is read, so memory stays
+bounded by the chunk size whatever the file size.
+
+Run from the backend directory:
+
+    python score.py --form ifr in.csv out.csv
+    python score.py --form cr in.csv out.parquet --chunk-rows 20000 --top-k 3
+    python score.py --form cfr in.csv out.jsonl --engine packed
+    python score.py --form ifr in.csv out.csv --top-k 3 --explain eligible_only --contributions native
+    python score.py --form cfr in.csv out.csv --hybrid
+
+Output format follows the extension (.csv, .parquet, .jsonl). Each output
+row holds the input row number, the region columns (--keep) and, per
+scheme, <SCHEME>_probability / <SCHEME>_eligible and with --top-k the
+<SCHEME>_top_features as JSON (for every row, or with --explain
+eligible_only only for the rows eligible for that scheme). Progress and throughput go to stderr.
+Parquet output needs pyarrow. With --workers N each chunk is sharded over
+N forked processes (parallel.ParallelScorer). With --hybrid the schemes
+marked rule-determined in metrics.json are answered by the rules
+(explanation.hybrid) and only the others run through their models.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from ingest import read_form
+from explanation.shap_cache import CONTRIBUTIONS, EXPLAIN_LEVELS
+from explanation.tree_engine import ENGINES
+
+DEFAULT_KEEP = ["district", "tehsil", "gram_panchayat", "village"]
+
+
+def _explain_batch(form):
+    if form == "ifr":
+        from explanation.explanation_ifr import explain_ifr_batch
+        return explain_ifr_batch
+    if form == "cr":
+        from explanation.explanation_cr import explain_cr_batch
+        return explain_cr_batch
+    if form == "cfr":
+        from explanation.explanation_cfr import explain_cfr_batch
+        return lambda df, top_k=0, engine="xgboost", **options: explain_cfr_batch(df, engine=engine)
+    raise KeyError(form)
+
+
+def _hybrid_batch(form):
+    from explanation.hybrid import explain_hybrid_batch
+    return lambda df, **options: explain_hybrid_batch(form, df, **options)
+
+
+class CSVWriter:
+    def __init__(self, path):
+        self.f = open(path, "w", newline="")
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.f, index=False, header=self.header)
+        self.header = False
+
+    def close(self):
+        self.f.close()
+
+
+class JSONLWriter:
+    def __init__(self, path):
+        self.f = open(path, "w")
+
+    def write(self, df):
+        df.to_json(self.f, orient="records", lines=True)
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow).")
+        self.pa = pa
+        self.pq = pq
+        self.path = path
+        self.writer = None
+
+    def write(self, df):
+        # object columns (kept region columns, JSON top features) are written
+        # as text, so a chunk where one is entirely missing still matches the
+        # schema the file was opened with
+        df = df.copy()
+        for c in df.columns:
+            if df[c].dtype == object:
+                df[c] = [None if v is None or v != v else str(v) for v in df[c]]
+        if self.writer is None:
+            schema = self.pa.Schema.from_pandas(df, preserve_index=False)
+            for i, name in enumerate(schema.names):
+                if df[name].dtype == object:
+                    schema = schema.set(i, self.pa.field(name, self.pa.string()))
+            self.writer = self.pq.ParquetWriter(self.path, schema)
+        table = self.pa.Table.from_pandas(df, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {".csv": CSVWriter, ".jsonl": JSONLWriter, ".parquet": ParquetWriter}
+
+
+def open_writer(path, target=None):
+    """Writer for the format of `path`, writing to `target` (default: path)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in WRITERS:
+        raise ValueError(f"Unsupported output format {ext!r}; use one of {sorted(WRITERS)}")
+    return WRITERS[ext](target or path)
+
+
+def score_chunk(form, chunk: pd.DataFrame, top_k=0, engine="xgboost", keep=DEFAULT_KEEP, explain=None,
+                level="full", contributions="shap"):
+    """
+    Output rows for one input chunk (row numbers = chunk.index). `level` and
+    `contributions` are the explain / contributions options of explain_*_batch.
+    """
+    explain = explain or _explain_batch(form)
+    batch = explain(chunk, top_k=top_k, engine=engine, explain=level, contributions=contributions)
+
+    for c in batch.columns:
+        if c.endswith("_top_features"):
+            batch[c] = [json.dumps(v) for v in batch[c]]
+
+    kept = chunk[[c for c in keep if c in chunk.columns]].astype(object)
+    out = pd.concat([kept, batch], axis=1)
+    out.insert(0, "row", chunk.index.to_numpy())
+    return out
+
+
+def score_file(form, in_path, out_path, chunk_rows=10000, top_k=0, engine="xgboost",
+               keep=DEFAULT_KEEP, progress=True, workers=1, level="full", contributions="shap",
+               hybrid=False):
+    """
+    Score in_path chunk by chunk into out_path. The output is written under a
+    temporary name and renamed when complete. Returns {"rows", "seconds",
+    "rows_per_s"}.
+    """
+    if hybrid and workers > 1:
+        raise ValueError("Hybrid scoring runs in-process; use it without --workers.")
+    scorer = None
+    if hybrid:
+        explain = _hybrid_batch(form)
+    elif workers > 1:
+        from parallel import ParallelScorer
+        scorer = ParallelScorer(workers=workers, forms=[form], explainers=bool(top_k) and contributions == "shap")
+        explain = lambda df, top_k=0, engine="xgboost", **options: scorer.score(
+            form, df, top_k=top_k, engine=engine, **options)
+    else:
+        explain = _explain_batch(form)
+    tmp = out_path + ".part"
+    writer = open_writer(out_path, tmp)
+
+    started = time.perf_counter()
+    rows = 0
+    try:
+        for chunk in read_form(form, path=in_path, chunksize=chunk_rows):
+            writer.write(score_chunk(form, chunk, top_k=top_k, engine=engine, keep=keep, explain=explain,
+                                     level=level, contributions=contributions))
+            rows += len(chunk)
+            if progress:
+                elapsed = time.perf_counter() - started
+                print(f"\r{form}: {rows:,} rows  {rows / elapsed:,.0f} rows/s  {elapsed:.1f}s",
+                      end="", file=sys.stderr, flush=True)
+        writer.close()
+        os.replace(tmp, out_path)
+    except BaseException:
+        writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    finally:
+        if scorer is not None:
+            scorer.close()
+
+    elapsed = time.perf_counter() - started
+    if progress:
+        print(file=sys.stderr)
+    return {"rows": rows, "seconds": elapsed, "rows_per_s": rows / elapsed if elapsed else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a Form A/B/C CSV in streaming chunks.")
+    parser.add_argument("input", help="input CSV")
+    parser.add_argument("output", help="output file (.csv, .parquet or .jsonl)")
+    parser.add_argument("--form", choices=["ifr", "cr", "cfr"], required=True)
+    parser.add_argument("--chunk-rows", type=int, default=10000)
+    parser.add_argument("--top-k", type=int, default=0,
+                        help="SHAP top features per scheme (IFR / CR only; 0 = off)")
+    parser.add_argument("--engine", choices=ENGINES, default="xgboost")
+    parser.add_argument("--explain", choices=EXPLAIN_LEVELS, default="full",
+                        help="rows that get --top-k attributions (per scheme)")
+    parser.add_argument("--contributions", choices=CONTRIBUTIONS, default="shap",
+                        help="attributions from the shap package or XGBoost pred_contribs")
+    parser.add_argument("--keep", nargs="*", default=DEFAULT_KEEP,
+                        help="input columns copied to the output")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes sharing the models (fork)")
+    parser.add_argument("--hybrid", action="store_true",
+                        help="answer rule-determined schemes from the rules (see explanation.hybrid)")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        stats = score_file(
+            args.form, args.input, args.output, chunk_rows=args.chunk_rows, top_k=args.top_k,
+            engine=args.engine, keep=args.keep, progress=not args.quiet, workers=args.workers,
+            level=args.explain, contributions=args.contributions, hybrid=args.hybrid,
+        )
+    except (RuntimeError, ValueError) as e:
+        parser.error(str(e))
+    print(f"Scored {stats['rows']:,} rows in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_s']:,.0f} rows/s) -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+Asyncio HTTP service behind the DSS frontend.
+
+Implements the endpoints the Next.js routes in dss-frontend/app/api/ call:
+
+    POST /predict_ifr    body: one Form A row as a JSON object
+    POST /predict_cr     body: one Form B row as a JSON object
+    POST /predict_cfr    body: one Form C row as a JSON object
+    POST /whatif_ifr     body: {"row": {...} or "rows": [...], "grid": {feature: [values]}}
+    POST /whatif_cr, /whatif_cfr  (same body)
+    GET  /health
+    GET  /metrics      Prometheus text (enable with --metrics or DSS_METRICS=1)
+
+and answers with the list of per-scheme result dicts produced by
+explain_ifr_row / explain_cr_row / explain_cfr_row. A JSON array of row
+objects is also accepted and answered with one result list per row. The
+/whatif_* endpoints score every perturbation of the grid in one pass and
+answer with explanation.whatif.summarize (scenarios, flipped schemes and
+eligibility boundaries per feature).
+
+All model artifacts are loaded at startup. Scoring is CPU-bound, so it runs
+on a bounded thread pool and the event loop only parses and writes HTTP.
+At most `max_pending` requests are admitted at once; beyond that the server
+answers 503 immediately instead of letting the queue (and tail latency) grow.
+With --batch-wait-ms > 0, rows are instead coalesced by per-form
+MicroBatchers (explanation.batcher) and scored in vectorized passes.
+With --cache-size > 0, repeated rows are answered from an LRU result
+cache (explanation.result_cache) without touching the models.
+With --snapshot, the artifacts are loaded from one warm-start file
+(explanation.snapshot) instead of one file each.
+
+Run from the backend directory:
+
+    python server.py --port 8000 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pandas as pd
+
+from explanation import metrics
+from explanation.registry import preload
+from explanation.batcher import make_batcher
+from explanation.result_cache import ResultCache, cached_explainer, row_key
+from explanation.explanation_ifr import explain_ifr_row
+from explanation.explanation_cr import explain_cr_row
+from explanation.explanation_cfr import explain_cfr_row
+from explanation.whatif import summarize, what_if
+
+ROUTES = {
+    "/predict_ifr": explain_ifr_row,
+    "/predict_cr": explain_cr_row,
+    "/predict_cfr": explain_cfr_row,
+}
+
+ROUTE_FORMS = {
+    "/predict_ifr": "ifr",
+    "/predict_cr": "cr",
+    "/predict_cfr": "cfr",
+}
+
+WHATIF_ROUTES = {
+    "/whatif_ifr": "ifr",
+    "/whatif_cr": "cr",
+    "/whatif_cfr": "cfr",
+}
+
+MAX_WHATIF_SCENARIOS = 10000
+
+MAX_BODY_BYTES = 1 << 20
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _explain(explain_row, body):
+    """Run one explanation call on the worker pool."""
+    if isinstance(body, dict):
+        return explain_row(pd.DataFrame([body]))
+    if isinstance(body, list) and all(isinstance(r, dict) for r in body):
+        return [explain_row(pd.DataFrame([r])) for r in body]
+    raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object or an array of objects.")
+
+
+def _what_if(form, body):
+    """Run one what-if request on the worker pool."""
+    if not isinstance(body, dict) or "grid" not in body or not ("row" in body or "rows" in body):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'Body must be {"row" or "rows": ..., "grid": ...}.')
+    rows = body.get("rows", [body.get("row")])
+    if not rows or not all(isinstance(r, dict) for r in rows):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Rows must be JSON objects.")
+    grid = body["grid"]
+    if isinstance(grid, dict):
+        if not all(isinstance(v, list) for v in grid.values()):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Grid values must be lists.")
+        size = len(rows)
+        for values in grid.values():
+            size *= len(values)
+    elif isinstance(grid, list) and all(isinstance(s, dict) for s in grid):
+        size = len(rows) * len(grid)
+    else:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Grid must be an object of value lists or a list of objects.")
+    if size > MAX_WHATIF_SCENARIOS:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                        f"At most {MAX_WHATIF_SCENARIOS} scenarios per request ({size} asked).")
+    return summarize(what_if(form, pd.DataFrame(rows), grid))
+
+
+class InferenceServer:
+    """
+    Parameters
+    ----------
+    host, port : address to bind; port 0 picks a free port (see .port).
+    workers : size of the scoring thread pool.
+    max_pending : requests admitted at once (running + queued for a worker).
+    timeout : seconds a request may wait and run before it gets a 504.
+    batch_wait_ms, max_batch : if batch_wait_ms > 0, score through one
+        MicroBatcher per form instead of one pool job per request.
+    cache_size, cache_ttl : if cache_size > 0, keep that many row results
+        (for cache_ttl seconds, None = no expiry) in a ResultCache.
+    snapshot : optional warm-start snapshot file to load the artifacts from.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8000, workers=4, max_pending=64, timeout=30.0,
+                 batch_wait_ms=0.0, max_batch=64, cache_size=0, cache_ttl=None, snapshot=None):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.batch_wait_ms = batch_wait_ms
+        self.max_batch = max_batch
+        self.snapshot = snapshot
+        self.cache = ResultCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self.routes = {
+            path: cached_explainer(ROUTE_FORMS[path], fn, self.cache) if self.cache is not None else fn
+            for path, fn in ROUTES.items()
+        }
+        self.pending = 0
+        self._pool = None
+        self._server = None
+        self._batchers = {}
+
+    async def start(self):
+        # load every artifact before accepting traffic
+        preload(snapshot=self.snapshot)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dss-score")
+        if self.batch_wait_ms > 0:
+            self._batchers = {
+                path: make_batcher(form, max_batch=self.max_batch, max_wait_ms=self.batch_wait_ms)
+                for path, form in ROUTE_FORMS.items()
+            }
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        for batcher in self._batchers.values():
+            batcher.close()
+
+    async def _dispatch(self, method, path, body):
+        if path == "/health" and method == "GET":
+            health = {"status": "ok", "pending": self.pending}
+            if self.cache is not None:
+                health["cache"] = self.cache.stats()
+            return HTTPStatus.OK, health
+        if path == "/metrics" and method == "GET":
+            return HTTPStatus.OK, metrics.prometheus_text()
+
+        explain_row = self.routes.get(path)
+        whatif_form = WHATIF_ROUTES.get(path)
+        if explain_row is None and whatif_form is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown endpoint {path}")
+        if method != "POST":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST")
+
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON.")
+
+        if self.pending >= self.max_pending:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Server busy, retry later.")
+
+        self.pending += 1
+        job = None
+        try:
+            with metrics.stage("request", form=ROUTE_FORMS.get(path, whatif_form)):
+                batcher = self._batchers.get(path)
+                loop = asyncio.get_running_loop()
+                if whatif_form is not None:
+                    job = loop.run_in_executor(self._pool, _what_if, whatif_form, payload)
+                elif batcher is not None:
+                    job = asyncio.ensure_future(self._batched(batcher, ROUTE_FORMS[path], payload))
+                else:
+                    job = loop.run_in_executor(self._pool, _explain, explain_row, payload)
+                # the slot is freed when the scoring itself ends, not when
+                # the client stops waiting: a timed-out job keeps its worker busy
+                job.add_done_callback(self._release)
+                result = await asyncio.wait_for(asyncio.shield(job), self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(HTTPStatus.GATEWAY_TIMEOUT, "Scoring timed out.")
+        except (ValueError, KeyError) as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid row: {e}")
+        finally:
+            if job is None:
+                self.pending -= 1
+
+        return HTTPStatus.OK, result
+
+    def _release(self, job):
+        self.pending -= 1
+        if not job.cancelled():
+            job.exception()  # retrieved here when the caller timed out
+
+    async def _batched(self, batcher, form, payload):
+        if isinstance(payload, dict):
+            return await self._batched_row(batcher, form, payload)
+        if isinstance(payload, list) and all(isinstance(r, dict) for r in payload):
+            return list(await asyncio.gather(*(self._batched_row(batcher, form, r) for r in payload)))
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object or an array of objects.")
+
+    async def _batched_row(self, batcher, form, row):
+        if self.cache is None:
+            return await asyncio.wrap_future(batcher.submit(row))
+        key = row_key(form, row)
+        result = self.cache.get(key)
+        if result is None:
+            result = await asyncio.wrap_future(batcher.submit(row))
+            if result:
+                self.cache.put(key, result)
+        return result
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request line"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = await self._dispatch(method, target.split("?", 1)[0], body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload).encode(), "application/json"
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def _serve(args):
+    server = await InferenceServer(
+        args.host, args.port, workers=args.workers,
+        max_pending=args.max_pending, timeout=args.timeout,
+        batch_wait_ms=args.batch_wait_ms, max_batch=args.max_batch,
+        cache_size=args.cache_size, cache_ttl=args.cache_ttl, snapshot=args.snapshot,
+    ).start()
+    logger.info("DSS inference server listening on http://%s:%s", server.host, server.port)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve /predict_ifr, /predict_cr and /predict_cfr.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--batch-wait-ms", type=float, default=0.0,
+                        help="coalesce rows arriving within this window (0 = off)")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--cache-size", type=int, default=0,
+                        help="rows kept in the LRU result cache (0 = off)")
+    parser.add_argument("--cache-ttl", type=float, default=None,
+                        help="seconds a cached result stays valid (default: no expiry)")
+    parser.add_argument("--snapshot", default=None,
+                        help="warm-start artifact snapshot (python -m explanation.snapshot)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="record stage latencies and counters, served at GET /metrics")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.metrics:
+        metrics.enable()
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
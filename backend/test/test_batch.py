@@ -0,0 +1,34 @@
+import pandas as pd
+from explanation.explanation_ifr import explain_ifr_row, explain_ifr_batch
+from explanation.explanation_cr import explain_cr_row, explain_cr_batch
+from explanation.explanation_cfr import explain_cfr_row, explain_cfr_batch
+
+# batch scoring must agree with the one-row path
+cases = [
+    ("data/FINAL_IFR_FormA.csv", explain_ifr_row, explain_ifr_batch),
+    ("data/FINAL_CR_FormB.csv", explain_cr_row, explain_cr_batch),
+    ("data/FINAL_CFR_FormC.csv", explain_cfr_row, explain_cfr_batch),
+]
+
+for path, explain_row, explain_batch in cases:
+    df = pd.read_csv(path, nrows=200)
+    batch = explain_batch(df)
+    assert len(batch) == len(df)
+
+    for i in [0, 57, 199]:
+        for r in explain_row(df.iloc[[i]]):
+            prob = batch.loc[i, f"{r['scheme']}_probability"]
+            eligible = batch.loc[i, f"{r['scheme']}_eligible"]
+            assert abs(prob - r["probability"]) < 1e-6, (path, i, r["scheme"])
+            assert eligible == (r["eligible"] == "YES"), (path, i, r["scheme"])
+
+    print(path, "->", batch.shape)
+
+# batched SHAP top-k must match the per-row top features
+for path, explain_row, explain_batch in cases[:2]:
+    df = pd.read_csv(path, nrows=20)
+    batch = explain_batch(df, top_k=3)
+
+    for r in explain_row(df.iloc[[5]]):
+        top = batch.loc[5, f"{r['scheme']}_top_features"]
+        assert [f["feature"] for f in top] == [f["feature"] for f in r["top_features"]]
@@ -0,0 +1,34 @@
+import pandas as pd
+from explanation.batcher import make_batcher
+from explanation.explanation_cr import explain_cr_row
+
+df = pd.read_csv("data/FINAL_CR_FormB.csv", nrows=40)
+
+# concurrent single-row submissions are coalesced and each caller gets its own rows' results
+batcher = make_batcher("cr", max_batch=16, max_wait_ms=20)
+try:
+    futures = [batcher.submit(df.iloc[[i]]) for i in range(len(df))]
+    results = [f.result(timeout=120) for f in futures]
+finally:
+    batcher.close()
+
+assert batcher.rows == len(df) and batcher.batches < len(df)
+for i in [0, 13, 39]:
+    expected = explain_cr_row(df.iloc[[i]])
+    for got, exp in zip(results[i], expected):
+        assert got["scheme"] == exp["scheme"]
+        assert abs(got["probability"] - exp["probability"]) < 1e-6
+
+# a bad row fails only its own caller, not the rows batched with it
+ifr = pd.read_csv("data/FINAL_IFR_FormA.csv", nrows=3)
+rows = [r for r in ifr.to_dict("records")]
+rows[1]["annual_income"] = "abc"
+isolated = make_batcher("ifr", max_batch=8, max_wait_ms=50)
+try:
+    futures = [isolated.submit(r) for r in rows]
+    assert futures[0].result(timeout=120) and futures[2].result(timeout=120)
+    assert futures[1].exception(timeout=120) is not None
+finally:
+    isolated.close()
+
+print("Batcher OK:", batcher.rows, "rows in", batcher.batches, "batches")
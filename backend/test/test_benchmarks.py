@@ -0,0 +1,18 @@
+import copy
+
+from benchmarks.run import compare, run
+
+report = run(forms=["cfr"], sizes=[1, 5], min_time=0.01, cold=False, log=lambda *a: None)
+stages = report["forms"]["cfr"]["5"]
+assert {"rules", "transform", "batch", "packed"} <= set(stages)
+assert any(k.startswith("predict/") for k in stages)
+assert all(s["min_s"] > 0 and s["rows"] == 5 for s in stages.values())
+
+# a baseline twice as fast flags every stage, an identical one none
+assert compare(report, report) == []
+fast = copy.deepcopy(report)
+for s in fast["forms"]["cfr"]["5"].values():
+    s["min_s"] /= 2
+assert len(compare(report, fast)) == len(stages)
+
+print("Benchmarks OK:", {k: round(v["min_s"] * 1000, 2) for k, v in stages.items() if "/" not in k})
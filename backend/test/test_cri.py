@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from datacache import load_dataset
+from cri import CRIEngine, priority, score
+
+df = load_dataset("cri")
+
+# one vectorized pass reproduces the stored scores and buckets
+scores = score(df)
+assert np.abs(scores - df["CRI_Score"].to_numpy()).max() < 1e-9
+assert (priority(scores) == df["Priority_Level"].to_numpy(dtype=object)).all()
+
+engine = CRIEngine(df)
+
+# single-village update touches only that row
+before = engine.scores.copy()
+old, new = engine.update(7, Fire_Incidents_5yrs=6, Drought_Prone="Yes")
+changed = np.flatnonzero(engine.scores != before)
+assert list(changed) == [7] or (old == new and len(changed) <= 1)
+ref = df.copy()
+ref.loc[7, "Fire_Incidents_5yrs"] = 6
+ref["Drought_Prone"] = ref["Drought_Prone"].astype(object)
+ref.loc[7, "Drought_Prone"] = "Yes"
+assert np.isclose(engine.scores[7], score(ref.iloc[[7]])[0])
+
+# batch updates and weight changes match a full re-score
+changes = pd.DataFrame({"Forest_Degradation_Index": [99.0, 1.0]}, index=[3, 11])
+engine.update_many(changes)
+ref.loc[[3, 11], "Forest_Degradation_Index"] = [99.0, 1.0]
+
+weights = dict(engine.weights, Forest_Degradation_Index=0.4, Female_HH_percent=0.05)
+moved = engine.set_weights({"Forest_Degradation_Index": 0.4, "Female_HH_percent": 0.05})
+expected = score(ref, weights=weights)
+assert np.abs(engine.scores - expected).max() < 1e-9
+assert (engine.levels == priority(expected)).all()
+assert len(moved) > 0
+
+moved = engine.set_weights(flags={"Drought_Prone": {"yes": 0.0}})
+assert np.abs(engine.scores - score(ref, weights=weights, flags={"Drought_Prone": {}})).max() < 1e-9
+
+print("CRI OK:", engine.frame()["Priority_Level"].value_counts().to_dict())
@@ -0,0 +1,51 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import datacache
+
+# projection from the cache matches the CSV and numeric columns are memory-mapped
+village = datacache.load_dataset("village", columns=["District", "Water_Scarcity_Index"])
+raw = pd.read_csv("data/FINAL_Village_Master_GIS.csv", usecols=["District", "Water_Scarcity_Index"])
+assert village["District"].astype(str).tolist() == raw["District"].tolist()
+assert np.allclose(village["Water_Scarcity_Index"], raw["Water_Scarcity_Index"])
+assert isinstance(datacache.load_columns("village", ["Water_Scarcity_Index"])["Water_Scarcity_Index"], np.memmap)
+
+# the cache rebuilds when the source CSV changes
+tmp_dir = tempfile.mkdtemp()
+path = os.path.join(tmp_dir, "datacache_selftest.csv")
+try:
+    pd.DataFrame({"a": [1.0, 2.0], "b": ["x", "y"]}).to_csv(path, index=False)
+    assert datacache.load_dataset(path)["a"].tolist() == [1.0, 2.0]
+
+    pd.DataFrame({"a": [5.0, 6.0, 7.0], "b": ["x", "y", "z"]}).to_csv(path, index=False)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert datacache.load_dataset(path)["a"].tolist() == [5.0, 6.0, 7.0]
+
+    # a CSV of the same name elsewhere gets its own cache
+    other_dir = os.path.join(tmp_dir, "other")
+    os.makedirs(other_dir)
+    other = os.path.join(other_dir, "datacache_selftest.csv")
+    pd.DataFrame({"a": [9.0], "b": ["q"]}).to_csv(other, index=False)
+    assert datacache._cache_dir(other) != datacache._cache_dir(path)
+    assert datacache.load_dataset(other)["a"].tolist() == [9.0]
+    assert datacache.ensure(path)["source"] == path  # not evicted by the other file
+
+    # concurrent builders in separate processes all succeed on one cache
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(4) as pool:
+        metas = pool.map(datacache.build, [path] * 8)
+    assert all(m["nrows"] == 3 for m in metas)
+    assert datacache.load_dataset(path)["a"].tolist() == [5.0, 6.0, 7.0]
+finally:
+    for p in [path, os.path.join(tmp_dir, "other", "datacache_selftest.csv")]:
+        shutil.rmtree(datacache._cache_dir(p), ignore_errors=True)
+        if os.path.exists(datacache._cache_dir(p) + ".lock"):
+            os.remove(datacache._cache_dir(p) + ".lock")
+    shutil.rmtree(tmp_dir)
+
+print("Data cache OK")
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from ingest import form_path
+from explanation.explanation_ifr import explain_ifr_row, explain_ifr_batch, _ifr_matrix, _ifr_models
+from explanation.explanation_ifr import explain_ifr_rows
+from explanation.explanation_cr import explain_cr_rows
+from explanation.explanation_cfr import explain_cfr_rows
+from explanation.shap_cache import explained_rows, get_explainer, native_contributions
+
+df = pd.read_csv(form_path("ifr"), nrows=200)
+
+# native pred_contribs are the TreeSHAP values of the shap package
+pre, X = _ifr_matrix(df)
+model = _ifr_models()["PMAYG"]
+assert np.allclose(native_contributions(model, X), get_explainer(model).shap_values(X), atol=1e-5)
+
+full = explain_ifr_batch(df, top_k=3)
+native = explain_ifr_batch(df, top_k=3, contributions="native")
+none = explain_ifr_batch(df, top_k=3, explain="none")
+eligible = explain_ifr_batch(df, top_k=3, explain="eligible_only", contributions="native")
+
+schemes = [c[: -len("_probability")] for c in full.columns if c.endswith("_probability")]
+for s in schemes:
+    # probabilities never depend on the explanation level
+    assert np.array_equal(full[f"{s}_probability"], none[f"{s}_probability"])
+    assert all(len(t) == 3 for t in full[f"{s}_top_features"])
+    assert all(t == [] for t in none[f"{s}_top_features"])
+    for a, b in zip(full[f"{s}_top_features"], native[f"{s}_top_features"]):
+        assert [f["feature"] for f in a] == [f["feature"] for f in b]
+    for ok, t in zip(eligible[f"{s}_eligible"], eligible[f"{s}_top_features"]):
+        assert (len(t) == 3) if ok else (t == [])
+
+assert list(explained_rows("eligible_only", [0.2, 0.5, 0.9])) == [1, 2]
+try:
+    explained_rows("some", [0.5])
+    raise AssertionError("unknown explain level accepted")
+except ValueError:
+    pass
+
+# drilling into one claim still returns full attributions by default
+row = explain_ifr_row(df.iloc[[0]])
+assert all(len(r["top_features"]) == 3 for r in row)
+lean = explain_ifr_row(df.iloc[[0]], explain="eligible_only", contributions="native")
+for r, l in zip(row, lean):
+    assert r["probability"] == l["probability"]
+    expected = [f["feature"] for f in r["top_features"]] if r["eligible"] == "YES" else []
+    assert [f["feature"] for f in l["top_features"]] == expected
+
+cr = explain_cr_rows(pd.read_csv(form_path("cr"), nrows=20), explain="none")
+assert all(r["top_features"] == [] for rows in cr for r in rows)
+
+# the per-row API takes the same scheme subset as the row and batch APIs
+assert [[r["scheme"] for r in rows] for rows in explain_ifr_rows(df.head(3), schemes=["PMAYG"])] == [["PMAYG"]] * 3
+cr = explain_cr_rows(pd.read_csv(form_path("cr"), nrows=3), schemes=["JJM"])
+assert [[r["scheme"] for r in rows] for rows in cr] == [["JJM"]] * 3
+cfr = explain_cfr_rows(pd.read_csv(form_path("cfr"), nrows=3), schemes=["jjm"])
+assert [[r["scheme"] for r in rows] for rows in cfr] == [["JJM"]] * 3
+
+print("explain levels ok:", len(schemes), "IFR schemes")
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from ingest import form_path
+from explanation.explanation_cfr import explain_cfr_batch
+from explanation.explanation_ifr import explain_ifr_batch, explain_ifr_rows
+from explanation.hybrid import (
+    agreement, explain_hybrid_batch, explain_hybrid_row, explain_hybrid_rows, rule_schemes,
+)
+from rules.rules_ifr import IFR_RULESET
+
+# shipped metrics: the CFR models that only learned noise stay on the model path
+cfr_rules = rule_schemes("cfr")
+assert "jjm" in cfr_rules and "pmjanman" not in cfr_rules and "tribalprod_community" not in cfr_rules
+
+cfr = pd.read_csv(form_path("cfr"), nrows=500)
+full = explain_cfr_batch(cfr)
+hybrid = explain_hybrid_batch("cfr", cfr)
+assert list(hybrid.columns) == list(full.columns)
+for scheme in ["pmjanman", "tribalprod_community"]:
+    col = f"{scheme.upper()}_probability"
+    assert np.allclose(hybrid[col], full[col])
+for scheme in cfr_rules:
+    col = f"{scheme.upper()}_eligible"
+    assert np.array_equal(hybrid[col], full[col]), scheme
+    assert set(hybrid[f"{scheme.upper()}_probability"]) <= {0.0, 1.0}
+
+# offline check: every rule-determined scheme agrees with its model
+for form in ["ifr", "cr", "cfr"]:
+    report = agreement(form, pd.read_csv(form_path(form), nrows=500))
+    assert all(r["agreement"] == 1.0 for r in report.values() if r["rule_determined"]), form
+
+# an all-rules IFR pass keeps the column layout and never runs a model
+ifr = pd.read_csv(form_path("ifr"), nrows=200)
+everything = [c[: -len("_probability")] for c in explain_ifr_batch(ifr).columns if c.endswith("_probability")]
+lean = explain_hybrid_batch("ifr", ifr, top_k=3, rules=everything)
+assert list(lean.columns) == list(explain_ifr_batch(ifr, top_k=3).columns)
+assert all(t == [] for t in lean["PMAYG_top_features"])
+
+# no rule schemes: the hybrid is the model path
+rows = explain_hybrid_rows("ifr", ifr.head(5), rules=[])
+model_rows = explain_ifr_rows(ifr.head(5))
+for got, expected in zip(rows, model_rows):
+    assert [r["probability"] for r in got] == [r["probability"] for r in expected]
+    assert all(r["source"] == "model" for r in got)
+
+# rule-answered schemes are explained by their conditions
+row = explain_hybrid_row("ifr", ifr.iloc[0], rules=["PMAYG", "PMGKAY"])
+by_scheme = {r["scheme"]: r for r in row}
+pmayg = by_scheme["PMAYG"]
+assert pmayg["source"] == "rules" and "top_features" not in pmayg
+assert [c["condition"] for c in pmayg["rule_conditions"]] == ["house_type == kutcha"]
+assert pmayg["rule_conditions"][0]["met"] == (pmayg["eligible"] == "YES")
+assert by_scheme["PMKISAN"]["source"] == "model" and len(by_scheme["PMKISAN"]["top_features"]) == 3
+
+conditions = IFR_RULESET.conditions(ifr, "PMGKAY")
+assert [c for c, _ in conditions] == ["annual_income < 80000"] and len(conditions[0][1]) == len(ifr)
+
+print("hybrid ok:", len(cfr_rules), "CFR schemes answered by rules")
@@ -0,0 +1,22 @@
+import pandas as pd
+from ingest import read_form, form_path, FORM_SCHEMAS
+from rules.rules_cr import apply_cr_rules, CR_RULESET
+
+# typed read: canonical names (no stray tab), schema dtypes, normalized categories
+cr = read_form("cr", nrows=300)
+assert list(cr.columns) == list(FORM_SCHEMAS["cr"])
+assert isinstance(cr["shg_vo_presence"].dtype, pd.CategoricalDtype)
+assert set(cr["shg_vo_presence"].cat.categories) <= {"yes", "no"}
+assert cr["st_hh_percent"].dtype == "float64" and cr["community_name"].dtype == object
+
+# projection parses only what the consumer needs
+rules_only = read_form("cr", columns=CR_RULESET.columns, nrows=300)
+assert set(rules_only.columns) <= set(CR_RULESET.columns)
+
+# rules see the same values as with a plain read_csv
+raw = pd.read_csv(form_path("cr"), nrows=300)
+expected = apply_cr_rules(raw).filter(like="label_")
+assert apply_cr_rules(cr).filter(like="label_").equals(expected)
+assert apply_cr_rules(rules_only).filter(like="label_").equals(expected)
+
+print("Ingest OK:", cr.memory_usage(deep=True).sum(), "bytes vs", raw.memory_usage(deep=True).sum())
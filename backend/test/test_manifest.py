@@ -0,0 +1,95 @@
+import glob
+import json
+import os
+import shutil
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+from ingest import form_path
+from explanation.manifest import export_form, verify_form
+from explanation.registry import (
+    FORMS, ArtifactRegistry, MANIFEST, available_schemes, form_dir, load_manifest, load_model, scheme_threshold,
+)
+from explanation.explanation_cfr import _cfr_matrix
+from explanation.explanation_ifr import explain_ifr_batch, explain_ifr_row, explain_ifr_rows
+
+# every shipped form is served from its manifest, and the files match it
+for form in ["ifr", "cr", "cfr"]:
+    manifest = load_manifest(form)
+    assert manifest["form"] == form and manifest["schemes"]
+    assert verify_form(form) == []
+    assert len(manifest["features"]["encoded"]) == manifest["preprocessor"]["n_features"]
+
+# only listed schemes are tried: no model file is probed for
+assert "EMRS" not in available_schemes("ifr", ["PMAYG", "EMRS"])
+assert available_schemes("ifr", ["PMAYG", "EMRS"]) == ["PMAYG"]
+try:
+    load_model("ifr", "EMRS")
+    raise AssertionError("unlisted scheme loaded")
+except FileNotFoundError:
+    pass
+
+# no pickled scheme model is left next to a manifest
+for form in ["ifr", "cr", "cfr"]:
+    prefix, suffix = FORMS[form]["model"].split("{scheme}")
+    assert glob.glob(os.path.join(form_dir(form), f"{prefix}*{suffix}")) == [], form
+
+# eligibility follows the manifest threshold in the row, batch and rows paths
+ifr = pd.read_csv(form_path("ifr"), nrows=20)
+entry = load_manifest("ifr")["schemes"]["PMAYG"]
+assert scheme_threshold("ifr", "PMAYG") == entry["threshold"] == 0.5
+entry["threshold"] = 0.0  # the cached manifest dict; restored below
+try:
+    assert explain_ifr_batch(ifr)["PMAYG_eligible"].all()
+    assert all(r["eligible"] == "YES" for rows in explain_ifr_rows(ifr) for r in rows if r["scheme"] == "PMAYG")
+    assert [r["eligible"] for r in explain_ifr_row(ifr.iloc[[0]]) if r["scheme"] == "PMAYG"] == ["YES"]
+finally:
+    entry["threshold"] = 0.5
+assert not explain_ifr_batch(ifr)["PMAYG_eligible"].all()
+
+# a file that does not match its checksum is refused
+entry = load_manifest("cfr")["schemes"]["jjm"]
+path = os.path.join(form_dir("cfr"), entry["file"])
+assert ArtifactRegistry().get(path, entry["sha256"]) is not None
+try:
+    ArtifactRegistry().get(path, "0" * 64)
+    raise AssertionError("checksum mismatch not detected")
+except ValueError:
+    pass
+
+# convert a pickle-layout directory in place: the native boosters score
+# exactly like the pickles, which are then removed; corrupt one file
+X = _cfr_matrix(pd.read_csv(form_path("cfr"), nrows=300))
+tmp_dir = tempfile.mkdtemp()
+try:
+    for name in ["cfr_preprocessor.joblib", "cfr_features.joblib"]:
+        shutil.copyfile(os.path.join(form_dir("cfr"), name), os.path.join(tmp_dir, name))
+    expected = {}
+    for scheme in ["jjm", "pmjanman"]:
+        model = load_model("cfr", scheme)
+        joblib.dump(model, os.path.join(tmp_dir, f"xgb_{scheme}.joblib"))
+        expected[scheme] = model.predict_proba(X)
+
+    exported = export_form("cfr", source=tmp_dir)
+    with open(os.path.join(tmp_dir, MANIFEST)) as f:
+        assert json.load(f)["schemes"].keys() == exported["schemes"].keys() == expected.keys()
+    assert verify_form("cfr", tmp_dir) == []
+    assert glob.glob(os.path.join(tmp_dir, "xgb_*.joblib")) == []
+    for scheme, probs in expected.items():
+        native = ArtifactRegistry().get(os.path.join(tmp_dir, exported["schemes"][scheme]["file"]))
+        assert np.array_equal(native.predict_proba(X), probs)
+    try:
+        export_form("cfr", source=tmp_dir)
+        raise AssertionError("export without pickles accepted")
+    except FileNotFoundError:
+        pass
+
+    with open(os.path.join(tmp_dir, exported["schemes"]["jjm"]["file"]), "ab") as f:
+        f.write(b"\0")
+    assert verify_form("cfr", tmp_dir) == ["cfr: checksum mismatch for xgb_jjm.ubj"]
+finally:
+    shutil.rmtree(tmp_dir)
+
+print("Manifest OK:", {f: len(load_manifest(f)["schemes"]) for f in ["ifr", "cr", "cfr"]})
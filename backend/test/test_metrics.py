@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import pandas as pd
+from ingest import form_path
+from explanation import metrics
+from explanation.explanation_ifr import explain_ifr_row
+from explanation.explanation_cfr import explain_cfr_batch
+from server import InferenceServer
+
+# disabled: one shared no-op, nothing recorded
+metrics.disable()
+metrics.reset()
+assert metrics.stage("rules", form="ifr") is metrics.stage("predict", form="cr")
+with metrics.stage("rules", form="ifr"):
+    pass
+metrics.inc("dss_prediction_errors_total", form="cfr")
+assert metrics.snapshot() == {"histograms": [], "counters": []}
+
+metrics.enable()
+try:
+    explain_ifr_row(pd.read_csv(form_path("ifr"), nrows=1))
+    explain_cfr_batch(pd.read_csv(form_path("cfr"), nrows=50))
+
+    snap = metrics.snapshot()
+    stages = {(h["labels"].get("form"), h["labels"]["stage"]) for h in snap["histograms"]}
+    for form in ["ifr", "cfr"]:
+        for name in ["rules", "transform", "predict"]:
+            assert (form, name) in stages, (form, name)
+    assert ("ifr", "shap") in stages
+    schemes = {h["labels"].get("scheme") for h in snap["histograms"] if h["labels"].get("form") == "ifr"}
+    assert "PMKISAN" in schemes
+    for h in snap["histograms"]:
+        assert h["count"] > 0 and h["sum"] >= 0 and h["p50"] <= h["p99"]
+
+    h = metrics.Histogram(buckets=(0.1, 1.0))
+    for v in [0.05, 0.05, 0.5, 5.0]:
+        h.observe(v)
+    assert h.counts == [2, 1, 1] and h.quantile(0.5) == 0.1 and h.quantile(1.0) == float("inf")
+
+    # text exposition: cumulative buckets ending in +Inf == _count
+    text = metrics.prometheus_text()
+    assert "# TYPE dss_stage_seconds histogram" in text
+    lines = [l for l in text.splitlines() if l.startswith('dss_stage_seconds_bucket{form="cfr",stage="rules"')]
+    counts = [int(l.rsplit(" ", 1)[1]) for l in lines]
+    assert counts == sorted(counts) and lines[-1].split("le=")[1].startswith('"+Inf"')
+    total = [l for l in text.splitlines() if l.startswith('dss_stage_seconds_count{form="cfr",stage="rules"}')]
+    assert int(total[0].rsplit(" ", 1)[1]) == counts[-1]
+
+    # served at GET /metrics, with request latency and cache counters
+    async def scrape():
+        server = await InferenceServer(port=0, workers=1, cache_size=8).start()
+        try:
+            row = pd.read_csv(form_path("cr"), nrows=1).iloc[0].to_dict()
+            body = json.dumps(row, default=str).encode()
+            for _ in range(2):
+                reader, writer = await asyncio.open_connection(server.host, server.port)
+                writer.write(b"POST /predict_cr HTTP/1.1\r\nConnection: close\r\n"
+                             + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+                await writer.drain()
+                await reader.read()
+                writer.close()
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            response = (await reader.read()).decode()
+            writer.close()
+            return response
+        finally:
+            await server.close()
+
+    response = asyncio.run(scrape())
+    assert "Content-Type: text/plain" in response
+    assert 'dss_stage_seconds_count{form="cr",stage="request"} 2' in response
+    assert 'dss_result_cache_total{result="hit"} 1' in response
+    assert 'dss_result_cache_total{result="miss"} 1' in response
+finally:
+    metrics.disable()
+    metrics.reset()
+
+print("metrics ok:", len(snap["histograms"]), "histograms")
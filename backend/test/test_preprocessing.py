@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from ingest import form_path, FORM_SCHEMAS
+from preprocessing import COLUMN_ROLES, build_preprocessor, feature_frame, transform
+from explanation.registry import load_preprocessor
+from rules.rules_ifr import apply_ifr_rules
+
+# every schema column has exactly one role
+for form, roles in COLUMN_ROLES.items():
+    declared = [c for cols in roles.values() for c in cols]
+    assert len(declared) == len(set(declared))
+    schema = {c.replace("nftps", "ntfps") for c in FORM_SCHEMAS[form]}
+    assert schema <= set(declared), (form, schema - set(declared))
+
+df = pd.read_csv(form_path("ifr"), nrows=500)
+
+# lean: identifiers never reach the matrix, and the output stays CSR
+lean = build_preprocessor("ifr", "lean").fit(feature_frame("ifr", df))
+X = transform(lean, apply_ifr_rules(df))
+assert sp.isspmatrix_csr(X) or isinstance(X, sp.csr_array)
+names = lean.get_feature_names_out()
+for col in COLUMN_ROLES["ifr"]["identifier"] + COLUMN_ROLES["ifr"]["text"]:
+    assert not any(n.split("__", 1)[1].startswith(col) for n in names), col
+
+# the shipped (legacy) artifact transforms exactly as before
+pre = load_preprocessor("ifr")
+norm = apply_ifr_rules(df)
+old = pre.transform(norm[[c for c in norm.columns if not c.startswith("label_")]])
+assert abs(transform(pre, norm) - old).max() == 0
+
+print("Preprocessing OK:", X.shape[1], "lean features vs", old.shape[1])
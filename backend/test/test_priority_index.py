@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from cri import CRIEngine
+from datacache import load_dataset
+from priority_index import PriorityIndex
+
+rng = np.random.default_rng(0)
+df = pd.DataFrame({
+    "district": rng.choice(["Mandla", "Dindori", "Umaria"], 2000),
+    "tehsil": rng.choice(["Niwas", "Bajag"], 2000),
+    "JJM_probability": rng.random(2000),
+    "PMAYG_probability": rng.random(2000),
+})
+index = PriorityIndex.from_frame(df)
+
+
+def brute(frame, metric, n, **region):
+    for col, value in region.items():
+        frame = frame[frame[col].str.lower() == value.lower()]
+    s = frame[metric].sort_values(ascending=False, kind="stable")
+    return list(s.index[:n])
+
+
+# top-N per region matches a full sort
+assert [r for r, _ in index.top("JJM_probability", 50)] == brute(df, "JJM_probability", 50)
+assert [r for r, _ in index.top("JJM_probability", 50, district="mandla ")] == brute(df, "JJM_probability", 50, district="Mandla")
+got = [r for r, _ in index.top("PMAYG_probability", 10, district="Umaria", tehsil="Bajag")]
+assert got == brute(df, "PMAYG_probability", 10, district="Umaria", tehsil="Bajag")
+
+# threshold queries
+hits = index.above("JJM_probability", 0.9, district="Dindori")
+assert len(hits) == ((df.district == "Dindori") & (df.JJM_probability >= 0.9)).sum()
+assert all(s >= 0.9 for _, s in hits)
+
+# incremental re-score moves the row in every region it belongs to
+row = brute(df, "JJM_probability", 1, district="Mandla")[-1]
+index.update(row, JJM_probability=-1.0)
+df.loc[row, "JJM_probability"] = -1.0
+assert [r for r, _ in index.top("JJM_probability", 50)] == brute(df, "JJM_probability", 50)
+assert [r for r, _ in index.top("JJM_probability", 5, district="Mandla")] == brute(df, "JJM_probability", 5, district="Mandla")
+assert index.rank("JJM_probability", row, district="Mandla") == (df.district == "Mandla").sum() - 1
+
+# CRI: engine updates feed the index
+cri = load_dataset("cri", columns=["District", "Tehsil"]).rename(columns=str.lower)
+engine = CRIEngine.from_dataset()
+cri["CRI_Score"] = engine.scores
+cri_index = PriorityIndex.from_frame(cri, metrics=["CRI_Score"])
+engine.update(5, Forest_Degradation_Index=100.0, Fire_Incidents_5yrs=6, Drought_Prone="Yes")
+cri_index.update(5, CRI_Score=engine.scores[5])
+cri["CRI_Score"] = engine.scores
+assert [r for r, _ in cri_index.top("CRI_Score", 20)] == brute(cri, "CRI_Score", 20)
+assert cri_index.rank("CRI_Score", 5) == int((engine.scores > engine.scores[5]).sum())
+
+print("Priority index OK:", index.top("JJM_probability", 3, district="Mandla"))
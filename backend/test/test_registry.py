@@ -0,0 +1,30 @@
+import os
+import shutil
+import tempfile
+
+from explanation.registry import ArtifactRegistry, artifact_path
+
+registry = ArtifactRegistry()
+
+# same object is handed out until the file changes
+src = artifact_path("cfr", "input_features")
+first = registry.get(src)
+assert registry.get(src) is first
+assert registry.loads == 1
+
+# touching the file (new mtime) triggers exactly one reload
+tmp_dir = tempfile.mkdtemp()
+try:
+    path = os.path.join(tmp_dir, "cfr_features.joblib")
+    shutil.copy(src, path)
+    before = registry.get(path)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    after = registry.get(path)
+    assert after is not before and after == before
+    assert registry.get(path) is after
+    assert registry.loads == 3
+finally:
+    shutil.rmtree(tmp_dir)
+
+print("Registry OK: loads =", registry.loads, "| version =", registry.version)
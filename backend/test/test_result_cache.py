@@ -0,0 +1,46 @@
+import time
+
+import pandas as pd
+from ingest import form_path
+import explanation.result_cache as result_cache
+from explanation.result_cache import ResultCache, cached_explainer, row_key
+from explanation.explanation_cfr import explain_cfr_row
+
+row = pd.read_csv(form_path("cfr"), nrows=1).iloc[0].to_dict()
+
+# cosmetic differences (case, whitespace, column-name case, 5 vs 5.0) share a key
+variant = {k.upper(): (f"  {v.upper()} " if isinstance(v, str) else v) for k, v in row.items()}
+variant["SEASONAL_INCOME_FOREST_PERCENT"] = float(row["seasonal_income_forest_percent"])
+assert row_key("cfr", row) == row_key("cfr", variant) == row_key("cfr", pd.DataFrame([row]))
+assert row_key("cfr", row) != row_key("cfr", dict(row, forest_condition="Good" if row["forest_condition"] != "Good" else "Poor"))
+assert row_key("cfr", row) != row_key("cr", row)
+
+cache = ResultCache(maxsize=2)
+explain = cached_explainer("cfr", explain_cfr_row, cache)
+first = explain(pd.DataFrame([row]))
+assert explain(pd.DataFrame([variant])) == first
+assert (cache.hits, cache.misses) == (1, 1)
+
+# returned results are copies
+explain(pd.DataFrame([row]))[0]["probability"] = -1
+assert explain(pd.DataFrame([row]))[0]["probability"] == first[0]["probability"]
+
+# new model artifacts change the key
+version = result_cache.model_version
+result_cache.model_version = lambda form: "retrained"
+try:
+    explain(pd.DataFrame([row]))
+    assert cache.misses == 2
+finally:
+    result_cache.model_version = version
+
+# size bound and TTL
+for i in range(3):
+    cache.put(i, [i])
+assert len(cache) == 2 and cache.get(0) is None and cache.evictions >= 1
+short = ResultCache(maxsize=4, ttl=0.01)
+short.put("k", [1])
+time.sleep(0.02)
+assert short.get("k") is None
+
+print("Result cache OK:", cache.stats())
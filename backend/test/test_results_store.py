@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+from ingest import form_path
+from results_store import ResultsStore
+from explanation.explanation_cfr import explain_cfr_rows
+
+df = pd.read_csv(form_path("cfr"), nrows=300)
+
+tmp_dir = tempfile.mkdtemp()
+try:
+    store = ResultsStore(os.path.join(tmp_dir, "results.sqlite"))
+
+    # first run scores everything, a second run nothing
+    assert store.refresh("cfr", df)["scored"] == 300
+    assert store.refresh("cfr", df)["scored"] == 0
+
+    # only changed rows are re-scored; vanished rows are pruned
+    changed = df.copy()
+    changed.loc[5, "forest_condition"] = "Degraded" if df.loc[5, "forest_condition"] != "Degraded" else "Good"
+    stats = store.refresh("cfr", changed.iloc[:250])
+    assert (stats["scored"], stats["unchanged"], stats["pruned"]) == (1, 249, 50)
+    assert store.refresh("cfr", changed.iloc[:250], full=True)["scored"] == 250
+
+    # stored results equal a live explanation
+    live = explain_cfr_rows(changed.iloc[[5]])[0]
+    stored = {r["scheme"]: r for r in store.results("cfr", 5)}
+    for r in live:
+        assert abs(stored[r["scheme"]]["probability"] - r["probability"]) < 1e-6
+        assert stored[r["scheme"]]["eligible"] == r["eligible"]
+
+    # indexed top-N by district
+    district = changed.loc[0, "district"]
+    top = store.top("cfr", live[0]["scheme"], n=5, district=district)
+    assert len(top) == 5 and top[0][1] >= top[-1][1]
+    assert store.top("cfr", live[0]["scheme"], n=5, district=f" {district.upper()} ") == top
+
+    # region lookups are driven by the region indexes
+    village = changed.loc[0, "village"]
+    for region, index in [({"district": district}, "claims_district"), ({"village": village}, "claims_village")]:
+        sql, params = store._top_query("cfr", live[0]["scheme"], 5, **region)
+        plan = " ".join(row[-1] for row in store._connect().execute("EXPLAIN QUERY PLAN " + sql, params))
+        assert f"USING INDEX {index}" in plan, plan
+    assert store.top("cfr", live[0]["scheme"], n=3, village=village.lower())
+    store.close()
+finally:
+    shutil.rmtree(tmp_dir)
+
+print("Results store OK:", top[:2])
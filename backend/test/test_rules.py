@@ -0,0 +1,38 @@
+import pandas as pd
+from rules.rules_ifr import apply_ifr_rules, ifr_labels
+from rules.rules_cr import apply_cr_rules, cr_labels
+from rules.rules_cfr import cfr_labels
+
+# hand-checked IFR rows, with messy case/whitespace and missing columns
+rows = pd.DataFrame([
+    {"House_Type": " Kutcha ", "annual_income": 50000, "age_of_claimant": 25,
+     "is_st": "Yes", "school_going_children": "yes", "highest_education_level": "Primary"},
+    {"House_Type": "pucca", "annual_income": 90000, "age_of_claimant": 65,
+     "is_st": "no", "highest_education_level": "PhD", "primary_livelihood": "Wage Labour"},
+])
+labels = ifr_labels(rows)
+assert labels.loc[0, ["label_PMAYG", "label_MGNREGA_INDIV", "label_DDUGKY", "label_PREMATRIC_ST"]].tolist() == [1, 1, 1, 1]
+assert labels.loc[0, ["label_POSTMATRIC_ST", "label_NSAP"]].tolist() == [0, 0]
+assert labels.loc[1, ["label_PMAYG", "label_MGNREGA_INDIV", "label_NSAP", "label_PMGKAY"]].tolist() == [0, 1, 1, 0]
+assert labels.loc[1, "label_NATFELLOWSHIP_ST"] == 0
+
+# labels-only evaluation agrees with the full rules pass
+for path, apply_rules, label_fn in [
+    ("data/FINAL_IFR_FormA.csv", apply_ifr_rules, ifr_labels),
+    ("data/FINAL_CR_FormB.csv", apply_cr_rules, cr_labels),
+]:
+    df = pd.read_csv(path, nrows=500)
+    full = apply_rules(df)
+    only = label_fn(df)
+    assert full[only.columns].equals(only), path
+    assert (full.select_dtypes(object).apply(lambda s: (s == s.str.strip().str.lower()).all())).all()
+
+# CFR: pmjanman = degraded forest OR NTFPs listed
+cfr = pd.DataFrame([
+    {"forest_condition": "Degraded", "major_ntfps_collected": ""},
+    {"forest_condition": "Good", "major_ntfps_collected": "Mahua"},
+    {"forest_condition": "Good", "major_ntfps_collected": ""},
+])
+assert cfr_labels(cfr)["label_pmjanman"].tolist() == [1, 1, 0]
+
+print("Rules OK")
@@ -0,0 +1,74 @@
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import time
+
+import pandas as pd
+from server import InferenceServer
+from explanation.explanation_ifr import explain_ifr_row
+
+# run the server on a free local port in a background event loop
+loop = asyncio.new_event_loop()
+server = loop.run_until_complete(InferenceServer(port=0, workers=2).start())
+thread = threading.Thread(target=loop.run_forever, daemon=True)
+thread.start()
+
+
+def post(path, payload):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=60)
+    conn.request("POST", path, body=json.dumps(payload), headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    data = json.loads(resp.read())
+    conn.close()
+    return resp.status, data
+
+
+try:
+    df = pd.read_csv("data/FINAL_IFR_FormA.csv", nrows=1)
+    row = json.loads(df.iloc[0].to_json())
+
+    status, results = post("/predict_ifr", row)
+    assert status == 200
+    expected = explain_ifr_row(pd.DataFrame([row]))
+    assert [r["scheme"] for r in results] == [r["scheme"] for r in expected]
+    assert all(abs(a["probability"] - b["probability"]) < 1e-6 for a, b in zip(results, expected))
+
+    for path, csv in [("/predict_cr", "data/FINAL_CR_FormB.csv"), ("/predict_cfr", "data/FINAL_CFR_FormC.csv")]:
+        row = json.loads(pd.read_csv(csv, nrows=1).iloc[0].to_json())
+        status, results = post(path, row)
+        assert status == 200 and len(results) == 7, (path, status, results)
+
+    ifr_row = json.loads(pd.read_csv("data/FINAL_IFR_FormA.csv", nrows=1).iloc[0].to_json())
+    status, whatif = post("/whatif_ifr", {"row": ifr_row, "grid": {"annual_income": [0, 50000, 100000]}})
+    assert status == 200 and len(whatif["scenarios"]) == 3, (status, whatif)
+    assert "PMGKAY" in whatif["boundaries"]["annual_income"]
+    status, err = post("/whatif_ifr", {"row": ifr_row, "grid": {"annual_income": list(range(20000))}})
+    assert status == 413 and "error" in err
+    status, err = post("/whatif_ifr", {"grid": {}})
+    assert status == 400
+
+    status, err = post("/predict_unknown", {})
+    assert status == 404 and "error" in err
+
+    for length in ["abc", "-5"]:
+        sock = socket.create_connection(("127.0.0.1", server.port), timeout=10)
+        sock.sendall(f"POST /predict_ifr HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+        assert sock.recv(1024).startswith(b"HTTP/1.1 400"), length
+        sock.close()
+
+    # a timed-out request holds its admission slot until the scoring ends
+    server.routes["/predict_ifr"] = lambda df: time.sleep(0.5) or []
+    server.timeout = 0.1
+    status, err = post("/predict_ifr", row)
+    assert status == 504
+    assert server.pending == 1
+    time.sleep(0.6)
+    assert server.pending == 0
+
+    print("Server OK on port", server.port)
+finally:
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+import joblib
+
+from explanation.registry import ArtifactRegistry, preload
+from explanation.snapshot import load_snapshot, save_snapshot
+
+# importing the explanation modules pulls in neither sklearn nor shap
+out = subprocess.run(
+    [sys.executable, "-W", "ignore", "-c",
+     "import sys, explanation.explanation_ifr, explanation.explanation_cr, explanation.explanation_cfr; "
+     "print(sorted(m for m in ('sklearn', 'shap', 'numba') if m in sys.modules))"],
+    cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), capture_output=True, text=True, check=True,
+)
+assert out.stdout.strip() == "[]", out.stdout
+
+tmp_dir = tempfile.mkdtemp()
+try:
+    path = os.path.join(tmp_dir, "snapshot.joblib")
+    info = save_snapshot(path)
+    n = len(preload())
+    assert info["artifacts"] == n
+
+    # every current artifact comes out of the one file, none is unpickled again
+    registry = ArtifactRegistry()
+    stats = load_snapshot(path, registry)
+    assert stats == {"seeded": n, "stale": []}
+    for p in preload():
+        registry.get(p)
+    assert registry.loads == 0
+
+    # an artifact changed since the snapshot is left to its own file
+    snapshot = joblib.load(path)
+    rel = sorted(snapshot["artifacts"])[0]
+    stamp, obj = snapshot["artifacts"][rel]
+    snapshot["artifacts"][rel] = ((stamp[0] - 1, stamp[1]), obj)
+    joblib.dump(snapshot, path)
+    registry = ArtifactRegistry()
+    stats = load_snapshot(path, registry)
+    assert stats["stale"] == [rel] and stats["seeded"] == n - 1
+
+    joblib.dump({"format": 0}, path)
+    try:
+        load_snapshot(path, ArtifactRegistry())
+        raise AssertionError("foreign file accepted as snapshot")
+    except ValueError:
+        pass
+finally:
+    for f in os.listdir(tmp_dir):
+        os.remove(os.path.join(tmp_dir, f))
+    os.rmdir(tmp_dir)
+
+print("Snapshot OK:", info["artifacts"], "artifacts,", round(info["bytes"] / 1e6, 1), "MB")
@@ -0,0 +1,46 @@
+import json
+import os
+import shutil
+import tempfile
+
+import joblib
+import numpy as np
+from xgboost import XGBClassifier
+from ingest import read_form
+from preprocessing import COLUMN_ROLES, transform
+from rules.rules_cfr import apply_cfr_rules
+from train import train
+
+tmp_dir = tempfile.mkdtemp()
+try:
+    metrics = train(["cfr"], jobs=2, mode="lean", out_dir=tmp_dir, nrows=600, verbose=False)["cfr"]
+    base = os.path.join(tmp_dir, "cfr_models")
+
+    # every two-class scheme is trained and scored; single-class ones are reported
+    with open(os.path.join(base, "metrics.json")) as f:
+        assert json.load(f) == metrics
+    trained = [s for s, m in metrics.items() if "skipped" not in m]
+    # retraining records the rule agreement itself, so hybrid scoring never
+    # falls back to the acc / auc heuristic for a freshly trained form
+    for s in trained:
+        assert 0.0 <= metrics[s]["rule_agreement"] <= 1.0
+        assert metrics[s]["rule_determined"] == (metrics[s]["rule_agreement"] == 1.0)
+    assert trained and all(os.path.exists(os.path.join(base, f"xgb_{s}.ubj")) for s in trained)
+    with open(os.path.join(base, "manifest.json")) as f:
+        manifest = json.load(f)
+    assert sorted(manifest["schemes"]) == sorted(trained)
+    assert set(manifest["skipped"]) == {s for s, m in metrics.items() if "skipped" in m}
+    assert not any(n.startswith(".tmp-") for n in os.listdir(base))
+
+    # lean artifacts: identifiers are not inputs, and they score rule-normalized rows
+    pre = joblib.load(os.path.join(base, "cfr_preprocessor.joblib"))
+    assert not set(pre.feature_names_in_) & set(COLUMN_ROLES["cfr"]["identifier"])
+    X = transform(pre, apply_cfr_rules(read_form("cfr", nrows=50)))
+    model = XGBClassifier()
+    model.load_model(os.path.join(base, f"xgb_{trained[0]}.ubj"))
+    prob = model.predict_proba(X)[:, 1]
+    assert prob.shape == (50,) and np.all((prob >= 0) & (prob <= 1))
+finally:
+    shutil.rmtree(tmp_dir)
+
+print("Train OK:", {s: m.get("auc", m.get("skipped")) for s, m in metrics.items()})
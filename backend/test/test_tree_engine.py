@@ -0,0 +1,41 @@
+import pandas as pd
+from explanation.tree_engine import packed_forest
+from explanation.explanation_ifr import _ifr_matrix, _ifr_models, explain_ifr_batch
+from explanation.explanation_cr import _cr_matrix, _cr_models, explain_cr_batch
+from explanation.explanation_cfr import _cfr_matrix, _cfr_models, explain_cfr_batch
+
+# the packed forest must reproduce predict_proba for every scheme
+cases = [
+    ("ifr", "data/FINAL_IFR_FormA.csv", lambda df: _ifr_matrix(df)[1], _ifr_models),
+    ("cr", "data/FINAL_CR_FormB.csv", lambda df: _cr_matrix(df)[1], _cr_models),
+    ("cfr", "data/FINAL_CFR_FormC.csv", _cfr_matrix, _cfr_models),
+]
+
+for form, path, matrix, models in cases:
+    df = pd.read_csv(path, nrows=500)
+    X = matrix(df)
+    forest = packed_forest(form, models())
+
+    worst = forest.verify(models(), X, atol=1e-5)
+    print(form, "schemes:", len(forest.schemes), "| trees:", len(forest.roots), "| max diff:", worst)
+
+# engine="packed" is a drop-in for the batch API
+df = pd.read_csv("data/FINAL_IFR_FormA.csv", nrows=50)
+ref = explain_ifr_batch(df)
+packed = explain_ifr_batch(df, engine="packed")
+assert (ref.filter(like="_eligible") == packed.filter(like="_eligible")).all().all()
+assert (ref.filter(like="_probability") - packed.filter(like="_probability")).abs().max().max() < 1e-5
+
+# a misspelled engine is an error, not a silent fallback to xgboost
+for explain_batch in [explain_ifr_batch, explain_cr_batch, explain_cfr_batch]:
+    try:
+        explain_batch(df, engine="pakced")
+        raise AssertionError("unknown engine accepted")
+    except ValueError:
+        pass
+
+# with no models to score both engines return the same empty frame
+for explain_batch in [explain_ifr_batch, explain_cr_batch, explain_cfr_batch]:
+    for engine in ["xgboost", "packed"]:
+        empty = explain_batch(df, engine=engine, schemes=["NO_SUCH_SCHEME"])
+        assert empty.shape == (len(df), 0) and empty.index.equals(df.index)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from ingest import read_form
+from village_index import VillageIndex, load_village_index
+
+master = pd.DataFrame({
+    "District": ["A", "A", "A", "B"],
+    "Tehsil": ["t1", "t1", "t2", "t3"],
+    "Gram_Panchayat": ["g1", "g1", "g2", "g3"],
+    "Village_Name": ["v1", "v2", "v3", "v4"],
+    "Forest_Cover_percent": [10.0, 30.0, 50.0, 70.0],
+    "Drought_Prone": ["Yes", "Yes", "No", "No"],
+})
+index = VillageIndex.from_frame(master)
+
+claims = pd.DataFrame({
+    "village": ["V2", "unknown", "x", "x", None],
+    "gram_panchayat": ["g1", "G1 ", "nope", "x", None],
+    "tehsil": ["t1", "t1", "t2", "x", None],
+    "district": ["A", "a", "A", "B", None],
+})
+ctx = index.lookup(claims)
+
+# finest matching level wins; coarser levels aggregate (mean / mode)
+assert ctx["village_match_level"].tolist() == ["village", "gram_panchayat", "tehsil", "district", "all"]
+assert np.allclose(ctx["village_forest_cover_percent"], [30.0, 20.0, 50.0, 70.0, 40.0])
+assert ctx["village_drought_prone"].tolist()[:4] == ["Yes", "Yes", "No", "No"]
+
+# single-row path agrees with the batch path
+for i in range(len(claims)):
+    one = index.lookup_row(claims.iloc[i])
+    assert one["village_match_level"] == ctx["village_match_level"].iloc[i]
+    assert one["village_forest_cover_percent"] == ctx["village_forest_cover_percent"].iloc[i]
+
+# bundled master: every IFR row resolves, aligned to the input index
+ifr = read_form("ifr", nrows=500, columns=["village", "gram_panchayat", "tehsil", "district"])
+enriched = load_village_index().enrich(ifr)
+assert len(enriched) == len(ifr) and enriched.index.equals(ifr.index)
+assert enriched["village_match_level"].isin(["village", "gram_panchayat"]).all()
+
+print("Village index OK:", enriched.shape, enriched["village_match_level"].value_counts().to_dict())
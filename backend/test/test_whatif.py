@@ -0,0 +1,79 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from ingest import form_path
+from explanation.explanation_cfr import explain_cfr_row
+from explanation.explanation_ifr import explain_ifr_batch, explain_ifr_row
+from explanation.whatif import boundaries, expand, flips, summarize, sweep, what_if
+
+df = pd.read_csv(form_path("ifr"), nrows=20)
+row = df.iloc[[0]]
+
+# every grid combination is a scenario, scored like a single row would be
+grid = {"annual_income": [40000, 55000, 90000], "cultivation_area": [0, 2]}
+result = what_if("ifr", row, grid)
+assert len(result) == 6 and list(result["scenario"]) == list(range(6))
+for i in [1, 4]:
+    scenario = result.iloc[i]
+    x = row.copy()
+    x["annual_income"] = scenario["annual_income"]
+    x["cultivation_area"] = scenario["cultivation_area"]
+    for r in explain_ifr_row(x, explain="none"):
+        assert abs(scenario[f"{r['scheme']}_probability"] - r["probability"]) < 1e-6
+
+# flipped is relative to the unperturbed row
+base = explain_ifr_batch(row).iloc[0]
+for (_, scenario), flipped in zip(result.iterrows(), flips(result)):
+    assert flipped == [s for s in ["PMAYG", "PMKISAN", "MGNREGA_INDIV", "NRLM_INDIV", "DDUGKY", "NSAP", "PMGKAY"]
+                       if scenario[f"{s}_eligible"] != base[f"{s}_eligible"]]
+
+# PMGKAY is an income threshold: a 100-point sweep finds it between neighbouring grid values
+values = np.linspace(0, 200000, 100)
+swept = sweep("ifr", row, "annual_income", values)
+edges = swept["boundaries"]["PMGKAY"]
+assert any(e["from"] < 80000 <= e["to"] and e["eligible"] is False for e in edges), edges
+assert all(np.isclose(e["to"] - e["from"], values[1] - values[0]) for e in edges)
+
+# one pass: the sweep costs about one 101-row batch, not 100 row calls
+started = time.perf_counter()
+sweep("ifr", row, "annual_income", values)
+sweep_s = time.perf_counter() - started
+started = time.perf_counter()
+explain_ifr_batch(pd.concat([row] * 101))
+batch_s = time.perf_counter() - started
+assert sweep_s < 5 * batch_s + 0.05, (sweep_s, batch_s)
+
+# several base rows, explicit scenarios, case-insensitive feature names
+frame, base_pos, scenario_pos, cases = expand(df.head(3), [{"ANNUAL_INCOME": 0}, {"house_type": "kutcha"}])
+assert len(frame) == 3 + 6 and "ANNUAL_INCOME" not in frame.columns
+assert list(frame["annual_income"].iloc[3:6]) == [0, 0, 0]
+assert list(frame["house_type"].iloc[6:]) == ["kutcha"] * 3
+many = what_if("ifr", df.head(3), [{"annual_income": 0}, {"house_type": "kutcha"}])
+assert list(many["base"]) == [0, 1, 2, 0, 1, 2]
+assert many["PMAYG_eligible"].iloc[3:].all()
+
+summary = summarize(result)
+json.dumps(summary)
+assert set(summary["boundaries"]) <= {"annual_income", "cultivation_area"}
+assert summarize(many)["boundaries"] == {}
+
+# CFR (upper-cased scheme columns) and the hybrid path agree with the model path
+cfr = pd.read_csv(form_path("cfr"), nrows=1)
+grid = {"frc_formed": ["yes", "no"], "road_access_condition": ["poor", "good"]}
+model = what_if("cfr", cfr, grid)
+hybrid = what_if("cfr", cfr, grid, hybrid=True)
+assert list(model.columns) == list(hybrid.columns)
+assert np.array_equal(model["NRLM_COMMUNITY_eligible"], hybrid["NRLM_COMMUNITY_eligible"])
+assert list(model["NRLM_COMMUNITY_eligible"]) == [True, True, False, False]
+assert boundaries(model, "frc_formed")["NRLM_COMMUNITY"]
+assert len(explain_cfr_row(cfr)) == 7
+
+try:
+    what_if("ifr", row.iloc[:0], grid)
+    raise AssertionError("empty base accepted")
+except ValueError:
+    pass
+
+print("what-if ok: sweep", round(sweep_s, 4), "s vs batch", round(batch_s, 4), "s")
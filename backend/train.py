@@ -0,0 +1,205 @@
+"""
+Training pipeline for the IFR / CR / CFR scheme models.
+
+For each form the bundled CSV is read (ingest.read_form), labelled with the
+rule engine (apply_*_rules), the preprocessor is fitted once on the
+normalized features and one XGBClassifier is trained per scheme label:
+
+    models/<form>_models/
+        <preprocessor>              fitted ColumnTransformer
+        <feature_names>             encoded feature names (IFR, CR)
+        <input_features>            input column order (CFR)
+        <native model per scheme>   XGBoost .ubj, names as in explanation.registry.FORMS
+        manifest.json               schemes, feature order, checksums (explanation.manifest)
+        metrics.json                acc / f1 / auc on a held-out split, and the
+                                    rule agreement explanation.hybrid reads
+
+All scheme models of all requested forms are trained in one process pool.
+Each worker's XGBoost gets cpu_count // jobs threads (and OpenMP / BLAS
+are capped to the same number), so the pool fills the machine without
+oversubscribing it. Nothing is written until every model has trained; each
+file is then written to a temporary name and moved into place with
+os.replace, so a running server never loads a half-written artifact.
+
+Run from the backend directory:
+
+    python train.py --form all --jobs 8
+    python train.py --form ifr --mode lean --out /tmp/models
+
+Schemes whose labels are single-class in the data are skipped: they are
+reported in metrics.json and the manifest, and not served.
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed, parallel_config
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+from explanation.manifest import THRESHOLD, atomic_dump, atomic_json, write_form
+from explanation.registry import FORMS, MODELS_DIR
+from ingest import read_form
+from preprocessing import APPLY_RULES, build_preprocessor, input_frame
+
+SEED = 42
+TEST_SIZE = 0.2
+
+# hyper-parameters of the shipped models
+XGB_PARAMS = {
+    "ifr": dict(n_estimators=200, learning_rate=0.08, max_depth=5, subsample=0.9,
+                colsample_bytree=0.9, eval_metric="logloss"),
+    "cr": dict(n_estimators=200, learning_rate=0.08, max_depth=5, subsample=0.9,
+               colsample_bytree=0.9, eval_metric="logloss"),
+    "cfr": dict(n_estimators=180, learning_rate=0.1, max_depth=5, subsample=0.9,
+                colsample_bytree=0.9, eval_metric="logloss"),
+}
+
+
+def prepare(form, mode="legacy", path=None, nrows=None):
+    """
+    Read and label the form's data and fit its preprocessor.
+
+    Returns (preprocessor, X, labels) where X is the transformed matrix and
+    labels maps scheme -> 0/1 array (scheme names as used in model files).
+    """
+    df = read_form(form, path=path, nrows=nrows)
+    norm = APPLY_RULES[form](df)
+
+    features = input_frame(form, norm, mode)
+    pre = build_preprocessor(form, mode).fit(features)
+    X = pre.transform(features)
+    if hasattr(X, "tocsr"):
+        X = X.tocsr()
+
+    labels = {
+        c[len("label_"):]: norm[c].to_numpy(dtype=np.int64)
+        for c in norm.columns if c.startswith("label_")
+    }
+    return pre, X, labels
+
+
+def fit_scheme(form, scheme, X, y, threads=1):
+    """
+    Train one scheme model on a stratified split. Returns (model, metrics).
+
+    Besides the held-out scores, metrics record how often the model agrees
+    with its rule labels over all rows ("rule_agreement"); only a scheme
+    that agrees everywhere is "rule_determined" and may be answered from
+    the rules by explanation.hybrid.
+    """
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=TEST_SIZE, random_state=SEED, stratify=y,
+    )
+    model = XGBClassifier(**XGB_PARAMS[form], random_state=SEED, n_jobs=threads)
+    model.fit(X_train, y_train)
+
+    prob = model.predict_proba(X_test)[:, 1]
+    pred = (prob >= THRESHOLD).astype(int)
+    metrics = {
+        "acc": float(accuracy_score(y_test, pred)),
+        "f1": float(f1_score(y_test, pred, zero_division=0)),
+        "auc": float(roc_auc_score(y_test, prob)),
+        "positive_rate": float(y.mean()),
+        "n_train": int(len(y_train)),
+        "n_test": int(len(y_test)),
+    }
+    agree = float(np.mean((model.predict_proba(X)[:, 1] >= THRESHOLD) == y))
+    metrics["rule_agreement"] = agree
+    metrics["rule_determined"] = agree == 1.0
+    return model, metrics
+
+
+def _trainable(y):
+    # stratified split needs at least two samples of each class
+    counts = np.bincount(y, minlength=2)
+    return counts.min() >= 2
+
+
+def train(forms=("ifr", "cr", "cfr"), jobs=None, mode="legacy", out_dir=MODELS_DIR, nrows=None, verbose=True):
+    """
+    Retrain every scheme model of `forms` and write the artifacts under
+    out_dir/<form dir>. Returns {form: metrics dict}.
+    """
+    started = time.perf_counter()
+    cores = os.cpu_count() or 1
+
+    prepared = {}
+    tasks = []
+    skipped = {}
+    for form in forms:
+        pre, X, labels = prepare(form, mode=mode, nrows=nrows)
+        prepared[form] = pre
+        skipped[form] = {}
+        for scheme, y in labels.items():
+            if _trainable(y):
+                tasks.append((form, scheme, X, y))
+            else:
+                skipped[form][scheme] = {"skipped": "single-class labels", "positive_rate": float(y.mean())}
+
+    jobs = max(1, min(jobs or cores, len(tasks) or 1))
+    threads = max(1, cores // jobs)
+    if verbose:
+        print(f"Training {len(tasks)} models on {jobs} workers x {threads} threads")
+
+    with parallel_config(backend="loky", inner_max_num_threads=threads):
+        results = Parallel(n_jobs=jobs, verbose=5 if verbose else 0)(
+            delayed(fit_scheme)(form, scheme, X, y, threads) for form, scheme, X, y in tasks
+        )
+
+    # write only once everything trained
+    all_metrics = {}
+    for form in forms:
+        layout = FORMS[form]
+        target = os.path.join(out_dir, layout["dir"])
+        os.makedirs(target, exist_ok=True)
+
+        models, metrics = {}, {}
+        for (t_form, scheme, _, _), (model, m) in zip(tasks, results):
+            if t_form != form:
+                continue
+            models[scheme] = model
+            metrics[scheme] = m
+        metrics.update(skipped[form])
+
+        # feature lists stay as joblib files too, for readers of the pickle layout
+        pre = prepared[form]
+        if "feature_names" in layout:
+            atomic_dump(pre.get_feature_names_out(), os.path.join(target, layout["feature_names"]))
+        if "input_features" in layout:
+            atomic_dump(list(pre.feature_names_in_), os.path.join(target, layout["input_features"]))
+        write_form(target, form, pre, models, {s: m["skipped"] for s, m in skipped[form].items()})
+        atomic_json(metrics, os.path.join(target, "metrics.json"))
+        all_metrics[form] = metrics
+
+        if verbose:
+            for scheme, m in metrics.items():
+                if "skipped" in m:
+                    print(f"  {form}/{scheme}: skipped ({m['skipped']})")
+                else:
+                    print(f"  {form}/{scheme}: acc={m['acc']:.3f} f1={m['f1']:.3f} auc={m['auc']:.3f}")
+
+    if verbose:
+        print(f"Done in {time.perf_counter() - started:.1f}s -> {out_dir}")
+    return all_metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retrain the IFR / CR / CFR scheme models.")
+    parser.add_argument("--form", choices=["all", "ifr", "cr", "cfr"], default="all")
+    parser.add_argument("--jobs", type=int, default=None, help="parallel model fits (default: all cores)")
+    parser.add_argument("--mode", choices=["legacy", "lean"], default="legacy",
+                        help="preprocessing layout (see preprocessing.py)")
+    parser.add_argument("--out", default=MODELS_DIR, help="models root directory")
+    parser.add_argument("--nrows", type=int, default=None, help="train on the first N rows only")
+    args = parser.parse_args(argv)
+
+    forms = ["ifr", "cr", "cfr"] if args.form == "all" else [args.form]
+    train(forms, jobs=args.jobs, mode=args.mode, out_dir=args.out, nrows=args.nrows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Administrative-hierarchy index over FINAL_Village_Master_GIS.csv.
+
+Claim rows (IFR / CR / CFR) carry district, tehsil, gram_panchayat and
+village. The index precomputes one feature vector per node of the hierarchy
+
+    district -> tehsil -> gram_panchayat -> village
+
+(village rows as they are; coarser nodes as the mean of their villages'
+numeric attributes and the most frequent value of each categorical one)
+and joins them onto claim rows without a pandas merge:
+
+  * every key column is encoded once into the master's integer code space
+    (string work on unique values only),
+  * the codes of a level are combined into one int64 key and located with
+    np.searchsorted in that level's sorted keys,
+  * each row takes the finest level that matched and the feature vectors
+    are gathered with a single take per block.
+
+A row whose village is unknown falls back to its gram panchayat, then
+tehsil, district and finally the all-villages aggregate; the level used is
+reported in the `<prefix>match_level` column.
+
+    index = load_village_index()
+    context = index.lookup(ifr_df)              # DataFrame aligned to ifr_df
+    enriched = index.enrich(ifr_df)             # ifr_df + village_* columns
+    one = index.lookup_row({"village": ..., "gram_panchayat": ..., ...})
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from rules.engine import factorize_normalized
+
+VILLAGE_DATASET = "village"
+
+# hierarchy keys, coarse to fine (canonical names)
+VILLAGE_KEYS = ["district", "tehsil", "gram_panchayat", "village"]
+
+# master header -> canonical key name (other headers are just lowercased)
+MASTER_KEY_COLUMNS = {
+    "District": "district",
+    "Tehsil": "tehsil",
+    "Gram_Panchayat": "gram_panchayat",
+    "Village_Name": "village",
+}
+
+# match levels, finest first; each uses the first n keys of VILLAGE_KEYS
+LEVELS = [("village", 4), ("gram_panchayat", 3), ("tehsil", 2), ("district", 1), ("all", 0)]
+
+
+def _normalize(value):
+    return str(value).strip().lower()
+
+
+def _group_mean(groups, n_groups, values):
+    """Per-group NaN-ignoring mean of each column of values (n, m)."""
+    out = np.full((n_groups, values.shape[1]), np.nan)
+    for j in range(values.shape[1]):
+        col = values[:, j]
+        ok = ~np.isnan(col)
+        sums = np.bincount(groups[ok], weights=col[ok], minlength=n_groups)
+        counts = np.bincount(groups[ok], minlength=n_groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[:, j] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    return out
+
+
+def _group_mode(groups, n_groups, codes, n_categories):
+    """Per-group most frequent code of each column of codes (n, m); -1 = missing."""
+    out = np.full((n_groups, codes.shape[1]), -1, dtype=np.int32)
+    for j in range(codes.shape[1]):
+        col = codes[:, j]
+        ok = col >= 0
+        k = n_categories[j]
+        if k == 0:
+            continue
+        counts = np.bincount(groups[ok] * k + col[ok], minlength=n_groups * k).reshape(n_groups, k)
+        out[:, j] = np.where(counts.max(axis=1) > 0, counts.argmax(axis=1), -1)
+    return out
+
+
+class VillageIndex:
+    """
+    Hierarchical district / tehsil / gram panchayat / village feature index.
+
+    Parameters
+    ----------
+    master : DataFrame with the VILLAGE_KEYS columns (canonical names) and
+        any number of attribute columns; numeric ones are averaged up the
+        hierarchy, the rest are treated as categorical.
+    """
+
+    def __init__(self, master: pd.DataFrame):
+        attrs = [c for c in master.columns if c not in VILLAGE_KEYS]
+        self.numeric_columns = [c for c in attrs if master[c].dtype.kind in "biuf"]
+        self.categorical_columns = [c for c in attrs if c not in self.numeric_columns]
+
+        # key columns -> master code space
+        self._key_codes = {}
+        self._key_lookup = {}
+        key_codes = []
+        for k in VILLAGE_KEYS:
+            codes, values = factorize_normalized(master[k])
+            uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+            self._key_codes[k] = pd.Index(uniques)
+            self._key_lookup[k] = {v: i for i, v in enumerate(uniques)}
+            key_codes.append(inverse[codes].astype(np.int64))
+        self._radix = [len(self._key_codes[k]) for k in VILLAGE_KEYS]
+
+        num = master[self.numeric_columns].to_numpy(dtype=float) if self.numeric_columns else np.empty((len(master), 0))
+        cats = [master[c].astype("category") for c in self.categorical_columns]
+        self.categories = [list(s.cat.categories) for s in cats]
+        cat = (
+            np.column_stack([s.cat.codes.to_numpy().astype(np.int32) for s in cats])
+            if cats else np.empty((len(master), 0), dtype=np.int32)
+        )
+        n_categories = [len(c) for c in self.categories]
+
+        # one table of feature vectors for all levels, plus per-level sorted keys
+        num_blocks, cat_blocks = [], []
+        self._levels = []
+        offset = 0
+        for name, depth in LEVELS:
+            keys = self._combine(key_codes[:depth], len(master))
+            level_keys, groups = np.unique(keys, return_inverse=True)
+            n_groups = len(level_keys)
+            if name == "village" and n_groups == len(master):
+                # one row per village: the vectors are the master rows themselves
+                order = np.empty(n_groups, dtype=np.int64)
+                order[groups] = np.arange(len(master))
+                num_blocks.append(num[order])
+                cat_blocks.append(cat[order])
+            else:
+                num_blocks.append(_group_mean(groups, n_groups, num))
+                cat_blocks.append(_group_mode(groups, n_groups, cat, n_categories))
+            self._levels.append((name, depth, level_keys, offset))
+            offset += n_groups
+
+        self.numeric = np.vstack(num_blocks)
+        self.codes = np.vstack(cat_blocks)
+        self.level_names = np.array([name for name, *_ in self._levels], dtype=object)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame):
+        """Index a frame with the master CSV's headers."""
+        renamed = {c: MASTER_KEY_COLUMNS.get(c, str(c).strip().lower()) for c in df.columns}
+        return cls(df.rename(columns=renamed))
+
+    def _combine(self, codes, n):
+        """Mixed-radix int64 key of the first len(codes) key columns; -1 if any is unknown."""
+        key = np.zeros(n, dtype=np.int64)
+        unknown = np.zeros(n, dtype=bool)
+        for c, radix in zip(codes, self._radix):
+            key = key * radix + np.maximum(c, 0)
+            unknown |= c < 0
+        return np.where(unknown, -1, key)
+
+    def _encode(self, df: pd.DataFrame):
+        """Codes of df's key columns in the master code space (-1 = unknown)."""
+        names = {str(c).strip().lower(): c for c in df.columns}
+        out = []
+        for k in VILLAGE_KEYS:
+            if k not in names:
+                out.append(np.full(len(df), -1, dtype=np.int64))
+                continue
+            codes, values = factorize_normalized(df[names[k]])
+            mapped = self._key_codes[k].get_indexer(values.astype(str))
+            out.append(mapped[codes].astype(np.int64))
+        return out
+
+    def _resolve(self, key_codes, n):
+        """(table row, level position) for each of n rows, finest matching level first."""
+        rows = np.full(n, -1, dtype=np.int64)
+        level = np.full(n, len(self._levels) - 1, dtype=np.int64)
+        for i, (_, depth, level_keys, offset) in enumerate(self._levels):
+            todo = rows < 0
+            if not todo.any():
+                break
+            keys = self._combine([c[todo] for c in key_codes[:depth]], int(todo.sum()))
+            pos = np.searchsorted(level_keys, keys)
+            pos = np.minimum(pos, len(level_keys) - 1)
+            found = (keys >= 0) & (level_keys[pos] == keys)
+            idx = np.flatnonzero(todo)[found]
+            rows[idx] = offset + pos[found]
+            level[idx] = i
+        return rows, level
+
+    def rows_for(self, df: pd.DataFrame):
+        """(table row, match level name) arrays for the rows of df."""
+        rows, level = self._resolve(self._encode(df), len(df))
+        return rows, self.level_names[level]
+
+    def lookup(self, df: pd.DataFrame, columns=None, prefix="village_") -> pd.DataFrame:
+        """
+        Village context for every row of df as a DataFrame aligned to df.index:
+        one column per (requested) attribute plus `<prefix>match_level`.
+        """
+        rows, levels = self.rows_for(df)
+        wanted = None if columns is None else set(columns)
+
+        data = {}
+        for j, c in enumerate(self.numeric_columns):
+            if wanted is None or c in wanted:
+                data[prefix + c] = self.numeric[rows, j]
+        for j, c in enumerate(self.categorical_columns):
+            if wanted is None or c in wanted:
+                data[prefix + c] = pd.Categorical.from_codes(self.codes[rows, j], categories=self.categories[j])
+        data[prefix + "match_level"] = levels
+        return pd.DataFrame(data, index=df.index)
+
+    def enrich(self, df: pd.DataFrame, columns=None, prefix="village_") -> pd.DataFrame:
+        """df with the village context columns appended."""
+        return pd.concat([df, self.lookup(df, columns=columns, prefix=prefix)], axis=1)
+
+    def row_index(self, district=None, tehsil=None, gram_panchayat=None, village=None):
+        """(table row, match level name) for one location; dict lookups only."""
+        given = dict(district=district, tehsil=tehsil, gram_panchayat=gram_panchayat, village=village)
+        codes = [
+            self._key_lookup[k].get(_normalize(given[k]), -1) if given[k] is not None else -1
+            for k in VILLAGE_KEYS
+        ]
+        for name, depth, level_keys, offset in self._levels:
+            if any(c < 0 for c in codes[:depth]):
+                continue
+            key = 0
+            for c, radix in zip(codes[:depth], self._radix):
+                key = key * radix + c
+            pos = int(np.searchsorted(level_keys, key))
+            if pos < len(level_keys) and level_keys[pos] == key:
+                return offset + pos, name
+        raise KeyError("empty village index")
+
+    def lookup_row(self, row, prefix="village_") -> dict:
+        """Village context of one claim row (dict or Series) as a plain dict."""
+        get = row.get
+        row_id, level = self.row_index(**{k: get(k) for k in VILLAGE_KEYS})
+        out = {prefix + c: float(self.numeric[row_id, j]) for j, c in enumerate(self.numeric_columns)}
+        for j, c in enumerate(self.categorical_columns):
+            code = self.codes[row_id, j]
+            out[prefix + c] = self.categories[j][code] if code >= 0 else None
+        out[prefix + "match_level"] = level
+        return out
+
+
+_CACHE = {}
+_LOCK = threading.Lock()
+
+
+def load_village_index(path=None) -> VillageIndex:
+    """
+    Process-wide VillageIndex over the village master (or the CSV at path),
+    read through the columnar cache and rebuilt when the CSV changes.
+    """
+    from datacache import _source, load_dataset
+
+    name = path or VILLAGE_DATASET
+    src = _source(name)
+    st = os.stat(src)
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    with _LOCK:
+        cached = _CACHE.get(src)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        index = VillageIndex.from_frame(load_dataset(name))
+        _CACHE[src] = (stamp, index)
+        return index